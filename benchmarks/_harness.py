@@ -0,0 +1,182 @@
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# headless: no display, no audio, no real controllers. Must be set before pygame / Qt are imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from joystickmapper._event import JoyEvent
+
+_app = None
+
+
+def getApp():
+    global _app
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+        # modal dialogs would block forever in offscreen mode. Benchmarks only measure the code around them
+        QMessageBox.exec = lambda self: 0
+    return _app
+
+
+@contextlib.contextmanager
+def workingFolder():
+    # mapper writes journal, inspect and profile files to current folder
+    prevFolder = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="joystickmapper_bench_") as folder:
+        os.chdir(folder)
+        try:
+            yield folder
+        finally:
+            os.chdir(prevFolder)
+
+
+@contextlib.contextmanager
+def quiet():
+    # listener and mapper print every event; console output is not what we want to measure
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class Signals(QObject):
+    joysticksConnected = pyqtSignal(dict)
+    buttonValue = pyqtSignal(object)
+    toggleInspectMode = pyqtSignal(bool)
+
+
+def joysticksInfo(count=1):
+    return {str(i): {"name": f"Synthetic Pad {i}", "guid": f"0300{i:028x}", "id": str(i)} for i in range(count)}
+
+
+def buttonStream(n, instance_id=0, buttons=12):
+    events = []
+    for i in range(n // 2):
+        button = i % buttons
+        events.append(pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=instance_id, button=button))
+        events.append(pygame.event.Event(pygame.JOYBUTTONUP, instance_id=instance_id, button=button))
+    return events
+
+
+def mixedStream(n, instance_id=0, axes=6, buttons=12):
+    # realistic mix: mostly axis noise / travel, plus hat and button presses
+    hatValues = [(0, 1), (0, 0), (1, 0), (0, 0), (0, -1), (0, 0), (-1, 0), (0, 0)]
+    events = []
+    i = 0
+    while len(events) < n:
+        kind = i % 10
+        if kind < 6:
+            axis = i % axes
+            value = ((i * 7919) % 2001 - 1000) / 1000
+            if i % 13 == 0:
+                value = 1.0 if value >= 0 else -1.0
+            events.append(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=instance_id, axis=axis, value=value))
+        elif kind < 8:
+            events.append(pygame.event.Event(pygame.JOYHATMOTION, instance_id=instance_id, hat=0,
+                                             value=hatValues[i % len(hatValues)]))
+        else:
+            button = i % buttons
+            events.append(pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=instance_id, button=button))
+            events.append(pygame.event.Event(pygame.JOYBUTTONUP, instance_id=instance_id, button=button))
+        i += 1
+    return events[:n]
+
+
+def mappingStream(n, instance_id=0):
+    # events the mapper accepts as assignments (already filtered and normalized by the listener)
+    hatValues = [(0, 1), (0, -1), (-1, 0), (1, 0)]
+    events = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            events.append(JoyEvent(pygame.JOYBUTTONUP, instance_id, i % 16, 0))
+        elif kind == 1:
+            events.append(JoyEvent(pygame.JOYHATMOTION, instance_id, 0, hatValues[i % 4]))
+        else:
+            events.append(JoyEvent(pygame.JOYAXISMOTION, instance_id, i % 6, 1.0 if i % 2 else -1.0))
+    return events
+
+
+def percentile(sortedValues, p):
+    if not sortedValues:
+        return 0
+    k = (len(sortedValues) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(sortedValues) - 1)
+    return sortedValues[f] + (sortedValues[c] - sortedValues[f]) * (k - f)
+
+
+def measure(name, func, items, prepare=None):
+    # timed pass (no tracing overhead), then a second pass under tracemalloc to get peak memory
+    items = list(items)
+    samples = []
+    gc.collect()
+    with quiet():
+        start = time.perf_counter_ns()
+        for item in items:
+            if prepare is not None:
+                prepare(item)
+            t0 = time.perf_counter_ns()
+            func(item)
+            samples.append(time.perf_counter_ns() - t0)
+        total = time.perf_counter_ns() - start
+
+        tracemalloc.start()
+        for item in items:
+            if prepare is not None:
+                prepare(item)
+            func(item)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    samples.sort()
+    busy = sum(samples)
+    return {
+        "name": name,
+        "events": len(items),
+        "events_per_sec": len(items) / (busy / 1e9) if busy else 0.0,
+        "wall_sec": total / 1e9,
+        "p50_us": percentile(samples, 50) / 1000,
+        "p90_us": percentile(samples, 90) / 1000,
+        "p99_us": percentile(samples, 99) / 1000,
+        "max_us": samples[-1] / 1000 if samples else 0.0,
+        "peak_kib": peak / 1024
+    }
+
+
+def printReport(results):
+    header = f"{'benchmark':<36}{'events':>9}{'events/s':>13}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'max us':>11}{'peak KiB':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        peak = f"{r['peak_kib']:>11.1f}" if r["peak_kib"] is not None else f"{'-':>11}"
+        print(f"{r['name']:<36}{r['events']:>9}{r['events_per_sec']:>13.0f}{r['p50_us']:>10.1f}{r['p90_us']:>10.1f}"
+              f"{r['p99_us']:>10.1f}{r['max_us']:>11.1f}{peak}")
+        if r.get("details"):
+            print("    " + " ".join(f"{key}={value}" for key, value in r["details"].items()))
+
+
+def compareWithBaseline(results, baselineFile, tolerance):
+    # returns the list of benchmarks whose throughput dropped more than tolerance (e.g. 0.2 = 20%)
+    with open(baselineFile, "r", encoding="utf8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        ref = baseline.get(r["name"])
+        if ref and ref["events_per_sec"] and r["events_per_sec"] < ref["events_per_sec"] * (1 - tolerance):
+            regressions.append((r["name"], ref["events_per_sec"], r["events_per_sec"]))
+    return regressions
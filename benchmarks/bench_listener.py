@@ -0,0 +1,38 @@
+from benchmarks._harness import getApp, Signals, measure, buttonStream, mixedStream
+
+from joystickmapper._listener import JoystickListener
+
+
+def makeListener(free_mode=False):
+    getApp()
+    signals = Signals()
+    emitted = []
+    signals.buttonValue.connect(emitted.append)
+    listener = JoystickListener(None, signals.joysticksConnected, signals.buttonValue, signals.toggleInspectMode, free_mode)
+    # keep signals object alive as long as the listener
+    listener.benchSignals = signals
+    return listener, emitted
+
+
+def benchFilterMixed(n):
+    listener, emitted = makeListener()
+    result = measure("listener.filter mixed", listener.processEvent, mixedStream(n))
+    result["emitted"] = len(emitted)
+    return result
+
+
+def benchFilterButtons(n):
+    listener, emitted = makeListener()
+    result = measure("listener.filter buttons", listener.processEvent, buttonStream(n))
+    result["emitted"] = len(emitted)
+    return result
+
+
+def benchFreeMode(n):
+    listener, emitted = makeListener(free_mode=True)
+    result = measure("listener.free mode", listener.processEvent, mixedStream(n))
+    result["emitted"] = len(emitted)
+    return result
+
+
+BENCHMARKS = [benchFilterMixed, benchFilterButtons, benchFreeMode]
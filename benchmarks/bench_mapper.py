@@ -0,0 +1,62 @@
+import os
+
+from benchmarks._harness import getApp, measure, joysticksInfo, mappingStream, quiet
+
+from joystickmapper import JoystickMapper, Mode
+
+
+def makeMapper(pad_layout=Mode.FULL, **kwargs):
+    getApp()
+    with quiet():
+        mapper = JoystickMapper(pad_layout, **kwargs)
+        mapper.getJoysticks(joysticksInfo())
+    return mapper
+
+
+def benchConfigButtonValue(n):
+    mapper = makeMapper()
+
+    def restart(event):
+        # start over when the whole layout is assigned (not timed)
+        if mapper.currentIndex >= len(mapper.padLayout) - 1:
+            mapper.changeLayout(mapper.ui.layoutCombo.currentIndex(), force=True)
+            mapper.updateNextButton(0, -1)
+
+    return measure("mapper.configButtonValue", mapper.configButtonValue, mappingStream(n), prepare=restart)
+
+
+def benchUpdateNextButton(n):
+    mapper = makeMapper()
+    size = len(mapper.padLayout)
+
+    def step(i):
+        mapper.updateNextButton((i + 1) % size, i % size, "BENCH")
+
+    return measure("mapper.updateNextButton", step, range(n))
+
+
+def benchSaveConfig(n):
+    with quiet():
+        mapper = makeMapper(output_file="bench_profile.json")
+        for event in mappingStream(len(mapper.padLayout)):
+            mapper.configButtonValue(event)
+    return measure("mapper.saveConfig", lambda i: mapper.saveConfig(True), range(max(1, n // 100)))
+
+
+def benchLoadConfig(n):
+    with quiet():
+        mapper = makeMapper(output_file="bench_profile.json")
+        for event in mappingStream(len(mapper.padLayout)):
+            mapper.configButtonValue(event)
+        mapper.saveConfig(True)
+    fileName = os.path.abspath("bench_profile.json")
+    return measure("mapper.loadConfigFile", lambda i: mapper.loadConfigFile(fileName), range(max(1, n // 100)))
+
+
+def benchLayoutSwitch(n):
+    mapper = makeMapper()
+    count = mapper.ui.layoutCombo.count()
+    return measure("mapper.changeLayout", lambda i: mapper.changeLayout(i % count, force=True), range(max(1, n // 20)))
+
+
+BENCHMARKS = [benchConfigButtonValue, benchUpdateNextButton, benchSaveConfig, benchLoadConfig, benchLayoutSwitch]
@@ -0,0 +1,46 @@
+from benchmarks._harness import getApp, measure, joysticksInfo, quiet
+
+from joystickmapper import JoystickMapper, Mode
+
+
+def makeWindow(angle, tuned=True):
+    # windowed, so the rotated view has a fixed size instead of the (offscreen) screen size
+    app = getApp()
+    with quiet():
+        mapper = JoystickMapper(Mode.FULL, angle=angle, windowed=True)
+        mapper.getJoysticks(joysticksInfo())
+        if angle:
+            mapper.ui.tuneRotatedView(tuned)
+        mapper.show()
+    app.processEvents()
+    return app, mapper
+
+
+def benchRepaint(name, angle, tuned, n):
+    # one assignment (two labels and two styles change) plus the repaint it triggers
+    app, mapper = makeWindow(angle, tuned)
+    size = len(mapper.padLayout)
+
+    def step(i):
+        mapper.updateNextButton((i + 1) % size, i % size, "BENCH")
+        app.processEvents()
+
+    result = measure(name, step, range(max(1, n // 20)))
+    with quiet():
+        mapper.forceClose()
+    return result
+
+
+def benchRepaintUnrotated(n):
+    return benchRepaint("ui.repaint (0)", 0, False, n)
+
+
+def benchRepaintRotatedDefault(n):
+    return benchRepaint("ui.repaint (90, qt defaults)", 90, False, n)
+
+
+def benchRepaintRotatedTuned(n):
+    return benchRepaint("ui.repaint (90, tuned)", 90, True, n)
+
+
+BENCHMARKS = [benchRepaintUnrotated, benchRepaintRotatedDefault, benchRepaintRotatedTuned]
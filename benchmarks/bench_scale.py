@@ -0,0 +1,314 @@
+import collections
+import contextlib
+import threading
+import time
+
+import pygame
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from benchmarks._harness import getApp, quiet, mixedStream, percentile
+
+from joystickmapper import JoystickMapper, Mode
+
+# controllers simulated by every scale benchmark (big cabinets and test rigs have 8-16 input devices)
+deviceCounts = (1, 4, 8, 16)
+# events per second sent by every simulated controller (each one a bit faster than the previous one, see feed())
+deviceRate = 500
+# hotplug churn: every churnInterval seconds a controller is unplugged, and plugged back churnDowntime seconds later
+churnInterval = 0.25
+churnDowntime = 0.1
+# events counted for throughput, fairness and loss (hotplug events are not controller input)
+inputTypes = (pygame.JOYAXISMOTION, pygame.JOYHATMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP)
+
+
+class SyntheticJoystick:
+    # what the listener reads from a pygame.joystick.Joystick
+
+    def __init__(self, slot, instance_id):
+        self.slot = slot
+        self.instance_id = instance_id
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_id(self):
+        return self.slot
+
+    def get_name(self):
+        return f"Synthetic Pad {self.slot}"
+
+    def get_guid(self):
+        return f"0300{self.slot:028x}"
+
+    def get_init(self):
+        return True
+
+    def init(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def get_numaxes(self):
+        return 6
+
+    def get_numbuttons(self):
+        return 12
+
+    def get_numhats(self):
+        return 1
+
+    def get_axis(self, axis):
+        return 0.0
+
+
+class SyntheticBus:
+    # stands in for SDL: controllers connected right now, and their pending events (as pygame.event.get() returns
+    # them). Fed from its own thread by feed(), like SDL does with real devices. Every replug gets a new instance id
+    # (as SDL does), so slots (physical controllers) are tracked by instance id
+
+    def __init__(self, count, duration):
+        self.count = count
+        self.duration = duration
+        self.devices = []
+        self.listed = []
+        self.pending = collections.deque()
+        self.slots = {}
+        self.nextInstance = 0
+        self.offered = [0] * count
+        self.hotplugs = 0
+        # time (ns) events waited in the bus until the listener polled them
+        self.pollLags = []
+        for slot in range(count):
+            self.plug(slot, notify=False)
+
+    def plug(self, slot, notify=True):
+        instance_id = self.nextInstance
+        self.nextInstance += 1
+        self.slots[instance_id] = slot
+        # replaced, not modified: the listener may be enumerating the previous list
+        self.devices = sorted(self.devices + [SyntheticJoystick(slot, instance_id)], key=lambda device: device.slot)
+        if notify:
+            self.hotplugs += 1
+            self.post([pygame.event.Event(pygame.JOYDEVICEADDED, device_index=slot)])
+
+    def unplug(self, slot):
+        device = next(device for device in self.devices if device.slot == slot)
+        self.devices = [other for other in self.devices if other is not device]
+        self.hotplugs += 1
+        self.post([pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=device.instance_id)])
+
+    def post(self, events):
+        self.pending.append((time.perf_counter_ns(), events))
+
+    def get(self):
+        # listener thread (replaces pygame.event.get)
+        events = []
+        now = time.perf_counter_ns()
+        while self.pending:
+            posted, batch = self.pending.popleft()
+            self.pollLags.append(now - posted)
+            events.extend(batch)
+        return events
+
+    def get_count(self):
+        # get_count() and Joystick(i) are called one after the other: both see the same list
+        self.listed = self.devices
+        return len(self.listed)
+
+    def Joystick(self, index):
+        return self.listed[index]
+
+    def feed(self):
+        # feeder thread: every controller sends its own stream at its own rate, while controllers are unplugged and
+        # plugged back (round robin) every churnInterval seconds
+        rates = [deviceRate * (1 + (slot % 4) / 10) for slot in range(self.count)]
+        streams = [mixedStream(int(rate * self.duration) + 1, slot) for slot, rate in enumerate(rates)]
+        sent = [0] * self.count
+        unplugged = {}
+        nextChurn = churnInterval
+        churnSlot = 0
+        start = time.perf_counter()
+        while True:
+            now = time.perf_counter() - start
+            if now >= self.duration:
+                break
+            if now >= nextChurn:
+                nextChurn += churnInterval
+                if churnSlot not in unplugged:
+                    self.unplug(churnSlot)
+                    unplugged[churnSlot] = now + churnDowntime
+                churnSlot = (churnSlot + 1) % self.count
+            for slot, replug in list(unplugged.items()):
+                if now >= replug:
+                    del unplugged[slot]
+                    self.plug(slot)
+            batch = []
+            connected = {device.slot: device.instance_id for device in self.devices}
+            for slot in range(self.count):
+                # streams go on while unplugged (nothing is sent meanwhile)
+                due = min(int(now * rates[slot]), len(streams[slot]))
+                if slot in connected:
+                    for event in streams[slot][sent[slot]:due]:
+                        batch.append(pygame.event.Event(event.type, dict(event.dict, instance_id=connected[slot])))
+                    self.offered[slot] += due - sent[slot]
+                sent[slot] = due
+            if batch:
+                self.post(batch)
+            time.sleep(0.001)
+
+
+@contextlib.contextmanager
+def synthetic(bus):
+    # listener enumerates and polls the synthetic bus instead of SDL
+    saved = pygame.event.get, pygame.joystick.get_count, pygame.joystick.Joystick
+    pygame.event.get, pygame.joystick.get_count, pygame.joystick.Joystick = bus.get, bus.get_count, bus.Joystick
+    try:
+        yield
+    finally:
+        pygame.event.get, pygame.joystick.get_count, pygame.joystick.Joystick = saved
+
+
+class CountingQueue:
+    # between the listener and the mapper queue: events emitted by the listener, by controller
+    def __init__(self, queue, bus):
+        self.queue = queue
+        self.bus = bus
+        self.emitted = [0] * bus.count
+
+    def emit(self, event):
+        slot = self.bus.slots.get(event.instance_id)
+        if slot is not None and event.type in inputTypes:
+            self.emitted[slot] += 1
+        self.queue.emit(event)
+
+
+def wait(seconds):
+    # GUI thread idles in the event loop (as it does with real controllers), so queued calls are delivered meanwhile
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def jainIndex(values):
+    # 1.0 when every controller gets the same share, 1/n when a single one gets everything
+    values = [value for value in values if value is not None]
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+
+def runScale(name, pad_layout, count, n):
+    # whole pipeline with threads as in the app: feeder (SDL) -> listener thread -> bounded queue -> GUI thread
+    # (mapper). Offered events are n at 16 controllers (so -n still sets the run length), and the same time for fewer
+    getApp()
+    duration = max(1.0, n / (max(deviceCounts) * deviceRate))
+    bus = SyntheticBus(count, duration)
+    delivered = [0] * count
+    latencies = []
+    relayouts = []
+    rescans = []
+
+    with quiet(), synthetic(bus):
+        mapper = JoystickMapper(pad_layout)
+        listener = mapper.listener_obj
+        counting = CountingQueue(mapper.eventQueue, bus)
+        listener.buttonValueSig = counting
+
+        dispatch = mapper.getButtonValue
+
+        def getButtonValue(event):
+            dispatch(event)
+            done = time.perf_counter_ns()
+            slot = bus.slots.get(event.instance_id)
+            if slot is not None and event.type in inputTypes:
+                delivered[slot] += 1
+                latencies.append(done - event.captured)
+
+        mapper.getButtonValue = getButtonValue
+
+        # hotplug cost on both sides: listener rescan (listener thread) and combo box / padValues rebuild (GUI)
+        rescan = listener.addJoysticks
+
+        def addJoysticks():
+            t0 = time.perf_counter_ns()
+            result = rescan()
+            rescans.append(time.perf_counter_ns() - t0)
+            return result
+
+        listener.addJoysticks = addJoysticks
+
+        def getJoysticks(joysticksInfo):
+            t0 = time.perf_counter_ns()
+            mapper.getJoysticks(joysticksInfo)
+            relayouts.append(time.perf_counter_ns() - t0)
+
+        mapper._joysticksConnectedSig.disconnect(mapper.getJoysticks)
+        mapper._joysticksConnectedSig.connect(getJoysticks)
+
+        feeder = threading.Thread(target=bus.feed, daemon=True)
+        start = time.perf_counter_ns()
+        mapper.listener_thread.start()
+        feeder.start()
+        wait(duration)
+        feeder.join()
+        # listener polls what is left, and the GUI drains it
+        wait(0.2)
+        listener.stop()
+        mapper.listener_thread.quit()
+        mapper.listener_thread.wait()
+        wait(0.05)
+        mapper.drainEvents()
+        wall = time.perf_counter_ns() - start
+        counters = mapper.eventQueue.counters()
+
+    latencies.sort()
+    emitted = sum(counting.emitted)
+    total = sum(delivered)
+    shares = [delivered[slot] / counting.emitted[slot] if counting.emitted[slot] else None for slot in range(count)]
+    bus.pollLags.sort()
+    relayouts.sort()
+    return {
+        "name": f"{name} {count:>2} pads",
+        "events": total,
+        "events_per_sec": total / (wall / 1e9),
+        "wall_sec": wall / 1e9,
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p90_us": percentile(latencies, 90) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "max_us": latencies[-1] / 1000 if latencies else 0.0,
+        # not traced: tracemalloc would slow down the threads whose timing is measured here
+        "peak_kib": None,
+        "details": {
+            "devices": count,
+            "offered": sum(bus.offered),
+            "emitted": emitted,
+            "lost": emitted - total,
+            "dropped": counters["dropped"],
+            "coalesced": counters["coalesced"],
+            "discarded": counters["discarded"],
+            "queue_peak": counters["peak"],
+            "fairness": round(jainIndex(shares), 3),
+            "min_share": round(min((share for share in shares if share is not None), default=1.0), 3),
+            "hotplugs": bus.hotplugs,
+            "rescan_max_us": round(max(rescans, default=0) / 1000, 1),
+            "relayout_p50_us": round(percentile(relayouts, 50) / 1000, 1),
+            "relayout_max_us": round(relayouts[-1] / 1000, 1) if relayouts else 0.0,
+            "poll_lag_p99_ms": round(percentile(bus.pollLags, 99) / 1e6, 2)
+        }
+    }
+
+
+def benchMappingScale(n):
+    # mapping mode: listener filters events, mapper assigns the selected controller, and rebuilds the controllers
+    # combo box and padValues on every hotplug
+    return [runScale("scale.mapping", Mode.FULL, count, n) for count in deviceCounts]
+
+
+def benchInspectScale(n):
+    # inspect mode: every event of every controller reaches the inspect console
+    return [runScale("scale.inspect", Mode.INSPECT, count, n) for count in deviceCounts]
+
+
+BENCHMARKS = [benchMappingScale, benchInspectScale]
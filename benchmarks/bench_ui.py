@@ -0,0 +1,13 @@
+from benchmarks._harness import getApp, measure, mixedStream
+
+from joystickmapper._scrolllabel import ScrollLabel
+
+
+def benchAppendText(n):
+    getApp()
+    label = ScrollLabel()
+    lines = [str(event) for event in mixedStream(n)]
+    return measure("scrolllabel.appendText", label.appendText, lines)
+
+
+BENCHMARKS = [benchAppendText]
@@ -0,0 +1,70 @@
+import json
+import sys
+
+from benchmarks._harness import getApp, workingFolder, printReport, compareWithBaseline
+from benchmarks import bench_listener, bench_mapper, bench_ui, bench_rotation, bench_scale
+
+suites = {
+    "listener": bench_listener.BENCHMARKS,
+    "mapper": bench_mapper.BENCHMARKS,
+    "ui": bench_ui.BENCHMARKS,
+    "rotation": bench_rotation.BENCHMARKS,
+    "scale": bench_scale.BENCHMARKS
+}
+
+
+def getArgs():
+    events = 20000
+    output_file = None
+    baseline_file = None
+    tolerance = 0.2
+    selected = []
+    i = 1
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == "-n":
+            events = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "-o":
+            output_file = str(sys.argv[i + 1])
+            i += 1
+        elif arg == "-b":
+            baseline_file = str(sys.argv[i + 1])
+            i += 1
+        elif arg == "-t":
+            tolerance = float(sys.argv[i + 1])
+            i += 1
+        else:
+            selected.append(arg)
+        i += 1
+    return events, output_file, baseline_file, tolerance, selected or list(suites.keys())
+
+
+def main():
+    events, output_file, baseline_file, tolerance, selected = getArgs()
+
+    getApp()
+    results = []
+    with workingFolder():
+        for suite in selected:
+            for bench in suites[suite]:
+                result = bench(events)
+                # scale benchmarks return one result per number of controllers
+                results.extend(result if isinstance(result, list) else [result])
+
+    printReport(results)
+
+    if output_file:
+        with open(output_file, "w", encoding="utf8") as f:
+            json.dump({"events": events, "results": results}, f, indent=4)
+
+    if baseline_file:
+        regressions = compareWithBaseline(results, baseline_file, tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.0f} -> {after:.0f} events/s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
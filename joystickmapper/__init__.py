@@ -1,6 +1,20 @@
 from ._angles import Angle
 from ._modes import Mode
-from ._mapper import JoystickMapper
+from ._client import MappingClient
 
 
-__version__ = "0.1.0"
\ No newline at end of file
+__version__ = "0.1.0"
+
+
+def __getattr__(name):
+    # Qt is only imported when the Qt mapper is actually used, so the lite front end never loads it
+    if name == "JoystickMapper":
+        from ._mapper import JoystickMapper
+        return JoystickMapper
+    elif name == "LiteMapper":
+        from ._lite import LiteMapper
+        return LiteMapper
+    elif name == "AsyncJoystickListener":
+        from ._aio import AsyncJoystickListener
+        return AsyncJoystickListener
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
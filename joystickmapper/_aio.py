@@ -0,0 +1,150 @@
+import asyncio
+import collections
+import os
+import threading
+
+from ._listenercore import ListenerCore, Emitter
+from ._profiles import loadProfiles
+from ._translate import DeviceMapper, rawMessage
+from ._state import ControllerStateBuffer
+
+
+class AsyncJoystickListener:
+    # asyncio interface, without Qt: controllers are polled by the listener core in its own thread, and messages are
+    # handed to the event loop with call_soon_threadsafe, once per listener iteration (not once per event)
+    #   async for message in listener      raw and / or mapped events (same dicts as MappingClient messages)
+    #   await listener.deviceChange()      next controller added / removed message
+    #   listener.devices                   connected controllers (guid, name and layout of their profile)
+    #   listener.state                     current state of every controller, to poll it every frame (no await)
+    #   await listener.swapProfile(...)    switch the profile of a controller (compiled off the listener thread)
+    # mapped events are only produced for controllers with a saved profile (loaded from profilesFolder)
+
+    def __init__(self, raw=False, mapped=True, profilesFolder=".", fps=250):
+
+        self.raw = raw
+        self.mapped = mapped
+        self.profilesFolder = profilesFolder
+        self.fps = fps
+        self.devices = {}
+        self.state = ControllerStateBuffer()
+
+        self.loop = None
+        self.events = None
+        self.deviceChanges = None
+        self.listener = None
+        self.deviceMapper = None
+        self.thread = None
+        self.pending = []
+        # profiles compiled by swapProfile(), applied by the listener thread before its next poll
+        self.swaps = collections.deque()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+        self.deviceChanges = asyncio.Queue()
+        # profiles are read from disk in an executor, not in the event loop
+        profiles = await self.loop.run_in_executor(None, loadProfiles, self.profilesFolder) if self.mapped else {}
+        self.deviceMapper = DeviceMapper(profiles, gestureSig=Emitter(self.getGesture))
+        self.listener = ListenerCore(Emitter(self.getJoysticks), Emitter(self.getEvent), free_mode=True)
+        self.listener.echo = False
+        self.listener.setPollRate(self.fps)
+        self.listener.setSharedState(self.state)
+        self.thread = threading.Thread(target=self.run, name="JoystickListener", daemon=True)
+        self.thread.start()
+        return self
+
+    async def stop(self):
+        if self.thread is not None:
+            self.listener.stop()
+            await self.loop.run_in_executor(None, self.thread.join)
+            self.thread = None
+            # ends any "async for" waiting for events
+            self.events.put_nowait(None)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.events.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def deviceChange(self):
+        return await self.deviceChanges.get()
+
+    async def swapProfile(self, instance_id, fileName=None):
+        # fileName relative to profilesFolder (or absolute), None to go back to the profile of its guid
+        # the file is read and compiled (if not cached) in an executor. False if it is not a profile
+        profile = None
+        if fileName:
+            profile = await self.loop.run_in_executor(None, self.deviceMapper.cache.load,
+                                                      os.path.join(self.profilesFolder, fileName))
+            if profile is None:
+                return False
+        self.swaps.append((instance_id, profile))
+        return True
+
+    def deliver(self, messages):
+        # event loop thread
+        for message in messages:
+            if message["type"] == "added":
+                self.devices[message["instance_id"]] = message
+                self.deviceChanges.put_nowait(message)
+            elif message["type"] == "removed":
+                self.devices.pop(message["instance_id"], None)
+                self.deviceChanges.put_nowait(message)
+            else:
+                self.events.put_nowait(message)
+
+    def run(self):
+        # listener thread
+        self.listener.openListener()
+        self.handOff()
+        while self.listener.keepListening:
+            self.applySwaps()
+            self.listener.poll()
+            self.deviceMapper.advance()
+            self.handOff()
+        self.listener.closeListener()
+
+    def handOff(self):
+        if self.pending:
+            messages, self.pending = self.pending, []
+            try:
+                self.loop.call_soon_threadsafe(self.deliver, messages)
+            except RuntimeError:
+                # event loop closed without stopping the listener
+                self.listener.stop()
+
+    def applySwaps(self):
+        while self.swaps:
+            instance_id, profile = self.swaps.popleft()
+            change, released = self.deviceMapper.swap(instance_id, profile)
+            if change is not None:
+                if self.mapped:
+                    self.pending.extend({"type": "mapped", "instance_id": instance_id, "key": key, "pressed": False}
+                                        for key in released)
+                self.pending.append(change)
+
+    def getGesture(self, instance_id, name):
+        if self.mapped:
+            self.pending.append({"type": "gesture", "instance_id": instance_id, "gesture": name})
+
+    def getJoysticks(self, joysticksInfo):
+        self.pending.extend(self.deviceMapper.update(joysticksInfo))
+
+    def getEvent(self, event):
+        if self.raw:
+            message = rawMessage(event)
+            if message is not None:
+                self.pending.append(message)
+        if self.mapped:
+            for key, pressed in self.deviceMapper.translate(event):
+                self.pending.append({"type": "mapped", "instance_id": event.instance_id, "key": key, "pressed": pressed})
@@ -0,0 +1,136 @@
+import json
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._utils import write_json_atomic
+
+
+class AxisClassifier:
+    # classifies every axis of a controller as "stick" or "trigger" from its observed behavior:
+    # - rest value: sticks rest at 0, most triggers rest at -1 (or 1)
+    # - travel: sticks move to both sides of their rest value, triggers only to one side (some triggers rest at 0)
+    # rest values are sampled during a short window when the controller is connected. Results are cached by GUID,
+    # so reconnecting the same controller (or a controller of the same model) skips sampling entirely
+    # all methods are called from the listener thread
+
+    def __init__(self, windowSize=30, fileName="joystickmapper_axes.json"):
+
+        self.windowSize = windowSize
+        self.fileName = fileName
+        self.cache = self.loadCache()
+        self.guids = {}
+        self.kinds = {}
+        self.rests = {}
+        self.sampling = {}
+        self.travel = {}
+
+    def loadCache(self):
+        if os.path.exists(self.fileName):
+            try:
+                with open(self.fileName, "r", encoding="utf8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def saveCache(self, instance_id):
+        guid = self.guids.get(instance_id)
+        if guid is None:
+            return
+        self.cache[guid] = {"kinds": {str(axis): kind for axis, kind in self.kinds[instance_id].items()},
+                            "rests": {str(axis): rest for axis, rest in self.rests[instance_id].items()}}
+        try:
+            write_json_atomic(self.fileName, self.cache)
+        except OSError:
+            pass
+
+    def update(self, joysticks):
+        # called with the current joysticks list every time a device is added or removed
+        connected = {}
+        for joystick in joysticks:
+            connected[joystick.get_instance_id()] = joystick
+        for instance_id in list(self.guids.keys()):
+            if instance_id not in connected:
+                for values in (self.guids, self.kinds, self.rests, self.sampling, self.travel):
+                    values.pop(instance_id, None)
+        for instance_id, joystick in connected.items():
+            if instance_id not in self.guids:
+                self.addJoystick(instance_id, joystick)
+
+    def addJoystick(self, instance_id, joystick):
+        guid = joystick.get_guid()
+        numAxes = joystick.get_numaxes()
+        self.guids[instance_id] = guid
+        self.travel[instance_id] = {}
+        cached = self.cache.get(guid)
+        if cached is not None and len(cached.get("kinds", {})) == numAxes:
+            self.kinds[instance_id] = {int(axis): kind for axis, kind in cached["kinds"].items()}
+            self.rests[instance_id] = {int(axis): rest for axis, rest in cached["rests"].items()}
+        else:
+            self.kinds[instance_id] = {}
+            self.rests[instance_id] = {}
+            if numAxes:
+                self.sampling[instance_id] = (joystick, {axis: [] for axis in range(numAxes)})
+
+    def sample(self):
+        # one reading of every axis still being sampled, once per listener iteration
+        for instance_id, (joystick, samples) in list(self.sampling.items()):
+            try:
+                for axis, values in samples.items():
+                    values.append(joystick.get_axis(axis))
+            except pygame.error:
+                del self.sampling[instance_id]
+                continue
+
+            for axis, values in list(samples.items()):
+                if len(values) >= self.windowSize:
+                    if max(values) - min(values) > 0.1:
+                        # axis moved during the window (user touching it): not a rest value, sample again
+                        values.clear()
+                    else:
+                        rest = round(sum(values) / len(values), 2)
+                        self.rests[instance_id][axis] = rest
+                        self.kinds[instance_id][axis] = "trigger" if abs(rest) > 0.5 else "stick"
+                        del samples[axis]
+
+            if not samples:
+                del self.sampling[instance_id]
+                self.saveCache(instance_id)
+
+    def observe(self, event):
+        # refine axes resting at 0 with their direction of travel (only full travels are taken into account)
+        rest = self.rests.get(event.instance_id, {}).get(event.axis)
+        if rest is None or abs(rest) > 0.5:
+            return
+        travel = self.travel[event.instance_id].get(event.axis)
+        if travel is None:
+            # full travels counted to each side, and whether the axis is currently at its limit
+            travel = [0, 0, False]
+            self.travel[event.instance_id][event.axis] = travel
+        if abs(event.value) < 0.5:
+            travel[2] = False
+            return
+        if abs(event.value) < 1.0 or travel[2]:
+            return
+        travel[2] = True
+        travel[1 if event.value > 0 else 0] += 1
+        kind = self.kinds[event.instance_id].get(event.axis)
+        if travel[0] and travel[1]:
+            newKind = "stick"
+        elif travel[0] + travel[1] >= 3:
+            # pressed to the limit several times, always to the same side
+            newKind = "trigger"
+        else:
+            newKind = kind
+        if newKind != kind:
+            self.kinds[event.instance_id][event.axis] = newKind
+            self.saveCache(event.instance_id)
+
+    def isStick(self, instance_id, axis):
+        kind = self.kinds.get(instance_id, {}).get(axis)
+        if kind is None:
+            # not classified yet: this is totally empyrical, axis beyond 3 are typically triggers, not joysticks
+            return axis <= 3
+        return kind == "stick"
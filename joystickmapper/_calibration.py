@@ -0,0 +1,49 @@
+try:
+    import numpy as np
+except ImportError:
+    # calibration is optional: it will be disabled if numpy is not installed
+    np = None
+
+
+def calibration_available():
+    return np is not None
+
+
+class AxisCalibrator:
+    # raw axis samples are streamed into a preallocated buffer (one row per listener iteration, one column per axis)
+    # first rows are taken with sticks / triggers at rest, then the user moves them to their limits
+
+    def __init__(self, numAxes, capacity=1200):
+        self.numAxes = numAxes
+        self.capacity = capacity
+        self.samples = np.empty((capacity, numAxes), dtype=np.float32)
+        self.count = 0
+        self.restCount = None
+
+    def addSample(self, values):
+        # values: sequence of numAxes floats. Samples beyond capacity are ignored
+        if self.count < self.capacity:
+            self.samples[self.count] = values
+            self.count += 1
+
+    def endRest(self):
+        self.restCount = self.count
+
+    def compute(self):
+        # single vectorized pass over all axes
+        restCount = self.restCount if self.restCount else self.count
+        if not self.count or not restCount:
+            return {}
+        rest = self.samples[:restCount]
+        allSamples = self.samples[:self.count]
+        center = np.median(rest, axis=0)
+        noise = rest.std(axis=0)
+        lows = allSamples.min(axis=0)
+        highs = allSamples.max(axis=0)
+        # recommended deadzone: largest rest deviation plus a noise margin, kept within sensible limits
+        deadzone = np.clip(np.abs(rest - center).max(axis=0) + 3 * noise, 0.02, 0.5)
+        return {str(axis): {"center": round(float(center[axis]), 4),
+                            "min": round(float(lows[axis]), 4),
+                            "max": round(float(highs[axis]), 4),
+                            "noise": round(float(noise[axis]), 4),
+                            "deadzone": round(float(deadzone[axis]), 4)} for axis in range(self.numAxes)}
@@ -0,0 +1,94 @@
+import os
+import signal
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._listenercore import ListenerCore, Emitter
+from ._measure import PollingMeter
+from ._state import ControllerStateTable
+from ._ring import EventRing
+from ._event import OMIT
+
+# events written to the ring as records. Anything else emitted (free mode) is sent through the info pipe
+ringEvents = (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION, pygame.JOYAXISMOTION, OMIT)
+
+
+class CaptureListener(ListenerCore):
+    # listener core running in its own process (no Qt, no UI work competing for the GIL), so polling rate and the
+    # hold-to-skip counter are not delayed by the UI. Emitted events are written to the shared memory ring.
+    # Anything else (controllers info, stats, reports) goes through the info pipe, tagged with the ring written count
+    # at that moment, so the consumer keeps the original order. Requests from the UI arrive through the control pipe
+
+    def __init__(self, ring, infoConn, controlConn, wake, free_mode=False, stats_interval=0):
+        ListenerCore.__init__(self, Emitter(lambda info: self.sendInfo("joysticks", info)), Emitter(self.writeEvent),
+                              free_mode, Emitter(self.sendStats), stats_interval)
+        self.ring = ring
+        self.infoConn = infoConn
+        self.controlConn = controlConn
+        self.wake = wake
+        self.pending = False
+
+    def run(self):
+        self.openListener()
+        self.notify()
+        while self.keepListening:
+            self.poll()
+            self.notify()
+            self.receiveRequests()
+        self.closeListener()
+
+    def notify(self):
+        # consumer is woken up once per iteration (if anything was written), not once per event
+        if self.pending:
+            self.pending = False
+            self.wake.set()
+
+    def receiveRequests(self):
+        try:
+            while self.controlConn.poll():
+                name, args = self.controlConn.recv()
+                if name == "setMeter":
+                    self.setMeter(PollingMeter(), Emitter(lambda report: self.sendInfo("measure", report)))
+                elif name == "setStateTable":
+                    self.setStateTable(ControllerStateTable(), Emitter(lambda state: self.sendInfo("state", state)))
+                elif name == "requestCalibration":
+                    self.requestCalibration(args[0], Emitter(lambda *result: self.sendInfo("calibration", *result)))
+                else:
+                    getattr(self, name)(*args)
+        except (EOFError, OSError):
+            # UI process is gone
+            self.stop()
+
+    def writeEvent(self, event):
+        # JoyEvent, as emitted by the core
+        self.pending = True
+        if event.type not in ringEvents:
+            self.sendInfo("event", event)
+        elif event.type == pygame.JOYHATMOTION:
+            self.ring.write(event.captured, event.type, event.instance_id, event.index, event.value[0], event.value[1])
+        elif event.type == pygame.JOYAXISMOTION:
+            self.ring.write(event.captured, event.type, event.instance_id, event.index, value=event.value)
+        else:
+            self.ring.write(event.captured, event.type, event.instance_id, event.index, event.value)
+
+    def sendStats(self, stats):
+        stats["ring_dropped"] = self.ring.counters()[2]
+        self.sendInfo("stats", stats)
+
+    def sendInfo(self, kind, *args):
+        self.pending = True
+        try:
+            self.infoConn.send((self.ring.written(), kind, args))
+        except (BrokenPipeError, OSError):
+            self.stop()
+
+
+def captureMain(ringName, capacity, infoConn, controlConn, wake, free_mode, stats_interval):
+    # capture process entry point. Ctrl-C reaches the whole process group: the UI process decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = EventRing(capacity, ringName)
+    try:
+        CaptureListener(ring, infoConn, controlConn, wake, free_mode, stats_interval).run()
+    finally:
+        ring.close()
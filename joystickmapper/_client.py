@@ -0,0 +1,79 @@
+import select
+import socket
+
+from . import _protocol as protocol
+
+
+class MappingClient:
+    # client of the mapping daemon (see _daemon.py). Messages are dicts:
+    #   {"type": "added", "instance_id", "guid", "name", "layout"}    (layout is empty if there is no profile)
+    #   {"type": "removed", "instance_id"}
+    #   {"type": "mapped", "instance_id", "key", "pressed"}            (key as in the saved profile, e.g. "A", "D-UP")
+    #   {"type": "gesture", "instance_id", "gesture"}                  (name of a gesture of the profile, if mapped=True)
+    #   {"type": "raw", "instance_id", "control", "index", "value"}   (only if raw=True)
+    # read() blocks (or waits up to timeout); fileno() allows waiting on several sockets with select / selectors
+    # openState() gives the current state of every controller instead (shared memory, to be polled every frame)
+    # swapProfile() switches the profile of a controller (e.g. menu / gameplay): "added" is received with its layout
+
+    def __init__(self, socketPath=None, devices=True, mapped=True, raw=False):
+
+        self.socketPath = socketPath or protocol.defaultSocketPath()
+        self.mask = ((protocol.SUB_DEVICES if devices else 0) | (protocol.SUB_MAPPED if mapped else 0) |
+                     (protocol.SUB_RAW if raw else 0))
+        self.sock = None
+        self.reader = protocol.FrameReader()
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socketPath)
+        self.sock.sendall(protocol.subscribe(self.mask))
+        return self
+
+    @staticmethod
+    def openState(stateName=None):
+        # controllers state published by the daemon (read only). Close it when done
+        # imported here: state module loads pygame, not needed by clients which only read messages
+        from ._state import ControllerStateBuffer
+        return ControllerStateBuffer(name=stateName or protocol.defaultStateName(), create=False)
+
+    def swapProfile(self, instance_id, fileName=""):
+        # fileName relative to the daemon profiles folder (or absolute). Empty to go back to the one of its guid
+        self.sock.sendall(protocol.swap(instance_id, fileName))
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read(self, timeout=None):
+        # pending messages (empty list if timeout expires). Raises ConnectionError if the daemon has gone
+        if timeout is not None:
+            ready, _, _ = select.select([self.sock], [], [], timeout)
+            if not ready:
+                return []
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("mapping daemon closed the connection")
+        messages = []
+        for msgType, payload in self.reader.feed(data):
+            message = protocol.decode(msgType, payload)
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def __iter__(self):
+        # all messages, until the daemon closes the connection
+        try:
+            while True:
+                yield from self.read()
+        except ConnectionError:
+            return
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
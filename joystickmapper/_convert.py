@@ -0,0 +1,298 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ._layouts import homeButton
+from ._lint import findProfiles
+
+# hat value of each direction (pygame: y is 1 when pressed up)
+hatDirections = {(0, 1): "up", (0, -1): "down", (-1, 0): "left", (1, 0): "right"}
+
+
+def profileControls(content):
+    # same as _profiles.profileSummary(), which would load pygame in every worker process
+    joystick_id = content["joystick_configured"]
+    info = content["joysticks_info"][joystick_id]
+    return info["guid"], info.get("name", ""), content["layout"], content[joystick_id]
+
+
+def controlOf(value):
+    # saved value as ("button", number), ("hat", number, direction) or ("axis", number, sign). None if not supported
+    if "hat" in value:
+        direction = hatDirections.get(tuple(value["value"]))
+        return ("hat", value["hat"], direction) if direction else None
+    elif "axis" in value:
+        return "axis", value["axis"], 1 if value["value"] > 0 else -1
+    return "button", value["value"]
+
+
+class ProfileWriter:
+    # converts a saved profile into the controller config of a frontend / emulator
+    # keys: layout key -> target name in that format (keys of a layout missing here are not converted)
+    # per-profile formats return the content of a file of their own (extension). Combined formats (combined = True)
+    # return a single entry of a file shared by all profiles (fileName), one per controller model (guid)
+    # new formats are added subclassing it and adding an instance to writers (by name)
+
+    name = ""
+    extension = ""
+    combined = False
+    fileName = ""
+    keys = {}
+
+    def convert(self, content):
+        # (converted text, unmapped keys)
+        guid, name, layout, values = profileControls(content)
+        targets = {}
+        unmapped = []
+        for key, value in values.items():
+            target = self.keys.get(key)
+            control = controlOf(value)
+            if target is None or control is None:
+                unmapped.append(key)
+            else:
+                targets.setdefault(target, []).append(control)
+        return self.write(guid, name, targets), unmapped
+
+    def write(self, guid, name, targets):
+        raise NotImplementedError
+
+
+class RetroArchWriter(ProfileWriter):
+    # RetroArch autoconfig (.cfg). RetroPad buttons are named by position: RetroPad B is south (our A), A is east...
+
+    name = "retroarch"
+    extension = ".cfg"
+    keys = {"UP": "up", "DOWN": "down", "LEFT": "left", "RIGHT": "right",
+            "D-UP": "up", "D-DOWN": "down", "D-LEFT": "left", "D-RIGHT": "right",
+            "ANALOG UP": "l_y_minus", "ANALOG DOWN": "l_y_plus", "ANALOG LEFT": "l_x_minus", "ANALOG RIGHT": "l_x_plus",
+            "LEFT ANALOG UP": "l_y_minus", "LEFT ANALOG DOWN": "l_y_plus",
+            "LEFT ANALOG LEFT": "l_x_minus", "LEFT ANALOG RIGHT": "l_x_plus",
+            "RIGHT ANALOG UP": "r_y_minus", "RIGHT ANALOG DOWN": "r_y_plus",
+            "RIGHT ANALOG LEFT": "r_x_minus", "RIGHT ANALOG RIGHT": "r_x_plus",
+            "A": "b", "B": "a", "X": "y", "Y": "x", "L1": "l", "R1": "r", "L2": "l2", "R2": "r2", "L3": "l3", "R3": "r3",
+            "SELECT": "select", "START": "start", homeButton: "menu_toggle"}
+
+    def write(self, guid, name, targets):
+        lines = ['input_driver = "sdl2"', f'input_device = "{name}"']
+        for target, controls in targets.items():
+            # one control per target: the first one configured
+            control = controls[0]
+            if control[0] == "button":
+                lines.append(f'input_{target}_btn = "{control[1]}"')
+            elif control[0] == "hat":
+                lines.append(f'input_{target}_btn = "h{control[1]}{control[2]}"')
+            else:
+                lines.append(f'input_{target}_axis = "{"+" if control[2] > 0 else "-"}{control[1]}"')
+        return "\n".join(lines) + "\n"
+
+
+class MameWriter(ProfileWriter):
+    # MAME controller config (ctrlr .cfg, player 1). Several keys of the same port are combined with OR
+
+    name = "mame"
+    extension = ".cfg"
+    axisNames = ("X", "Y", "Z", "RX", "RY", "RZ")
+    keys = {"UP": "P1_JOYSTICK_UP", "DOWN": "P1_JOYSTICK_DOWN", "LEFT": "P1_JOYSTICK_LEFT", "RIGHT": "P1_JOYSTICK_RIGHT",
+            "D-UP": "P1_JOYSTICK_UP", "D-DOWN": "P1_JOYSTICK_DOWN",
+            "D-LEFT": "P1_JOYSTICK_LEFT", "D-RIGHT": "P1_JOYSTICK_RIGHT",
+            "ANALOG UP": "P1_JOYSTICK_UP", "ANALOG DOWN": "P1_JOYSTICK_DOWN",
+            "ANALOG LEFT": "P1_JOYSTICK_LEFT", "ANALOG RIGHT": "P1_JOYSTICK_RIGHT",
+            "LEFT ANALOG UP": "P1_JOYSTICK_UP", "LEFT ANALOG DOWN": "P1_JOYSTICK_DOWN",
+            "LEFT ANALOG LEFT": "P1_JOYSTICK_LEFT", "LEFT ANALOG RIGHT": "P1_JOYSTICK_RIGHT",
+            "RIGHT ANALOG UP": "P1_JOYSTICKRIGHT_UP", "RIGHT ANALOG DOWN": "P1_JOYSTICKRIGHT_DOWN",
+            "RIGHT ANALOG LEFT": "P1_JOYSTICKRIGHT_LEFT", "RIGHT ANALOG RIGHT": "P1_JOYSTICKRIGHT_RIGHT",
+            "A": "P1_BUTTON1", "B": "P1_BUTTON2", "X": "P1_BUTTON3", "Y": "P1_BUTTON4", "L1": "P1_BUTTON5",
+            "R1": "P1_BUTTON6", "L2": "P1_BUTTON7", "R2": "P1_BUTTON8", "L3": "P1_BUTTON9", "R3": "P1_BUTTON10",
+            "SELECT": "COIN1", "START": "START1", homeButton: "UI_CONFIGURE"}
+
+    def joyCode(self, control):
+        if control[0] == "button":
+            return f"JOYCODE_1_BUTTON{control[1] + 1}"
+        elif control[0] == "hat":
+            return f"JOYCODE_1_HAT{control[1] + 1}{control[2].upper()}"
+        elif control[1] < len(self.axisNames):
+            axis = self.axisNames[control[1]]
+            if axis == "X":
+                direction = "RIGHT" if control[2] > 0 else "LEFT"
+            elif axis == "Y":
+                direction = "DOWN" if control[2] > 0 else "UP"
+            else:
+                direction = "POS" if control[2] > 0 else "NEG"
+            return f"JOYCODE_1_{axis}AXIS_{direction}_SWITCH"
+        return None
+
+    def write(self, guid, name, targets):
+        lines = ['<?xml version="1.0"?>', f"<!-- {name.replace('--', '-')} ({guid}) -->", '<mameconfig version="10">',
+                 '    <system name="default">', "        <input>"]
+        for target, controls in targets.items():
+            codes = [code for code in (self.joyCode(control) for control in controls) if code]
+            if codes:
+                lines.append(f'            <port type="{target}">')
+                lines.append(f'                <newseq type="standard">{" OR ".join(codes)}</newseq>')
+                lines.append("            </port>")
+        lines += ["        </input>", "    </system>", "</mameconfig>"]
+        return "\n".join(lines) + "\n"
+
+
+class SdlWriter(ProfileWriter):
+    # SDL game controller mapping string (gamecontrollerdb.txt line). Stick directions configured on both halves of
+    # the same axis are combined into a full axis. Otherwise, every direction is a half axis output
+
+    name = "sdl"
+    combined = True
+    fileName = "gamecontrollerdb.txt"
+    hatMasks = {"up": 1, "right": 2, "down": 4, "left": 8}
+    platforms = {"win32": "Windows", "darwin": "Mac OS X"}
+    keys = {"UP": "dpup", "DOWN": "dpdown", "LEFT": "dpleft", "RIGHT": "dpright",
+            "D-UP": "dpup", "D-DOWN": "dpdown", "D-LEFT": "dpleft", "D-RIGHT": "dpright",
+            "ANALOG UP": "-lefty", "ANALOG DOWN": "+lefty", "ANALOG LEFT": "-leftx", "ANALOG RIGHT": "+leftx",
+            "LEFT ANALOG UP": "-lefty", "LEFT ANALOG DOWN": "+lefty",
+            "LEFT ANALOG LEFT": "-leftx", "LEFT ANALOG RIGHT": "+leftx",
+            "RIGHT ANALOG UP": "-righty", "RIGHT ANALOG DOWN": "+righty",
+            "RIGHT ANALOG LEFT": "-rightx", "RIGHT ANALOG RIGHT": "+rightx",
+            "A": "a", "B": "b", "X": "x", "Y": "y", "L1": "leftshoulder", "R1": "rightshoulder",
+            "L2": "lefttrigger", "R2": "righttrigger", "L3": "leftstick", "R3": "rightstick",
+            "SELECT": "back", "START": "start", homeButton: "guide"}
+
+    def binding(self, control, fullAxis=False):
+        if control[0] == "button":
+            return f"b{control[1]}"
+        elif control[0] == "hat":
+            return f"h{control[1]}.{self.hatMasks[control[2]]}"
+        elif fullAxis:
+            return f"a{control[1]}" if control[2] > 0 else f"a{control[1]}~"
+        return f"{'+' if control[2] > 0 else '-'}a{control[1]}"
+
+    def write(self, guid, name, targets):
+        fields = [guid, name.replace(",", " ")]
+        for target, controls in targets.items():
+            control = controls[0]
+            if target[0] in "+-":
+                axis = target[1:]
+                other = targets.get(("-" if target[0] == "+" else "+") + axis)
+                if other and control[0] == other[0][0] == "axis" and control[1] == other[0][1] \
+                        and control[2] != other[0][2]:
+                    # both halves on the same axis: full axis (inverted if the negative half is the positive one)
+                    if target[0] == "+":
+                        fields.append(f"{axis}:{self.binding(control, fullAxis=True)}")
+                    continue
+                fields.append(f"{target}:{self.binding(control)}")
+            elif target in ("lefttrigger", "righttrigger") and control[0] == "axis":
+                fields.append(f"{target}:{self.binding(control, fullAxis=True)}")
+            else:
+                fields.append(f"{target}:{self.binding(control)}")
+        fields.append(f"platform:{self.platforms.get(sys.platform, 'Linux')}")
+        return ",".join(fields) + ","
+
+
+writers = {writer.name: writer for writer in (RetroArchWriter(), MameWriter(), SdlWriter())}
+
+# writers used by the worker processes, set once per worker (see convertFolders())
+activeWriters = []
+
+
+def setWriters(selected):
+    global activeWriters
+    activeWriters = selected
+
+
+def convertProfile(fileName, outputFiles):
+    # converts a profile with every active writer. Per-profile outputs are written here (by the worker),
+    # combined ones are returned to be merged by the caller
+    report = {"file": fileName, "guid": None, "outputs": {}, "unmapped": {}, "combined": {}}
+    try:
+        with open(fileName, "r", encoding="utf8") as f:
+            content = json.load(f)
+        report["guid"] = profileControls(content)[0]
+        report["saved"] = os.path.getmtime(fileName)
+        for writer in activeWriters:
+            text, unmapped = writer.convert(content)
+            if unmapped:
+                report["unmapped"][writer.name] = unmapped
+            if writer.combined:
+                report["combined"][writer.name] = text
+            else:
+                outputFile = outputFiles[writer.name]
+                os.makedirs(os.path.dirname(outputFile) or ".", exist_ok=True)
+                with open(outputFile, "w", encoding="utf8") as f:
+                    f.write(text)
+                report["outputs"][writer.name] = outputFile
+    except (OSError, ValueError, KeyError, TypeError, AttributeError, IndexError) as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+    return report
+
+
+def convertChunk(tasks):
+    return [convertProfile(fileName, outputFiles) for fileName, outputFiles in tasks]
+
+
+def convertTasks(folders, selected, outputFolder, chunkSize):
+    # chunks of (profile file, output file of every per-profile writer). Outputs keep the folder structure of the
+    # profiles, below a folder per format
+    chunk = []
+    for folder in folders:
+        for fileName in findProfiles([folder]):
+            relative = os.path.splitext(os.path.relpath(fileName, folder))[0]
+            outputFiles = {writer.name: os.path.join(outputFolder, writer.name, relative + writer.extension)
+                           for writer in selected if not writer.combined}
+            chunk.append((fileName, outputFiles))
+            if len(chunk) >= chunkSize:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def convertFolders(folders, formats, outputFolder, workers=None, chunkSize=64):
+    # streams the reports of every profile file of folders, as they are converted in a pool of processes (one per
+    # core by default). Profiles are listed while converting, and only a few chunks per worker are in flight, so
+    # memory does not grow with the number of files
+    selected = [writers[name] for name in formats]
+    workers = workers or os.cpu_count() or 1
+    tasks = convertTasks(folders, selected, outputFolder, chunkSize)
+    if workers == 1:
+        setWriters(selected)
+        for chunk in tasks:
+            yield from convertChunk(chunk)
+        return
+    with ProcessPoolExecutor(workers, initializer=setWriters, initargs=(selected,)) as executor:
+        pending = []
+        for chunk in tasks:
+            pending.append(executor.submit(convertChunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+def convertReport(folders, formats, outputFolder, output, workers=None):
+    # converts every profile of folders, and writes one JSON line per file and a summary line. Combined formats are
+    # written once all profiles are converted: latest profile of every controller model (by guid)
+    start = time.perf_counter()
+    summary = {"files": 0, "converted": 0, "errors": 0, "outputs": {}}
+    combined = {}
+    for report in convertFolders(folders, formats, outputFolder, workers):
+        summary["files"] += 1
+        if "error" in report:
+            summary["errors"] += 1
+        else:
+            summary["converted"] += 1
+        for name, text in report.pop("combined").items():
+            entries = combined.setdefault(name, {})
+            if report["guid"] not in entries or report["saved"] >= entries[report["guid"]][0]:
+                entries[report["guid"]] = (report["saved"], text)
+        for name in report["outputs"].keys():
+            summary["outputs"][name] = summary["outputs"].get(name, 0) + 1
+        output.write(json.dumps(report, ensure_ascii=False) + "\n")
+    for name, entries in combined.items():
+        outputFile = os.path.join(outputFolder, writers[name].fileName)
+        os.makedirs(outputFolder, exist_ok=True)
+        with open(outputFile, "w", encoding="utf8") as f:
+            for guid in sorted(entries.keys()):
+                f.write(entries[guid][1] + "\n")
+        summary["outputs"][name] = len(entries)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    output.write(json.dumps({"summary": summary}) + "\n")
+    return summary
@@ -0,0 +1,291 @@
+import os
+import selectors
+import socket
+import struct
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._listenercore import ListenerCore, Emitter
+from ._profiles import loadProfiles
+from ._store import ProfileStore
+from ._translate import DeviceMapper
+from ._state import ControllerStateBuffer
+from . import _protocol as protocol
+
+
+class MappingDaemon:
+    # long-running service which owns the controllers (listener core) and the saved profiles, and pushes device
+    # notifications, raw events and mapped (logical key) events to any number of local clients (Unix domain socket)
+    # devices are enumerated and profiles are loaded once, instead of once per frontend / emulator
+    # single thread: the listener is polled once per frame, then sockets are served without blocking
+    # current state of every controller is also published in shared memory, for clients which poll it every frame
+
+    # pending output per client. Beyond that, the client is not reading and is disconnected
+    maxPending = 256 * 1024
+
+    def __init__(self, socketPath=None, profilesFolder=".", fps=250, stateName=None, profileStore=None,
+                 stateSlots=None):
+
+        self.socketPath = socketPath or protocol.defaultSocketPath()
+        self.stateName = stateName or protocol.defaultStateName()
+        # controllers with a slot in shared state (readers take it from the shared block)
+        self.stateSlots = stateSlots or ControllerStateBuffer.defaultCapacity
+        self.sharedState = None
+        self.profilesFolder = profilesFolder
+        # profiles are loaded from the profile store (file path) instead of the folder, if any
+        self.profileStore = profileStore
+        self.deviceMapper = DeviceMapper(self.loadProfiles(), gestureSig=Emitter(self.getGesture))
+        self.reloadRequested = False
+
+        # free mode: every event is emitted (no mapping session, no hold-to-omit counter)
+        self.listener = ListenerCore(Emitter(self.getJoysticks), Emitter(self.getEvent), free_mode=True)
+        self.listener.echo = False
+        self.listener.setPollRate(fps)
+
+        self.clients = {}
+        self.rawClients = 0
+        self.selector = selectors.DefaultSelector()
+        self.server = None
+
+    def open(self):
+
+        if os.path.exists(self.socketPath):
+            # a running daemon would accept the connection. Otherwise, it is the stale socket of a previous run
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socketPath)
+                raise OSError(f"mapping daemon already running at {self.socketPath}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.socketPath)
+            finally:
+                probe.close()
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socketPath)
+        self.server.listen(16)
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        self.sharedState = ControllerStateBuffer(self.stateSlots, name=self.stateName)
+        self.listener.setSharedState(self.sharedState)
+        self.listener.openListener()
+
+    def run(self):
+        self.open()
+        try:
+            while self.listener.keepListening:
+                self.listener.poll()
+                self.deviceMapper.advance()
+                if self.reloadRequested:
+                    self.reloadProfiles()
+                self.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def stop(self):
+        # safe from signal handlers: loop ends after current iteration
+        self.listener.stop()
+
+    def requestReload(self):
+        self.reloadRequested = True
+
+    def loadProfiles(self):
+        if self.profileStore is None:
+            return loadProfiles(self.profilesFolder)
+        store = ProfileStore(self.profileStore)
+        try:
+            return store.latestProfiles()
+        finally:
+            store.close()
+
+    def reloadProfiles(self):
+        self.reloadRequested = False
+        self.broadcastDevices(self.deviceMapper.setProfiles(self.loadProfiles()))
+
+    def close(self):
+        for sock in list(self.clients.keys()):
+            self.dropClient(sock)
+        if self.server is not None:
+            self.selector.unregister(self.server)
+            self.server.close()
+            self.server = None
+            try:
+                os.remove(self.socketPath)
+            except OSError:
+                pass
+        self.selector.close()
+        self.listener.closeListener()
+        if self.sharedState is not None:
+            self.sharedState.close()
+            self.sharedState = None
+
+    def serve(self):
+        for key, events in self.selector.select(0):
+            sock = key.fileobj
+            if sock is self.server:
+                self.accept()
+                continue
+            if sock not in self.clients:
+                # dropped while serving a previous socket
+                continue
+            if events & selectors.EVENT_READ:
+                self.receive(sock)
+            if events & selectors.EVENT_WRITE and sock in self.clients:
+                self.flush(sock)
+
+    def accept(self):
+        try:
+            sock, _ = self.server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        # nothing is sent until the client subscribes
+        self.clients[sock] = {"reader": protocol.FrameReader(), "mask": 0,
+                              "pending": bytearray(), "writing": False, "subscribed": False}
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def receive(self, sock):
+        try:
+            data = sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.dropClient(sock)
+            return
+        client = self.clients[sock]
+        for msgType, payload in client["reader"].feed(data):
+            try:
+                message = protocol.decode(msgType, payload)
+            except (struct.error, IndexError):
+                # malformed (truncated) message: ignored
+                continue
+            if message is not None and message["type"] == "subscribe":
+                if message["mask"] & protocol.SUB_RAW and not client["mask"] & protocol.SUB_RAW:
+                    self.rawClients += 1
+                elif not message["mask"] & protocol.SUB_RAW and client["mask"] & protocol.SUB_RAW:
+                    self.rawClients -= 1
+                first = not client["subscribed"]
+                client["subscribed"] = True
+                client["mask"] = message["mask"]
+                if first and client["mask"] & protocol.SUB_DEVICES:
+                    # current devices, as if they were just connected
+                    for instance_id, device in self.deviceMapper.devices.items():
+                        self.send(sock, self.pack(protocol.added, instance_id, device["guid"], device["name"],
+                                                  device["layout"]))
+                        if sock not in self.clients:
+                            return
+            elif message is not None and message["type"] == "swap":
+                self.swapProfile(message["instance_id"], message["file"])
+                if sock not in self.clients:
+                    return
+
+    def pack(self, message, *args):
+        # frame of a message, or None if a value does not fit its protocol field (e.g. a button beyond 255):
+        # that message is skipped, instead of the error taking the daemon down
+        try:
+            return message(*args)
+        except struct.error:
+            return None
+
+    def send(self, sock, data):
+        if data is None:
+            return
+        client = self.clients[sock]
+        wasPending = bool(client["pending"])
+        client["pending"] += data
+        if len(client["pending"]) > self.maxPending:
+            self.dropClient(sock)
+        elif not wasPending:
+            self.flush(sock)
+
+    def flush(self, sock):
+        client = self.clients[sock]
+        try:
+            sent = sock.send(client["pending"])
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self.dropClient(sock)
+            return
+        del client["pending"][:sent]
+        # wait for the socket to be writable only while something is pending
+        writing = bool(client["pending"])
+        if writing != client["writing"]:
+            client["writing"] = writing
+            self.selector.modify(sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0))
+
+    def broadcast(self, data, subscription):
+        if data is None:
+            return
+        for sock, client in list(self.clients.items()):
+            if client["mask"] & subscription:
+                self.send(sock, data)
+
+    def dropClient(self, sock):
+        client = self.clients.pop(sock, None)
+        if client is None:
+            return
+        if client["mask"] & protocol.SUB_RAW:
+            self.rawClients -= 1
+        self.selector.unregister(sock)
+        sock.close()
+
+    def broadcastDevices(self, changes):
+        for change in changes:
+            if change["type"] == "added":
+                data = self.pack(protocol.added, change["instance_id"], change["guid"], change["name"], change["layout"])
+            else:
+                data = self.pack(protocol.removed, change["instance_id"])
+            self.broadcast(data, protocol.SUB_DEVICES)
+
+    def swapProfile(self, instance_id, fileName):
+        # compiled profiles are cached: swapping back and forth (e.g. menu / gameplay) parses every file only once
+        profile = None
+        if fileName:
+            # any client can ask for a swap: only files inside the profiles folder are loaded
+            folder = os.path.realpath(self.profilesFolder)
+            path = os.path.realpath(os.path.join(folder, fileName))
+            if os.path.commonpath((folder, path)) != folder:
+                return
+            profile = self.deviceMapper.cache.load(path)
+            if profile is None:
+                return
+        change, released = self.deviceMapper.swap(instance_id, profile)
+        if change is None:
+            return
+        for key in released:
+            self.broadcast(self.pack(protocol.mapped, instance_id, key, False), protocol.SUB_MAPPED)
+        self.broadcastDevices([change])
+
+    def getGesture(self, instance_id, name):
+        self.broadcast(self.pack(protocol.gesture, instance_id, name), protocol.SUB_MAPPED)
+
+    def getJoysticks(self, joysticksInfo):
+        self.broadcastDevices(self.deviceMapper.update(joysticksInfo))
+
+    def getEvent(self, event):
+
+        instance_id = event.instance_id
+        if instance_id < 0:
+            return
+
+        if self.rawClients:
+            if event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+                data = self.pack(protocol.raw, instance_id, protocol.BUTTON, event.index, event.value)
+            elif event.type == pygame.JOYHATMOTION:
+                data = self.pack(protocol.raw, instance_id, protocol.HAT, event.index, event.value[0], event.value[1])
+            elif event.type == pygame.JOYAXISMOTION:
+                # some drivers report axes slightly beyond +-1
+                value = max(-32767, min(32767, int(event.value * 32767)))
+                data = self.pack(protocol.raw, instance_id, protocol.AXIS, event.index, value)
+            else:
+                data = None
+            if data is not None:
+                self.broadcast(data, protocol.SUB_RAW)
+
+        for key, pressed in self.deviceMapper.translate(event):
+            self.broadcast(self.pack(protocol.mapped, instance_id, key, pressed), protocol.SUB_MAPPED)
@@ -0,0 +1,100 @@
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+
+def layoutNeeds(layout):
+    # number of controls of each kind a layout requires: digital directions, analog directions, triggers, buttons
+    digital = analog = triggers = buttons = 0
+    for button in layout:
+        key = button.split("(", 1)[0].strip()
+        if "ANALOG" in key:
+            analog += 1
+        elif key in ("UP", "DOWN", "LEFT", "RIGHT") or key.startswith("D-"):
+            digital += 1
+        elif key in ("L2", "R2"):
+            triggers += 1
+        else:
+            buttons += 1
+    return digital, analog, triggers, buttons
+
+
+class ControlsIndex:
+    # distinct controls pressed during discovery, per controller. Pressing the same control again does not add anything
+    # hats: (hat, x, y) directions. Axes: (axis, sign) directions, only when the axis reaches (almost) its limit
+
+    def __init__(self):
+        self.buttons = {}
+        self.hats = {}
+        self.axes = {}
+        self.triggers = {}
+
+    def add(self, event):
+        # returns True if the event is a control not seen before
+        instance_id = str(event.instance_id)
+
+        if event.type == pygame.JOYBUTTONDOWN:
+            controls = self.buttons.setdefault(instance_id, set())
+            control = event.index
+
+        elif event.type == pygame.JOYHATMOTION:
+            if event.value == (0, 0):
+                return False
+            controls = self.hats.setdefault(instance_id, set())
+            control = (event.index, event.value[0], event.value[1])
+
+        elif event.type == pygame.JOYAXISMOTION:
+            triggers = self.triggers.setdefault(instance_id, {})
+            if event.index not in triggers:
+                # first motion starts from the rest value: axes resting at their limit are triggers (one direction only)
+                triggers[event.index] = abs(event.value) >= 0.5
+            if abs(event.value) < 0.9 or (triggers[event.index] and event.value < 0):
+                return False
+            controls = self.axes.setdefault(instance_id, set())
+            control = (event.index, 1 if event.value > 0 else -1)
+
+        else:
+            return False
+
+        if control in controls:
+            return False
+        controls.add(control)
+        return True
+
+    def counts(self, instance_id):
+        # digital directions (diagonals are not counted), axis directions and buttons
+        hats = {(hat, x, y) for hat, x, y in self.hats.get(instance_id, ()) if x == 0 or y == 0}
+        return len(hats), len(self.axes.get(instance_id, ())), len(self.buttons.get(instance_id, ()))
+
+    def instances(self):
+        return sorted(set(self.buttons) | set(self.hats) | set(self.axes))
+
+    def rank(self, instance_id, layouts):
+        # fit of every layout to the discovered controls: less missing controls first, then less unused controls
+        # d-pads may be reported as axes or buttons, and triggers as axes or buttons, so leftovers are used as fallback
+        hats, axes, buttons = self.counts(instance_id)
+        ranking = []
+        for name, layout in layouts.items():
+            digital, analog, triggers, buttonsNeeded = layoutNeeds(layout)
+            freeHats, freeAxes, freeButtons = hats, axes, buttons
+            missing = 0
+            for needed, sources in ((analog, ("axes",)),
+                                    (digital, ("hats", "axes", "buttons")),
+                                    (buttonsNeeded, ("buttons",)),
+                                    (triggers, ("axes", "buttons"))):
+                for source in sources:
+                    if source == "hats":
+                        used = min(needed, freeHats)
+                        freeHats -= used
+                    elif source == "axes":
+                        used = min(needed, freeAxes)
+                        freeAxes -= used
+                    else:
+                        used = min(needed, freeButtons)
+                        freeButtons -= used
+                    needed -= used
+                missing += needed
+            ranking.append({"layout": name, "missing": missing, "unused": freeHats + freeAxes + freeButtons})
+        ranking.sort(key=lambda fit: (fit["missing"], fit["unused"], len(layouts[fit["layout"]])))
+        return ranking
@@ -0,0 +1,48 @@
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+# event emitted by the listener when a button is held to omit the current one
+OMIT = -1
+
+controlNames = {pygame.JOYBUTTONDOWN: "button", pygame.JOYBUTTONUP: "button", pygame.JOYHATMOTION: "hat",
+                pygame.JOYAXISMOTION: "axis"}
+
+
+class JoyEvent:
+    # normalized event built once by the listener: pygame events never leave it (nor cross the thread boundary)
+    #   type         pygame event type (OMIT for the hold-to-omit event)
+    #   instance_id  controller instance (-1 if none)
+    #   index        button, hat or axis number
+    #   value        button: 1 (down) / 0 (up). Hat: (x, y). Axis: float. Other events: their attributes (dict)
+    #   captured     perf_counter_ns when the listener got the event from pygame (0 if unknown)
+
+    __slots__ = ("type", "instance_id", "index", "value", "captured")
+
+    def __init__(self, type, instance_id=-1, index=0, value=0, captured=0):
+        self.type = type
+        self.instance_id = instance_id
+        self.index = index
+        self.value = value
+        self.captured = captured
+
+    @staticmethod
+    def fromPygame(event, captured=0):
+        evType = event.type
+        if evType == pygame.JOYAXISMOTION:
+            return JoyEvent(evType, event.instance_id, event.axis, event.value, captured)
+        elif evType == pygame.JOYHATMOTION:
+            return JoyEvent(evType, event.instance_id, event.hat, tuple(event.value), captured)
+        elif evType == pygame.JOYBUTTONDOWN or evType == pygame.JOYBUTTONUP:
+            return JoyEvent(evType, event.instance_id, event.button, int(evType == pygame.JOYBUTTONDOWN), captured)
+        return JoyEvent(evType, getattr(event, "instance_id", -1), 0, dict(event.dict), captured)
+
+    def __repr__(self):
+        if self.type == OMIT:
+            return "<JoyEvent(omit)>"
+        name = f"{self.type}-{pygame.event.event_name(self.type)}"
+        control = controlNames.get(self.type)
+        if control is None:
+            return f"<JoyEvent({name} {self.value})>"
+        return f"<JoyEvent({name} instance_id={self.instance_id} {control}={self.index} value={self.value})>"
@@ -0,0 +1,91 @@
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+
+class EventFilter:
+    # events filter for inspect mode, applied by the listener (in its thread) before events are printed or emitted
+    # rules are separated by spaces or ";", and values by ",". Rules not present do not filter anything:
+    #   instance=0,1           only events from these controllers (device added / removed events are always kept)
+    #   type=button,hat,axis   only these event types (also: device, other)
+    #   axis=0,1               only these axes (axis events only)
+    #   button=2,3             only these buttons (button events only)
+    #   delta=0.1              only axis events which moved at least this value since last emitted one
+
+    types = {
+        "button": (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP),
+        "hat": (pygame.JOYHATMOTION,),
+        "axis": (pygame.JOYAXISMOTION,),
+        "device": (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)
+    }
+
+    def __init__(self, rules=""):
+
+        self.rules = rules.strip()
+        self.instances = None
+        self.eventTypes = None
+        self.otherTypes = False
+        self.axes = None
+        self.buttons = None
+        self.delta = 0
+        self.lastAxisValues = {}
+
+        for rule in self.rules.replace(";", " ").split():
+            key, sep, values = rule.partition("=")
+            key = key.strip().lower()
+            values = [value.strip() for value in values.split(",") if value.strip()]
+            if not sep or not values:
+                raise ValueError(rule)
+            if key == "instance":
+                self.instances = {int(value) for value in values}
+            elif key == "type":
+                self.eventTypes = set()
+                for value in values:
+                    value = value.lower()
+                    if value == "other":
+                        self.otherTypes = True
+                    elif value in self.types:
+                        self.eventTypes.update(self.types[value])
+                    else:
+                        raise ValueError(rule)
+            elif key == "axis":
+                self.axes = {int(value) for value in values}
+            elif key == "button":
+                self.buttons = {int(value) for value in values}
+            elif key == "delta":
+                self.delta = abs(float(values[0]))
+            else:
+                raise ValueError(rule)
+
+    def isEmpty(self):
+        return not self.rules
+
+    def accept(self, event):
+
+        eventType = event.type
+        if self.eventTypes is not None and eventType not in self.eventTypes:
+            if not self.otherTypes or any(eventType in types for types in self.types.values()):
+                return False
+
+        if eventType in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+            return True
+
+        if self.instances is not None and getattr(event, "instance_id", None) not in self.instances:
+            return False
+
+        if eventType == pygame.JOYAXISMOTION:
+            if self.axes is not None and event.axis not in self.axes:
+                return False
+            if self.delta:
+                key = (event.instance_id, event.axis)
+                lastValue = self.lastAxisValues.get(key)
+                if lastValue is not None and abs(event.value - lastValue) < self.delta:
+                    return False
+                self.lastAxisValues[key] = event.value
+
+        elif eventType in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            if self.buttons is not None and event.button not in self.buttons:
+                return False
+
+        return True
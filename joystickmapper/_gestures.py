@@ -0,0 +1,203 @@
+import collections
+
+# gestures over the mapped keys of a profile, defined in its "gestures" section (by name):
+#   {"type": "chord", "keys": ["SELECT", "START"]}                  all keys held at once (no other key held)
+#   {"type": "long", "key": "HOME", "time": 1.0}                     key held for time seconds
+#   {"type": "double", "key": "A", "window": 0.3}                    key pressed twice within window seconds
+#   {"type": "sequence", "keys": ["DOWN", "RIGHT", "A"], "window": 1.0}   keys pressed in order within window seconds
+gestureTypes = ("chord", "long", "double", "sequence")
+defaultTimes = {"long": 1.0, "double": 0.3, "sequence": 1.0}
+
+
+def gestureIssues(name, definition, keys):
+    # list of problems of a gesture definition (empty if valid). keys: keys of the profile
+    if not isinstance(definition, dict) or definition.get("type") not in gestureTypes:
+        return [f"{name}: type must be one of {', '.join(gestureTypes)}"]
+    gestureType = definition["type"]
+    issues = []
+    if gestureType in ("chord", "sequence"):
+        gestureKeys = definition.get("keys")
+        if not isinstance(gestureKeys, list) or len(gestureKeys) < 2:
+            return [f"{name}: {gestureType} needs a list of 2 keys at least"]
+        if not all(isinstance(key, str) for key in gestureKeys):
+            return [f"{name}: keys must be key names"]
+        if gestureType == "chord" and len(set(gestureKeys)) != len(gestureKeys):
+            issues.append(f"{name}: repeated keys in chord")
+    else:
+        gestureKeys = [definition.get("key")]
+    issues += [f"{name}: key {key} not in profile" for key in gestureKeys
+               if not isinstance(key, str) or key not in keys]
+    if gestureType != "chord":
+        time = definition.get("time" if gestureType == "long" else "window", defaultTimes[gestureType])
+        if not isinstance(time, (int, float)) or time <= 0:
+            issues.append(f"{name}: time / window must be a positive number of seconds")
+    return issues
+
+
+class TimerWheel:
+    # hashed timer wheel: timers are dropped into the slot of their deadline tick, and advance() only visits the
+    # slots of the ticks elapsed since its last call, so its cost does not depend on how many timers are pending
+    # timers beyond one turn stay in their slot until their turn comes. Cancelled timers are ignored by the owner
+    # (generation check) instead of being removed
+
+    def __init__(self, tick=0.01, slots=256):
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.current = None
+
+    def schedule(self, now, delay, item):
+        if self.current is None:
+            self.current = int(now / self.tick)
+        deadlineTick = max(int((now + delay) / self.tick), self.current + 1)
+        self.slots[deadlineTick % len(self.slots)].append((deadlineTick, item))
+
+    def advance(self, now):
+        # items due by now
+        nowTick = int(now / self.tick)
+        if self.current is None or nowTick <= self.current:
+            return []
+        due = []
+        ticks = min(nowTick - self.current, len(self.slots))
+        for tick in range(nowTick - ticks + 1, nowTick + 1):
+            slot = self.slots[tick % len(self.slots)]
+            if slot:
+                pending = [entry for entry in slot if entry[0] > nowTick]
+                if len(pending) != len(slot):
+                    due.extend(item for deadlineTick, item in slot if deadlineTick <= nowTick)
+                    slot[:] = pending
+        self.current = nowTick
+        return due
+
+
+class GestureSet:
+    # gestures of a profile compiled once (shared by the trackers of every controller using the profile):
+    #   keys are bits of a mask of held keys: chords are found with a single lookup of the mask
+    #   long presses and double taps are looked up by key
+    #   sequences are an Aho-Corasick automaton over key presses: one transition per press
+    # so the cost of a key change does not grow with the number of gestures. Invalid gestures are skipped
+
+    def __init__(self, definitions, keys):
+
+        self.bits = {key: 1 << i for i, key in enumerate(sorted(keys))}
+        self.chords = {}
+        self.longs = {}
+        self.doubles = {}
+        sequences = []
+        for name, definition in definitions.items():
+            if gestureIssues(name, definition, self.bits):
+                continue
+            gestureType = definition["type"]
+            if gestureType == "chord":
+                mask = 0
+                for key in definition["keys"]:
+                    mask |= self.bits[key]
+                self.chords.setdefault(mask, []).append(name)
+            elif gestureType == "long":
+                time = definition.get("time", defaultTimes["long"])
+                self.longs.setdefault(definition["key"], []).append((time, name))
+            elif gestureType == "double":
+                window = definition.get("window", defaultTimes["double"])
+                self.doubles.setdefault(definition["key"], []).append((window, name))
+            else:
+                sequences.append((definition["keys"], definition.get("window", defaultTimes["sequence"]), name))
+        self.buildAutomaton(sequences)
+
+    def buildAutomaton(self, sequences):
+        # goto: transitions of every node (by key), fail: longest proper suffix which is also a prefix,
+        # outputs: (length, window, name) of the sequences ending at every node (including its suffixes)
+        self.goto = [{}]
+        self.outputs = [[]]
+        self.maxLength = 0
+        self.maxWindow = 0
+        for keys, window, name in sequences:
+            node = 0
+            for key in keys:
+                if key not in self.goto[node]:
+                    self.goto.append({})
+                    self.outputs.append([])
+                    self.goto[node][key] = len(self.goto) - 1
+                node = self.goto[node][key]
+            self.outputs[node].append((len(keys), window, name))
+            self.maxLength = max(self.maxLength, len(keys))
+            self.maxWindow = max(self.maxWindow, window)
+        self.fail = [0] * len(self.goto)
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for key, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and key not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(key, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def step(self, node, key):
+        while node and key not in self.goto[node]:
+            node = self.fail[node]
+        return self.goto[node].get(key, 0)
+
+
+class GestureTracker:
+    # gestures state of one controller. Fired gestures are emitted as gestureSig.emit(instance_id, name)
+    # update() is called with every mapped key change, and expire() with the timers of the wheel which are due
+
+    def __init__(self, gestures, instance_id, wheel, gestureSig):
+        self.gestures = gestures
+        self.instance_id = instance_id
+        self.wheel = wheel
+        self.gestureSig = gestureSig
+        self.held = 0
+        self.node = 0
+        self.presses = collections.deque(maxlen=max(1, gestures.maxLength))
+        self.lastTaps = {}
+        # long press timers of a key are only valid while their generation is the current one
+        self.generations = {}
+        self.active = True
+
+    def update(self, key, pressed, now):
+        gestures = self.gestures
+        bit = gestures.bits.get(key, 0)
+        if not pressed:
+            self.held &= ~bit
+            if key in self.generations:
+                self.generations[key] += 1
+            return
+        if self.held & bit:
+            return
+        self.held |= bit
+
+        names = gestures.chords.get(self.held)
+        if names:
+            for name in names:
+                self.gestureSig.emit(self.instance_id, name)
+
+        longs = gestures.longs.get(key)
+        if longs:
+            generation = self.generations[key] = self.generations.get(key, 0) + 1
+            for time, name in longs:
+                self.wheel.schedule(now, time, (self, key, generation, name))
+
+        doubles = gestures.doubles.get(key)
+        if doubles:
+            lastTap = self.lastTaps.get(key)
+            self.lastTaps[key] = now
+            if lastTap is not None:
+                for window, name in doubles:
+                    if now - lastTap <= window:
+                        self.gestureSig.emit(self.instance_id, name)
+                        # a third tap starts a new double tap
+                        self.lastTaps[key] = None
+
+        if gestures.maxLength:
+            if self.presses and now - self.presses[-1] > gestures.maxWindow:
+                self.node = 0
+            self.presses.append(now)
+            self.node = gestures.step(self.node, key)
+            for length, window, name in gestures.outputs[self.node]:
+                if now - self.presses[-length] <= window:
+                    self.gestureSig.emit(self.instance_id, name)
+
+    def expire(self, key, generation, name):
+        if self.active and self.generations.get(key) == generation:
+            self.gestureSig.emit(self.instance_id, name)
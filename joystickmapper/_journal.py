@@ -0,0 +1,130 @@
+import json
+import os
+
+
+class MappingJournal:
+    # append-only record of the in-progress mapping, so a crash or power loss does not lose the whole session
+    # each line is a JSON object: a "start" header (layout and joystick), followed by "set" / "omit" entries
+
+    def __init__(self, fileName="joystickmapper_journal.jsonl"):
+
+        self.fileName = fileName
+        self.file = None
+        self.layout = None
+        self.guid = None
+
+    def load(self):
+        # returns the session stored in the journal (if any) as a dict, or None if there is nothing to resume
+        if not os.path.exists(self.fileName):
+            return None
+
+        session = None
+        try:
+            with open(self.fileName, "r", encoding="utf8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # last line may be truncated if the tool died while writing it
+                        break
+                    op = record.get("op")
+                    if op == "start":
+                        session = {"layout": record["layout"], "guid": record["guid"], "buttons": {}, "omitted": set(),
+                                   "index": -1}
+                    elif session is not None and op in ("set", "omit"):
+                        if op == "set":
+                            session["buttons"][record["button"]] = (record["value"], record["desc"])
+                            session["omitted"].discard(record["button"])
+                        else:
+                            session["buttons"].pop(record["button"], None)
+                            session["omitted"].add(record["button"])
+                        session["index"] = record["index"]
+        except OSError:
+            return None
+
+        if session is None or session["index"] < 0:
+            return None
+        return session
+
+    def start(self, layout, guid, session=None):
+        # replace the journal with the header of a new session, plus the content of a resumed session (if any)
+        # written to a temporary file and then renamed, so the previous journal survives until the new one is complete
+        self.close()
+        records = [{"op": "start", "layout": layout, "guid": guid}]
+        if session is not None:
+            for button, (value, valueDesc) in session["buttons"].items():
+                records.append({"op": "set", "index": session["index"], "button": button, "value": value, "desc": valueDesc})
+            for button in session["omitted"]:
+                records.append({"op": "omit", "index": session["index"], "button": button})
+        tmpFileName = self.fileName + ".tmp"
+        with open(tmpFileName, "w", encoding="utf8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpFileName, self.fileName)
+        self.layout = layout
+        self.guid = guid
+        self.file = open(self.fileName, "a", encoding="utf8")
+
+    def resume(self, session, layout, guid):
+        # restarts the journal with a loaded session (see load()) if it is the one of this layout and controller
+        # returns (values, descriptions, index) to restore, or None if it is another session. Descriptions are by key
+        # (None for omitted keys), and index is the last journaled one. Shared by every front end
+        if session is None or session["layout"] != layout or session["guid"] != guid:
+            return None
+        self.start(layout, guid, session)
+        values = {button: value for button, (value, valueDesc) in session["buttons"].items()}
+        descriptions = {button: valueDesc for button, (value, valueDesc) in session["buttons"].items()}
+        for button in session["omitted"]:
+            descriptions[button] = None
+        return values, descriptions, session["index"]
+
+    def record(self, layout, guid, index, button, value=None, valueDesc=""):
+        # assignment (or omission, if no value) of the in-progress session. If it is a session of another layout or
+        # controller, the journal is replaced: returns True then (a loaded session can not be resumed anymore)
+        started = not self.isStarted(layout, guid)
+        if started:
+            self.start(layout, guid)
+        if value is None:
+            self.omit(index, button)
+        else:
+            self.set(index, button, value, valueDesc)
+        return started
+
+    def isStarted(self, layout, guid):
+        return self.file is not None and self.layout == layout and self.guid == guid
+
+    def set(self, index, button, value, valueDesc):
+        self._write({"op": "set", "index": index, "button": button, "value": value, "desc": valueDesc})
+
+    def omit(self, index, button):
+        self._write({"op": "omit", "index": index, "button": button})
+
+    def _write(self, record):
+        # one small append per assignment (no rewrite of previous content), flushed to disk right away
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        try:
+            os.fsync(self.file.fileno())
+        except OSError:
+            pass
+
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+        self.file = None
+        self.layout = None
+        self.guid = None
+
+    def clear(self):
+        # session finished (saved) or discarded by user
+        self.close()
+        if os.path.exists(self.fileName):
+            try:
+                os.remove(self.fileName)
+            except OSError:
+                pass
@@ -26,18 +26,55 @@ def getInitMessage(lang="es"):
            "USAGE:\n\n" \
            "\t" + target_exe + " [ARGS] [OPTIONS]\n\n" \
            "\tARGS:\n" \
-           "\t\t-l\tSelect controller layout. Choose one of these values: " + str(['INSPECT'] + list(layouts.keys())) + ".\n" \
+           "\t\t-l\tSelect controller layout. Choose one of these values: " + str(['INSPECT', 'MEASURE', 'DISCOVER'] + list(layouts.keys())) + ".\n" \
            "\t\t\t'INSPECT' mode will show and save (to 'joystickmapper_inspect.json' file) all controllers events. Very useful to DEBUG.\n" \
+           "\t\t\t'MEASURE' mode will show polling rate, jitter and dropped / duplicated transitions of each controller\n" \
+           "\t\t\t(saved to 'joystickmapper_measure.json' file on exit). Press F5 to restart measurement.\n" \
+           "\t\t\t'DISCOVER' mode will ask you to press every control once, in any order, and will rank all layouts by fit.\n" \
+           "\t\t\tKeep any button pressed (or switch to NORMAL mode) to start mapping with the best layout preselected.\n" \
            "\t\t\tAdd custom layouts of your choice just creating/adding them to 'custom_layouts.json' file (check the example included).\n" \
            "\t\t-j\tSelect controller instance. If not selected, the tool will address the first in which any button is pressed.\n" \
            "\t\t-a\tSelect window rotation on screen. Choose one of these values: " + str(angles) + ".\n" \
            "\t\t\tIf the window is rotated (angle not equal 0), it will show in fullscreen mode.\n" \
            "\t\t-o\tSet custom configuration output file.\n" \
+           "\t\t-filter\tOnly show these events in INSPECT mode (also editable in the 'Filter' box). Rules:\n" \
+           "\t\t\tinstance=0,1 type=button,hat,axis,device,other axis=0,1 button=2,3 delta=0.1 (minimum axis change)\n" \
+           "\t\t\te.g. -filter \"instance=0 type=axis delta=0.2\"\n" \
+           "\t\t-queue\tWhat to do when events arrive faster than the window handles them (queue of -queuesize N events, 1024 by default):\n" \
+           "\t\t\tdrop (oldest events), coalesce (axis values, default) or pause (also discard events while a dialog is open).\n" \
+           "\t\t-store\tAlso save profiles to this SQLite profile store, and load them from it (instead of a file dialog).\n" \
            "\tOPTIONS:\n" \
            "\t\t--s\tHeadless mode: suitable for non-mouse environments (e.g. an arcade system or menu).\n" \
            "\t\t\tHeadless mode will automatically save and exit when last button is successfully configured or omitted.\n" \
            "\t\t--w\tHeadless mode shows in fullscreen by default. Use this option to show windowed (and frameless).\n" \
-           "\t\t--f\tForce to properly configure all buttons before closing (not leaving any as omitted or not assigned).\n\n"
+           "\t\t--lite\tHeadless mode without Qt, drawn with pygame display (much less memory and startup time, for minimal systems).\n" \
+           "\t\t\tSupports -l (mapping layouts only), -j, -a, -o, --w, --f and --all. Esc quits (progress is journaled).\n" \
+           "\t\t--tty\tSame as --lite, but the mapping list is shown in the terminal (no display needed).\n" \
+           "\t\t--daemon\tRun as a service which owns the controllers and profiles, and serves mapped events to local clients.\n" \
+           "\t\t\tOptions: -socket PATH (Unix domain socket), -profiles FOLDER (where profiles are loaded from),\n" \
+           "\t\t\t-store FILE (load profiles from a profile store instead).\n" \
+           "\t\t--store\tQuery the profile store (-store FILE, 'joystickmapper_profiles.db' by default). Printed as JSON lines.\n" \
+           "\t\t\tOptions: -import FOLDER (bulk import profile files), -guid, -name, -layout, -limit N, -get ID.\n" \
+           "\t\t--lint\tValidate the profiles of these folders (e.g. --lint FOLDER1 FOLDER2; current one if omitted, subfolders\n" \
+           "\t\t\tincluded): missing keys, duplicate bindings, unknown layouts. Report is printed as JSON lines.\n" \
+           "\t\t\tOptions: -o FILE (report file), -layouts FILE (custom layouts), -workers N (one per core by default).\n" \
+           "\t\t--convert\tConvert the profiles of these folders to emulator configs (e.g. --convert FOLDER1 FOLDER2).\n" \
+           "\t\t\tOptions: -formats retroarch,mame,sdl (all by default), -out FOLDER ('converted' by default),\n" \
+           "\t\t\t-o FILE (report file), -workers N (one per core by default).\n" \
+           "\t\t--f\tForce to properly configure all buttons before closing (not leaving any as omitted or not assigned).\n" \
+           "\t\t--all\tAlso save the configuration for every other layout fully covered by the configured buttons.\n" \
+           "\t\t\tMissing buttons of the rest of layouts are reported in 'joystickmapper_projection.json' file.\n" \
+           "\t\t--p\tShow a live state panel (buttons, hats and axes of every controller) instead of events in INSPECT mode.\n" \
+           "\t\t\tIt is refreshed 30 times per second at most. Events are not saved to 'joystickmapper_inspect.txt' file.\n" \
+           "\t\t--proc\tCapture controller events in a separate process (shared memory ring), so UI work never delays them.\n" \
+           "\t\t--c\tCalibrate axes (rest center, range, noise and recommended deadzone) before mapping. Requires numpy.\n" \
+           "\t\t--latency\tMeasure latency from event capture to UI update. Press F2 in INSPECT mode to show it.\n" \
+           "\t\t\tCapture is when the listener polls the event (time queued in SDL before polling is not included).\n" \
+           "\t\t\tHistograms are saved to 'joystickmapper_latency.json' file on exit.\n" \
+           "\t\t--stats\tDump listener loop counters to 'joystickmapper_stats.jsonl' every N seconds (e.g. --stats 5; 10 if omitted).\n" \
+           "\t\t\tThe file is reset at start of each session.\n" \
+           "\t\t\tPress F3 in INSPECT mode to show them.\n" \
+           "\t\t--profile\tRun a sampling profiler during the whole session. Report is saved to 'joystickmapper_profile.txt'.\n\n"
 
 
 def getJoysticksMessages(lang="es"):
@@ -52,6 +89,43 @@ def getJoysticksMessages(lang="es"):
     return headerMsg, joyMsg
 
 
+def getMeasureMessages(lang="es"):
+    if lang == "es":
+        headerMsg = "MIDIENDO! Pulsa repetidamente un botón o gira un stick (F5 para reiniciar)\n"
+    else:
+        headerMsg = "MEASURING! Mash a button or rotate a stick (F5 to restart)\n"
+    joyMsg = "\n\t%s (INSTANCE: %s)\n" \
+             "\t\tEVENTS: %s\n" \
+             "\t\tPOLLING RATE: %s Hz (INTERVAL p50: %s us)\n" \
+             "\t\tJITTER: p50 %s us, p90 %s us, p99 %s us\n" \
+             "\t\tEVENTS IN SAME POLL: %s\n" \
+             "\t\tDROPPED / DUPLICATED TRANSITIONS: %s / %s\n" \
+             "\t\tAXES UPDATE RATE: %s\n"
+    return headerMsg, joyMsg
+
+
+def getDiscoveryMessages(lang="es"):
+    if lang == "es":
+        headerMsg = "DESCUBRIENDO! Pulsa una vez cada control del mando, en cualquier orden.\n" \
+                    "Mantén pulsado cualquier botón (o cambia a modo NORMAL) para empezar a mapear con la mejor layout\n"
+        joyMsg = "\n\t%s (INSTANCE: %s)\n" \
+                 "\t\tDIRECCIONES D-PAD: %s\n" \
+                 "\t\tDIRECCIONES EJES: %s\n" \
+                 "\t\tBOTONES: %s\n" \
+                 "\t\tMEJORES LAYOUTS: %s\n"
+        fitMsg = "%s (faltan %s, sobran %s)"
+    else:
+        headerMsg = "DISCOVERING! Press every control of your controller once, in any order.\n" \
+                    "Keep any button pressed (or switch to NORMAL mode) to start mapping with the best layout\n"
+        joyMsg = "\n\t%s (INSTANCE: %s)\n" \
+                 "\t\tD-PAD DIRECTIONS: %s\n" \
+                 "\t\tAXIS DIRECTIONS: %s\n" \
+                 "\t\tBUTTONS: %s\n" \
+                 "\t\tBEST LAYOUTS: %s\n"
+        fitMsg = "%s (missing %s, unused %s)"
+    return headerMsg, joyMsg, fitMsg
+
+
 def getHeaderText(text, lang="es"):
     if text == "joy":
         if lang == "es":
@@ -89,6 +163,21 @@ def getHeaderText(text, lang="es"):
         else:
             return "Load"
 
+    elif text == "calibrate":
+        if lang == "es":
+            return "Calibrar"
+        else:
+            return "Calibrate"
+
+    elif text == "filter":
+        if lang == "es":
+            return "Filtro:"
+        else:
+            return "Filter:"
+
+    elif text == "filter_hint":
+        return "instance=0,1 type=button,hat,axis,device,other axis=0,1 button=2,3 delta=0.1"
+
 
 def getButtonValueText(text, lang="es"):
     if text == "no":
@@ -126,6 +215,31 @@ def getStatusText(text, lang="es"):
             return "Presiona para ASIGNAR a la función seleccionada o mantén pulsado para OMITR"
         else:
             return "Press to ASSIGN to the selected function or keep pressed to OMIT"
+    elif text == "calibrate_rest":
+        if lang == "es":
+            return "CALIBRANDO: no toques los sticks ni los gatillos"
+        else:
+            return "CALIBRATING: do not touch sticks nor triggers"
+    elif text == "calibrate_move":
+        if lang == "es":
+            return "CALIBRANDO: gira los sticks y pulsa los gatillos hasta el fondo varias veces"
+        else:
+            return "CALIBRATING: rotate sticks and fully press triggers several times"
+    elif text == "calibrated":
+        if lang == "es":
+            return "Calibración completada. Presiona para ASIGNAR a la función seleccionada"
+        else:
+            return "Calibration completed. Press to ASSIGN to the selected function"
+    elif text == "calibrate_failed":
+        if lang == "es":
+            return "No se ha podido calibrar (el mando no tiene ejes o se ha desconectado)"
+        else:
+            return "Calibration failed (controller has no axes or has been disconnected)"
+    elif text == "no_numpy":
+        if lang == "es":
+            return "La calibración necesita numpy (pip install numpy)"
+        else:
+            return "Calibration requires numpy (pip install numpy)"
 
 
 def getDialogsText(text, lang="es"):
@@ -251,6 +365,20 @@ def getDialogsText(text, lang="es"):
         else:
             return "Configuration has been successfully saved!!!\n\n"
 
+    elif text == "projected":
+        if lang == "es":
+            return "También guardada para: %s\n" \
+                   "Layouts incompletas (ver 'joystickmapper_projection.json'): %s\n\n"
+        else:
+            return "Also saved for: %s\n" \
+                   "Incomplete layouts (check 'joystickmapper_projection.json'): %s\n\n"
+
+    elif text == "stored":
+        if lang == "es":
+            return "Selecciona la configuración a cargar"
+        else:
+            return "Select configuration to load"
+
 
 def getButtonsText(text, lang="es"):
     if text == "accept":
@@ -292,9 +420,34 @@ def getErrorText(text, lang="es"):
             return "ERROR: Custom layouts mismatch. Please check and re-run this tool if necessary."
     elif text == "layout":
         if lang == "es":
-            return f"Layout errónea. Selecciona uno de estos valores: {str(['INSPECT'] + list(layouts.keys()))}"
+            return f"Layout errónea. Selecciona uno de estos valores: {str(['INSPECT', 'MEASURE', 'DISCOVER'] + list(layouts.keys()))}"
+        else:
+            return f"Wrong layout value. Please select one of these values: {str(['INSPECT', 'MEASURE', 'DISCOVER'] + list(layouts.keys()))}"
+    elif text == "lite_layout":
+        if lang == "es":
+            return f"El modo ligero solo configura mandos. Selecciona uno de estos valores: {str(list(layouts.keys()))}"
+        else:
+            return f"Lite mode only maps controllers. Please select one of these values: {str(list(layouts.keys()))}"
+    elif text == "filter":
+        if lang == "es":
+            return "Filtro erróneo (se ignora): '%s'. Ejemplo: instance=0 type=axis,button axis=0,1 delta=0.1"
+        else:
+            return "Wrong filter (ignored): '%s'. Example: instance=0 type=axis,button axis=0,1 delta=0.1"
+    elif text == "queue":
+        if lang == "es":
+            return "Política de cola errónea (se usa 'coalesce'): '%s'. Valores: drop, coalesce, pause"
+        else:
+            return "Wrong queue policy (using 'coalesce'): '%s'. Values: drop, coalesce, pause"
+    elif text == "state_slots":
+        if lang == "es":
+            return "Mando %s sin hueco en el estado compartido (capacidad: %s). Usa -slots para ampliarla"
+        else:
+            return "Controller %s left out of shared state (capacity: %s). Use -slots to raise it"
+    elif text == "formats":
+        if lang == "es":
+            return "Formato de conversión desconocido: %s. Valores: %s"
         else:
-            return f"Wrong layout value. Please select one of these values: {str(['INSPECT'] + list(layouts.keys()))}"
+            return "Unknown conversion format: %s. Values: %s"
     elif text == "angle":
         if lang == "es":
             return f"Ángulo de rotación erróneo. Selecciona una de estos valores: {str(angles)}"
@@ -0,0 +1,82 @@
+import json
+
+
+class LatencyHistogram:
+    # log2 buckets in microseconds: bucket N holds values in [2^(N-1), 2^N) us. Constant cost per sample
+
+    buckets = 32
+
+    def __init__(self):
+        self.counts = [0] * self.buckets
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def add(self, value_ns):
+        us = value_ns // 1000
+        self.counts[min(int(us).bit_length(), self.buckets - 1)] += 1
+        self.count += 1
+        self.total += value_ns
+        if self.min is None or value_ns < self.min:
+            self.min = value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def percentile(self, p):
+        # upper bound of the bucket containing the percentile (in microseconds), never above the actual max
+        if not self.count:
+            return 0
+        target = self.count * p / 100
+        acc = 0
+        bound = 1 << (self.buckets - 1)
+        for i, count in enumerate(self.counts):
+            acc += count
+            if acc >= target:
+                bound = 1 << i
+                break
+        return min(bound, round(self.max / 1000, 1))
+
+    def toDict(self):
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count / 1000, 1) if self.count else 0,
+            "min_us": round((self.min or 0) / 1000, 1),
+            "max_us": round(self.max / 1000, 1),
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "buckets_us": {str(1 << i): count for i, count in enumerate(self.counts) if count}
+        }
+
+
+class LatencyTracker:
+    # stages: capture (listener) -> dispatch (mapper slot) -> UI updated (after labels / inspect console are set)
+    # capture is when pygame.event.get() returns the batch in the listener: time the event waited in SDL queue
+    # before being polled (up to one listener frame, ~16ms at 60fps) is not included, since SDL does not expose it
+
+    stages = ("capture_to_dispatch", "dispatch_to_ui", "capture_to_ui")
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+
+    def record(self, event, dispatched_ns, updated_ns):
+        # capture stamp travels with the event (JoyEvent.captured)
+        captured_ns = event.captured
+        if not captured_ns:
+            return
+        self.histograms["capture_to_dispatch"].add(dispatched_ns - captured_ns)
+        self.histograms["dispatch_to_ui"].add(updated_ns - dispatched_ns)
+        self.histograms["capture_to_ui"].add(updated_ns - captured_ns)
+
+    def summary(self):
+        lines = ["LATENCY (us):"]
+        for stage in self.stages:
+            h = self.histograms[stage]
+            lines.append(f"\t{stage}: count={h.count} p50<={h.percentile(50)} p90<={h.percentile(90)} "
+                         f"p99<={h.percentile(99)} max={round(h.max / 1000, 1)}")
+        return "\n".join(lines)
+
+    def export(self, fileName="joystickmapper_latency.json"):
+        with open(fileName, "w", encoding="utf8") as f:
+            json.dump({stage: self.histograms[stage].toDict() for stage in self.stages}, f, indent=4)
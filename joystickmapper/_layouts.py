@@ -31,4 +31,12 @@ layouts = {
                  "RIGHT ANALOG UP", "RIGHT ANALOG DOWN", "RIGHT ANALOG LEFT", "RIGHT ANALOG RIGHT",
                  "A (SOUTH)", "B (EAST)", "X (WEST)", "Y (NORTH)", "L1", "L2", "L3", "R1", "R2", "R3",
                  "SELECT", "START", homeButton]
-}
\ No newline at end of file
+}
+
+# keys with different names in different layouts which refer to the same control
+# used to project a configuration made for one layout onto the rest of layouts
+keyAliases = [
+    ("UP", "D-UP"), ("DOWN", "D-DOWN"), ("LEFT", "D-LEFT"), ("RIGHT", "D-RIGHT"),
+    ("ANALOG UP", "LEFT ANALOG UP"), ("ANALOG DOWN", "LEFT ANALOG DOWN"),
+    ("ANALOG LEFT", "LEFT ANALOG LEFT"), ("ANALOG RIGHT", "LEFT ANALOG RIGHT")
+]
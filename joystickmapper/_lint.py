@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ._layouts import homeButton
+from ._gestures import gestureIssues
+from ._projection import layoutKey
+
+# layout keys by layout name, set once per worker process (see lintFolders())
+layoutKeys = {}
+
+
+def setLayouts(layouts):
+    global layoutKeys
+    layoutKeys = {name: [layoutKey(button) for button in layout] for name, layout in layouts.items()}
+
+
+def findProfiles(folders):
+    # every .json file in folders (and their subfolders)
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+
+def bindingKey(value):
+    # control a saved value is bound to: (button,), (hat, x, y) or (axis, direction)
+    if "hat" in value:
+        return "hat", value["hat"], tuple(value["value"])
+    elif "axis" in value:
+        return "axis", value["axis"], value["value"] > 0
+    return "button", value["value"]
+
+
+def lintProfile(fileName):
+    # report of a single profile file: controller and layout, and its issues (none if ok)
+    report = {"file": fileName, "guid": None, "name": None, "layout": None, "issues": []}
+    try:
+        with open(fileName, "r", encoding="utf8") as f:
+            content = json.load(f)
+    except (OSError, ValueError) as e:
+        report["issues"].append({"issue": "unreadable", "error": str(e)})
+        return report
+
+    try:
+        joystick_id = content["joystick_configured"]
+        info = content["joysticks_info"][joystick_id]
+        report["guid"] = info["guid"]
+        report["name"] = info.get("name")
+        report["layout"] = layoutName = content["layout"]
+        values = content[joystick_id]
+        bindings = {}
+        for key, value in values.items():
+            if key != homeButton:
+                # any button can also be assigned as HOME, so it is never a duplicate
+                bindings.setdefault(bindingKey(value), []).append(key)
+    except (KeyError, TypeError, AttributeError, IndexError) as e:
+        report["issues"].append({"issue": "not_profile", "error": f"{type(e).__name__}: {e}"})
+        return report
+
+    keys = layoutKeys.get(layoutName)
+    if keys is None:
+        report["issues"].append({"issue": "unknown_layout"})
+    else:
+        missing = [key for key in keys if key not in values]
+        if missing:
+            report["issues"].append({"issue": "missing", "keys": missing})
+        unknown = [key for key in values if key not in keys]
+        if unknown:
+            report["issues"].append({"issue": "unknown_keys", "keys": unknown})
+    for boundKeys in bindings.values():
+        if len(boundKeys) > 1:
+            report["issues"].append({"issue": "duplicate", "keys": boundKeys})
+    gestures = content.get("gestures") or {}
+    if not isinstance(gestures, dict):
+        report["issues"].append({"issue": "gestures", "errors": ["gestures must be an object (by name)"]})
+    else:
+        errors = [error for name, definition in gestures.items() for error in gestureIssues(name, definition, values)]
+        if errors:
+            report["issues"].append({"issue": "gestures", "errors": errors})
+    return report
+
+
+def lintChunk(fileNames):
+    # worker task: many files per task, so inter-process overhead is paid once per chunk, not once per file
+    return [lintProfile(fileName) for fileName in fileNames]
+
+
+def lintFolders(folders, layouts, workers=None, chunkSize=256):
+    # reports of every profile file in folders, in order. Files are parsed and validated in a pool of processes
+    # (one per core by default). Layouts (including custom ones) are sent once per worker
+    fileNames = list(findProfiles(folders))
+    workers = workers or os.cpu_count() or 1
+    chunkSize = max(1, min(chunkSize, len(fileNames) // (workers * 4) or 1))
+    chunks = [fileNames[i:i + chunkSize] for i in range(0, len(fileNames), chunkSize)]
+    if workers == 1 or len(chunks) <= 1:
+        setLayouts(layouts)
+        for chunk in chunks:
+            yield from lintChunk(chunk)
+        return
+    with ProcessPoolExecutor(workers, initializer=setLayouts, initargs=(layouts,)) as executor:
+        for reports in executor.map(lintChunk, chunks):
+            yield from reports
+
+
+def lintReport(folders, layouts, output, workers=None):
+    # writes one JSON line per file, and a summary line (files, files with issues, count per issue type).
+    # Returns the summary
+    start = time.perf_counter()
+    summary = {"files": 0, "ok": 0, "issues": {}}
+    for report in lintFolders(folders, layouts, workers):
+        summary["files"] += 1
+        if not report["issues"]:
+            summary["ok"] += 1
+        for issue in report["issues"]:
+            summary["issues"][issue["issue"]] = summary["issues"].get(issue["issue"], 0) + 1
+        output.write(json.dumps(report, ensure_ascii=False) + "\n")
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    output.write(json.dumps({"summary": summary}) + "\n")
+    return summary
@@ -1,146 +1,155 @@
-import os
+import multiprocessing
+import threading
 
-os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
-import pygame
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSlot
 
-from PyQt5.QtCore import QThread, pyqtSlot
+from ._listenercore import ListenerCore
+from ._ring import EventRing
+from ._capture import captureMain
+from ._event import JoyEvent
 
 
-class JoystickListener(QThread):
+class JoystickListener(ListenerCore, QThread):
+    # listener core driven by the mapper listener thread. Loop, events processing and requests are all in the core
 
-    def __init__(self, parent, joysticksConnectedSig, buttonValueSig, toggleInspectModeSig, free_mode=False):
-        super().__init__(parent)
+    def __init__(self, parent, joysticksConnectedSig, buttonValueSig, toggleInspectModeSig, free_mode=False,
+                 stats_sig=None, stats_interval=0):
+        QThread.__init__(self, parent)
+        ListenerCore.__init__(self, joysticksConnectedSig, buttonValueSig, free_mode, stats_sig, stats_interval)
 
-        self.joysticksConnectedSig = joysticksConnectedSig
-        self.buttonValueSig = buttonValueSig
-        self.freeMode = free_mode
-        self.keepListening = True
-
-        toggleInspectModeSig.connect(self.toggleFreeMode)
-
-        self.joysticks = []
-        self.joysticksInfo = {}
-
-        self.clock = pygame.time.Clock()
-        self.fps = 60
-        self.counter = None
-        self.ignoreCount = self.fps * 3  # 3 seconds is the standard to skip a button
-        self.ignoreNextButtonUp = False
-        self.ignoreNextAxis = None
+        # direct connection: listener thread is busy in its loop and would never process queued calls
+        toggleInspectModeSig.connect(self.toggleFreeMode, Qt.ConnectionType.DirectConnection)
 
     @pyqtSlot(bool)
     def toggleFreeMode(self, enable):
-        self.freeMode = enable
-
-    def addJoysticks(self):
-
-        joysticks = []
-        joysticksInfo = {}
-        for i in range(pygame.joystick.get_count()):
-            joystick = pygame.joystick.Joystick(i)
-            joysticksInfo[str(joystick.get_instance_id())] = {
-                "name": joystick.get_name(),
-                "guid": joystick.get_guid(),
-                "id": str(joystick.get_id())
-            }
-            joysticks.append(joystick)
-            if not joystick.get_init():
-                joystick.init()
-
-        return joysticks, joysticksInfo
-
-    def closeListener(self):
-        if pygame.joystick.get_init() and not self.pygameJoystickPreInitialized:
-            # pygame.joystick system might be initialized by "parent" script. Not quitting here
-            for joystick in self.joysticks:
-                if joystick.get_init():
-                    try:
-                        joystick.quit()
-                    except:
-                        pass
-            try:
-                pygame.joystick.quit()
-            except:
-                pass
-        if pygame.get_init() and not self.pygamePreInitialized:
-            # pygame might be initialized by "parent" script. Not quitting here
-            try:
-                pygame.quit()
-            except:
-                pass
+        ListenerCore.toggleFreeMode(self, enable)
 
-    def run(self):
 
-        # initialize everything if not previously initialized
-        self.pygamePreInitialized = pygame.get_init()
-        self.pygameJoystickPreInitialized = pygame.joystick.get_init()
-        if not self.pygamePreInitialized:
-            pygame.init()
-        if not self.pygameJoystickPreInitialized:
-            pygame.joystick.init()
+class ProcessListener(QObject):
+    # same interface as JoystickListener, but the listener core runs in a separate capture process (see _capture.py),
+    # so capture timing is isolated from UI work (stylesheets, relayouts, modal dialogs) holding the GIL
+    # run() drains the shared memory ring in the mapper listener thread and emits the signals. Requests are forwarded
+    # to the capture process through the control pipe
 
-        # get and emit connected joysticks info
-        self.joysticks, self.joysticksInfo = self.addJoysticks()
-        self.joysticksConnectedSig.emit(self.joysticksInfo)
+    ringCapacity = 4096
 
-        while self.keepListening:
+    def __init__(self, parent, joysticksConnectedSig, buttonValueSig, toggleInspectModeSig, free_mode=False,
+                 stats_sig=None, stats_interval=0):
+        super().__init__(parent)
 
-            if self.counter is not None:
-                self.counter += 1
-                if self.counter > self.ignoreCount:
-                    self.counter = None
-                    fakeEvent = pygame.event.Event(-1, {})
-                    self.ignoreNextButtonUp = True
-                    self.buttonValueSig.emit(fakeEvent)
+        self.buttonValueSig = buttonValueSig
+        self.sigs = {"joysticks": joysticksConnectedSig, "stats": stats_sig}
+        self.freeMode = free_mode
+        self.statsInterval = stats_interval
+        self.keepListening = True
+        self.joysticksInfo = {}
 
-            for event in pygame.event.get():
+        # spawn (not fork): the capture process must not inherit Qt state
+        # pipes are created here, so requests sent before the process is started are queued
+        self.context = multiprocessing.get_context("spawn")
+        self.wake = self.context.Event()
+        self.infoConn, self.captureInfoConn = self.context.Pipe(duplex=False)
+        self.captureControlConn, self.controlConn = self.context.Pipe(duplex=False)
+        self.controlLock = threading.Lock()
+        self.ring = None
+        self.process = None
+
+        toggleInspectModeSig.connect(self.toggleFreeMode, Qt.ConnectionType.DirectConnection)
+
+    def request(self, name, *args):
+        # requests may come from the GUI thread and the listener thread (stop)
+        with self.controlLock:
+            try:
+                self.controlConn.send((name, args))
+            except (BrokenPipeError, OSError):
+                pass
 
-                if event.type in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
-                    self.joysticks, joysticksInfo = self.addJoysticks()
-                    if self.joysticksInfo != joysticksInfo:
-                        # update joysticks info in case it changes
-                        self.joysticksInfo = joysticksInfo
-                        self.joysticksConnectedSig.emit(self.joysticksInfo)
+    @pyqtSlot(bool)
+    def toggleFreeMode(self, enable):
+        self.request("toggleFreeMode", enable)
 
-                if self.freeMode:
-                    print(event)
-                    self.buttonValueSig.emit(event)
+    def setMeter(self, meter, measureSig):
+        # meter lives in the capture process (its own instance): only the report comes back
+        self.sigs["measure"] = measureSig
+        self.request("setMeter")
 
-                else:
+    def requestMeasureReport(self):
+        self.request("requestMeasureReport")
 
-                    if event.type == pygame.JOYBUTTONDOWN:
-                        self.counter = 0
+    def requestMeasureReset(self):
+        self.request("requestMeasureReset")
 
-                    elif event.type in (pygame.JOYBUTTONUP, pygame.JOYAXISMOTION, pygame.JOYHATMOTION):
-                        print(event)
+    def setFilter(self, eventFilter):
+        self.request("setFilter", eventFilter)
 
-                        if event.type == pygame.JOYBUTTONUP:
-                            self.counter = None
-                            if not self.ignoreNextButtonUp:
-                                self.buttonValueSig.emit(event)
-                            self.ignoreNextButtonUp = False
-                            self.ignoreNextAxis = None
+    def setStateTable(self, stateTable, stateSig):
+        # state table lives in the capture process (its own instance): only snapshots come back
+        self.sigs["state"] = stateSig
+        self.request("setStateTable")
 
-                        elif event.type == pygame.JOYHATMOTION and event.value != (0, 0):
-                            self.buttonValueSig.emit(event)
-                            self.ignoreNextAxis = None
+    def requestState(self):
+        self.request("requestState")
 
-                        elif event.type == pygame.JOYAXISMOTION and abs(event.value) >= 1.0:
-                            if (self.ignoreNextAxis is None or
-                                    (self.ignoreNextAxis is not None and
-                                     # this is totally empyrical: axis beyond 3 are typically triggers, not joysticks
-                                     (self.ignoreNextAxis != event.axis or self.ignoreNextAxis <= 3))):
-                                self.ignoreNextAxis = event.axis
-                                self.buttonValueSig.emit(event)
+    def requestCalibration(self, instance_id, calibrationSig):
+        self.sigs["calibration"] = calibrationSig
+        self.request("requestCalibration", instance_id)
 
-            self.clock.tick(self.fps)
+    def requestCalibrationStep(self, step):
+        self.request("requestCalibrationStep", step)
 
-        self.closeListener()
+    def requestStats(self):
+        self.request("requestStats")
 
     def getJoysticksInfo(self):
-        if not pygame.joystick.get_init():
-            self.joysticks, self.joysticksInfo = self.addJoysticks()
         return self.joysticksInfo
 
     def stop(self):
-        self.keepListening = False
\ No newline at end of file
+        self.keepListening = False
+        self.request("stop")
+        self.wake.set()
+
+    def run(self):
+
+        self.ring = EventRing(self.ringCapacity)
+        self.process = self.context.Process(target=captureMain, name="JoystickCapture", daemon=True,
+                                            args=(self.ring.name, self.ringCapacity, self.captureInfoConn,
+                                                  self.captureControlConn, self.wake, self.freeMode,
+                                                  self.statsInterval))
+        self.process.start()
+        try:
+            while self.keepListening:
+                self.wake.wait(0.5)
+                self.wake.clear()
+                self.drain()
+                if not self.process.is_alive():
+                    break
+        finally:
+            self.request("stop")
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.ring.close()
+
+    def drain(self):
+        # info messages carry the ring written count when they were sent: records before it are emitted first
+        limit = self.ring.written()
+        while self.infoConn.poll():
+            try:
+                written, kind, args = self.infoConn.recv()
+            except EOFError:
+                break
+            self.emitRecords(written)
+            if kind == "event":
+                self.buttonValueSig.emit(args[0])
+            else:
+                if kind == "joysticks":
+                    self.joysticksInfo = args[0]
+                sig = self.sigs.get(kind)
+                if sig is not None:
+                    sig.emit(*args)
+        self.emitRecords(limit)
+
+    def emitRecords(self, limit):
+        for captured, evType, instance_id, index, x, y, value in self.ring.drain(limit):
+            self.buttonValueSig.emit(JoyEvent(evType, instance_id, index, self.ring.recordValue(evType, x, y, value),
+                                              captured))
@@ -0,0 +1,357 @@
+import os
+import time
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._stats import ListenerStats
+from ._axes import AxisClassifier
+from ._event import JoyEvent, OMIT
+
+
+class Emitter:
+    # stands for a Qt signal when the listener core is used without Qt: the core only calls emit()
+
+    def __init__(self, slot):
+        self.emit = slot
+
+
+class ListenerCore:
+    # listener loop without any Qt dependency. Signals are any object with an emit() method
+    # run() polls until stopped (Qt listener thread), or poll() can be called once per frame by the owner's own loop
+    # events are emitted as JoyEvent records: pygame events are only handled here
+
+    def __init__(self, joysticksConnectedSig, buttonValueSig, free_mode=False, stats_sig=None, stats_interval=0):
+
+        self.joysticksConnectedSig = joysticksConnectedSig
+        self.buttonValueSig = buttonValueSig
+        self.freeMode = free_mode
+        self.batchCaptured = 0
+        self.keepListening = True
+        # events are printed to console (not wanted when the console itself is the UI)
+        self.echo = True
+
+        self.joysticks = []
+        self.joysticksInfo = {}
+
+        self.clock = pygame.time.Clock()
+        self.fps = 60
+        self.counter = None
+        self.ignoreCount = self.fps * 3  # 3 seconds is the standard to skip a button
+        self.ignoreNextButtonUp = False
+        self.ignoreNextAxis = None
+        # sticks vs triggers, to know if repeated motion on the same axis has to be emitted again
+        self.axisClassifier = AxisClassifier(self.fps // 2)
+
+        # loop profiling counters. Periodically emitted through stats_sig (if provided) every stats_interval seconds
+        self.stats = ListenerStats(self.fps)
+        self.statsSig = stats_sig
+        self.statsInterval = stats_interval * 1_000_000_000
+        self.statsRequested = False
+        self.lastStats = 0
+
+        # polling rate / jitter measurement (measure mode only)
+        self.meter = None
+        self.measureSig = None
+        self.measureRequested = False
+        self.measureResetRequested = False
+
+        # inspect mode events filter (None means all events are emitted)
+        self.eventFilter = None
+
+        # live state panel (inspect mode): events update the state table instead of being emitted one by one
+        # a snapshot is emitted only when requested (at the panel refresh rate) and if something changed
+        self.stateTable = None
+        self.stateSig = None
+        self.stateRequested = False
+        self.stateVersion = None
+
+        # state of every controller kept in a flat buffer, for polling consumers (other threads or processes)
+        self.sharedState = None
+
+        # axis calibration: raw axes of one controller are sampled every iteration while active
+        self.calibrator = None
+        self.calibrationJoystick = None
+        self.calibrationDevice = None
+        self.calibrationSig = None
+        self.calibrationRequest = None
+
+    def toggleFreeMode(self, enable):
+        self.freeMode = enable
+
+    def setPollRate(self, fps):
+        self.fps = fps
+        self.ignoreCount = self.fps * 3
+        self.stats.frameBudget = 1_000_000_000 // fps
+        # axes rest values are always sampled for half a second, no matter the poll rate
+        self.axisClassifier.windowSize = max(1, self.fps // 2)
+
+    def setMeter(self, meter, measureSig):
+        # events are only measured (not emitted). Poll faster, since timestamps resolution is one loop iteration
+        self.meter = meter
+        self.measureSig = measureSig
+        self.setPollRate(1000)
+
+    def requestCalibration(self, instance_id, calibrationSig):
+        # steps: "start" (sticks at rest), "rest_end" (user moves sticks / triggers), "finish" (emits results)
+        self.calibrationJoystick = str(instance_id)
+        self.calibrationSig = calibrationSig
+        self.calibrationRequest = "start"
+
+    def requestCalibrationStep(self, step):
+        self.calibrationRequest = step
+
+    def calibrate(self):
+
+        request, self.calibrationRequest = self.calibrationRequest, None
+
+        if request == "start":
+            # imported here, so numpy is only loaded if axes are actually calibrated
+            from ._calibration import AxisCalibrator
+            self.calibrator = None
+            for joystick in self.joysticks:
+                if str(joystick.get_instance_id()) == self.calibrationJoystick and joystick.get_numaxes():
+                    self.calibrator = AxisCalibrator(joystick.get_numaxes(), self.fps * 12)
+                    self.calibrationDevice = joystick
+            if self.calibrator is None:
+                self.calibrationSig.emit(self.calibrationJoystick, {})
+                return
+
+        elif self.calibrator is None:
+            return
+
+        elif request == "rest_end":
+            self.calibrator.endRest()
+
+        elif request == "finish":
+            self.calibrationSig.emit(self.calibrationJoystick, self.calibrator.compute())
+            self.calibrator = None
+            self.calibrationDevice = None
+            return
+
+        try:
+            joystick = self.calibrationDevice
+            self.calibrator.addSample([joystick.get_axis(i) for i in range(self.calibrator.numAxes)])
+        except pygame.error:
+            # controller disconnected while calibrating
+            self.calibrationSig.emit(self.calibrationJoystick, {})
+            self.calibrator = None
+            self.calibrationDevice = None
+
+    def requestMeasureReport(self):
+        self.measureRequested = True
+
+    def setFilter(self, eventFilter):
+        # filter is replaced as a whole, so the listener thread never sees it half-configured
+        self.eventFilter = eventFilter if eventFilter is not None and not eventFilter.isEmpty() else None
+
+    def setStateTable(self, stateTable, stateSig):
+        self.stateSig = stateSig
+        self.stateTable = stateTable
+
+    def setSharedState(self, sharedState):
+        self.sharedState = sharedState
+
+    def requestState(self):
+        self.stateRequested = True
+
+    def requestMeasureReset(self):
+        self.measureResetRequested = True
+
+    def addJoysticks(self):
+
+        joysticks = []
+        joysticksInfo = {}
+        for i in range(pygame.joystick.get_count()):
+            joystick = pygame.joystick.Joystick(i)
+            joysticksInfo[str(joystick.get_instance_id())] = {
+                "name": joystick.get_name(),
+                "guid": joystick.get_guid(),
+                "id": str(joystick.get_id())
+            }
+            joysticks.append(joystick)
+            if not joystick.get_init():
+                joystick.init()
+
+        return joysticks, joysticksInfo
+
+    def closeListener(self):
+        if pygame.joystick.get_init() and not self.pygameJoystickPreInitialized:
+            # pygame.joystick system might be initialized by "parent" script. Not quitting here
+            for joystick in self.joysticks:
+                if joystick.get_init():
+                    try:
+                        joystick.quit()
+                    except:
+                        pass
+            try:
+                pygame.joystick.quit()
+            except:
+                pass
+        if pygame.get_init() and not self.pygamePreInitialized:
+            # pygame might be initialized by "parent" script. Not quitting here
+            try:
+                pygame.quit()
+            except:
+                pass
+
+    def openListener(self):
+
+        # initialize everything if not previously initialized
+        self.pygamePreInitialized = pygame.get_init()
+        self.pygameJoystickPreInitialized = pygame.joystick.get_init()
+        if not self.pygamePreInitialized:
+            pygame.init()
+        if not self.pygameJoystickPreInitialized:
+            pygame.joystick.init()
+
+        # get and emit connected joysticks info
+        self.joysticks, self.joysticksInfo = self.addJoysticks()
+        self.axisClassifier.update(self.joysticks)
+        if self.stateTable is not None:
+            self.stateTable.setJoysticks(self.joysticks)
+        if self.sharedState is not None:
+            self.sharedState.setJoysticks(self.joysticks)
+        self.joysticksConnectedSig.emit(self.joysticksInfo)
+        self.lastStats = time.perf_counter_ns()
+
+    def run(self):
+        self.openListener()
+        while self.keepListening:
+            self.poll()
+        self.closeListener()
+
+    def poll(self):
+        # one loop iteration: read and process pending events, then wait for the next frame
+
+        iterationStart = time.perf_counter_ns()
+        self.checkCounter()
+
+        pollStart = time.perf_counter_ns()
+        events = pygame.event.get()
+        pollEnd = time.perf_counter_ns()
+        # all events in the batch share the same capture stamp: the moment pygame handed them to the listener
+        self.batchCaptured = pollEnd
+
+        for event in events:
+            self.processEvent(event)
+
+        if self.axisClassifier.sampling:
+            self.axisClassifier.sample()
+
+        busyEnd = time.perf_counter_ns()
+        self.clock.tick(self.fps)
+        sleepEnd = time.perf_counter_ns()
+        self.stats.endIteration(pollEnd - pollStart, busyEnd - iterationStart, sleepEnd - busyEnd)
+
+        if self.statsSig is not None and (self.statsRequested or
+                                          (self.statsInterval and sleepEnd - self.lastStats >= self.statsInterval)):
+            # snapshot is always built here, in the listener thread, so counters are never read while updated
+            self.lastStats = sleepEnd
+            self.statsRequested = False
+            self.statsSig.emit(self.stats.toDict())
+
+        if self.meter is not None:
+            # meter is only touched from this thread
+            if self.measureResetRequested:
+                self.measureResetRequested = False
+                self.meter.reset()
+            if self.measureRequested:
+                self.measureRequested = False
+                self.measureSig.emit(self.meter.report())
+
+        if self.stateRequested:
+            self.stateRequested = False
+            if self.stateTable.version != self.stateVersion:
+                self.stateVersion = self.stateTable.version
+                self.stateSig.emit(self.stateTable.snapshot())
+
+        if self.calibrationRequest is not None or self.calibrator is not None:
+            self.calibrate()
+
+    def checkCounter(self):
+        if self.counter is not None:
+            self.counter += 1
+            if self.counter > self.ignoreCount:
+                self.counter = None
+                self.ignoreNextButtonUp = True
+                self.buttonValueSig.emit(JoyEvent(OMIT, captured=time.perf_counter_ns()))
+
+    def processEvent(self, event):
+
+        self.stats.addEvent(event.type)
+
+        if event.type in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+            self.joysticks, joysticksInfo = self.addJoysticks()
+            self.axisClassifier.update(self.joysticks)
+            if self.stateTable is not None:
+                self.stateTable.setJoysticks(self.joysticks)
+            if self.sharedState is not None:
+                self.sharedState.setJoysticks(self.joysticks)
+            if self.joysticksInfo != joysticksInfo:
+                # update joysticks info in case it changes
+                self.joysticksInfo = joysticksInfo
+                self.joysticksConnectedSig.emit(self.joysticksInfo)
+
+        elif event.type == pygame.JOYAXISMOTION:
+            self.axisClassifier.observe(event)
+
+        if self.sharedState is not None:
+            # every event, no matter the mode or filter
+            self.sharedState.update(event)
+
+        if self.meter is not None:
+            self.meter.add(event, self.batchCaptured)
+
+        elif self.freeMode:
+            if self.eventFilter is None or self.eventFilter.accept(event):
+                if self.stateTable is not None:
+                    self.stateTable.update(event)
+                else:
+                    if self.echo:
+                        print(event)
+                    self.emitEvent(event)
+
+        else:
+
+            if event.type == pygame.JOYBUTTONDOWN:
+                self.counter = 0
+
+            elif event.type in (pygame.JOYBUTTONUP, pygame.JOYAXISMOTION, pygame.JOYHATMOTION):
+                if self.echo:
+                    print(event)
+
+                if event.type == pygame.JOYBUTTONUP:
+                    self.counter = None
+                    if not self.ignoreNextButtonUp:
+                        self.emitEvent(event)
+                    self.ignoreNextButtonUp = False
+                    self.ignoreNextAxis = None
+
+                elif event.type == pygame.JOYHATMOTION and event.value != (0, 0):
+                    self.emitEvent(event)
+                    self.ignoreNextAxis = None
+
+                elif event.type == pygame.JOYAXISMOTION and abs(event.value) >= 1.0:
+                    if (self.ignoreNextAxis is None or self.ignoreNextAxis != event.axis or
+                            # triggers rest at their limit: only sticks can emit the same axis twice in a row
+                            self.axisClassifier.isStick(event.instance_id, event.axis)):
+                        self.ignoreNextAxis = event.axis
+                        self.emitEvent(event)
+
+    def emitEvent(self, event):
+        self.stats.emitted += 1
+        # capture stamp travels with the event (used by latency stats)
+        self.buttonValueSig.emit(JoyEvent.fromPygame(event, self.batchCaptured))
+
+    def requestStats(self):
+        # ask for a snapshot to be emitted through stats_sig (safe to call from any thread)
+        self.statsRequested = True
+
+    def getJoysticksInfo(self):
+        if not pygame.joystick.get_init():
+            self.joysticks, self.joysticksInfo = self.addJoysticks()
+        return self.joysticksInfo
+
+    def stop(self):
+        self.keepListening = False
\ No newline at end of file
@@ -0,0 +1,340 @@
+import json
+import os
+import shutil
+import sys
+import time
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._listenercore import ListenerCore, Emitter
+from ._journal import MappingJournal
+from ._projection import LayoutIndex, layoutKey, saveProjections, projectionText
+from ._profiles import eventValue, profileFileName, writeProfile
+from ._event import OMIT
+from ._layouts import homeButton, layouts
+from ._angles import angles
+from ._langtexts import *
+from ._utils import *
+
+
+class TerminalView:
+    # mapping list written to the terminal (ANSI escape codes). No display at all: pygame runs with the dummy video
+    # driver, which is enough to get controller events
+
+    def __init__(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    def open(self):
+        return True
+
+    def draw(self, header, rows, current, status):
+        lines = shutil.get_terminal_size().lines
+        visible = max(1, lines - 5)
+        first = min(max(0, current - visible // 2), max(0, len(rows) - visible))
+        text = "\033[H\033[2J" + header + "\n\n"
+        for i, (button, valueDesc) in enumerate(rows[first:first + visible], first):
+            marker = ">" if i == current else " "
+            line = f" {marker} {button:<28} {valueDesc}"
+            text += ("\033[7m" + line + "\033[0m" if i == current else line) + "\n"
+        text += "\n" + status + "\n"
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def message(self, text):
+        sys.stdout.write("\033[H\033[2J" + text + "\n")
+        sys.stdout.flush()
+
+    def keys(self):
+        # no keyboard in terminal mode (Ctrl-C quits)
+        return []
+
+    def close(self):
+        pass
+
+
+class DisplayView:
+    # mapping list drawn with pygame display (fullscreen or windowed). Rotation is applied to the whole frame
+
+    background = (100, 100, 100)
+    idle = (211, 211, 211)
+    selected = (255, 255, 255)
+    text = (0, 0, 0)
+    headerText = (255, 255, 255)
+
+    def __init__(self, angle=0, windowed=False):
+        self.angle = angle
+        self.windowed = windowed
+        self.screen = None
+        self.font = None
+
+    def open(self):
+        try:
+            pygame.display.init()
+            pygame.font.init()
+            if self.windowed:
+                size = (860, 640) if self.angle in (0, 180) else (640, 860)
+                self.screen = pygame.display.set_mode(size, pygame.NOFRAME)
+            else:
+                self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        except pygame.error:
+            return False
+        pygame.display.set_caption("Simple Joystick Mapper")
+        pygame.mouse.set_visible(False)
+        self.font = pygame.font.Font(None, 30)
+        return True
+
+    def frame(self):
+        # surface to draw on, already sized as seen by the user (width and height swapped if rotated 90 / 270)
+        w, h = self.screen.get_size()
+        if self.angle in (90, 270):
+            w, h = h, w
+        return pygame.Surface((w, h))
+
+    def show(self, surface):
+        if self.angle:
+            # pygame rotates counterclockwise, Qt (and -a option) clockwise
+            surface = pygame.transform.rotate(surface, -self.angle)
+        self.screen.blit(surface, (0, 0))
+        pygame.display.flip()
+
+    def draw(self, header, rows, current, status):
+        surface = self.frame()
+        surface.fill(self.background)
+        w, h = surface.get_size()
+        lineHeight = self.font.get_linesize() + 16
+        surface.blit(self.font.render(header, True, self.headerText), (20, 15))
+        surface.blit(self.font.render(status, True, self.headerText), (20, h - lineHeight + 8))
+
+        top = 15 + lineHeight
+        visible = max(1, (h - top - lineHeight) // lineHeight)
+        first = min(max(0, current - visible // 2), max(0, len(rows) - visible))
+        for i, (button, valueDesc) in enumerate(rows[first:first + visible], first):
+            y = top + (i - first) * lineHeight
+            pygame.draw.rect(surface, self.selected if i == current else self.idle,
+                             pygame.Rect(15, y, w - 30, lineHeight - 6), border_radius=10)
+            surface.blit(self.font.render(button, True, self.text), (30, y + 8))
+            surface.blit(self.font.render(valueDesc, True, self.text), (w // 2, y + 8))
+        self.show(surface)
+
+    def message(self, text):
+        surface = self.frame()
+        surface.fill(self.background)
+        lineHeight = self.font.get_linesize()
+        for i, line in enumerate(text.splitlines()):
+            surface.blit(self.font.render(line, True, self.headerText), (20, 20 + i * lineHeight))
+        self.show(surface)
+
+    def keys(self):
+        return [event.key for event in pygame.event.get(pygame.KEYDOWN)] + \
+               [pygame.K_ESCAPE for _ in pygame.event.get(pygame.QUIT)]
+
+    def close(self):
+        if pygame.display.get_init():
+            pygame.display.quit()
+
+
+class LiteMapper:
+    # headless mapper without Qt (no QApplication, windows, stylesheets nor dialogs), for minimal systems
+    # same listener core, mapping values, journal and output files as JoystickMapper in headless mode, all in one thread:
+    # the listener is polled once per frame and the list is drawn only when something changed
+
+    def __init__(self, pad_layout, joystick_id=None, angle=0, windowed=False, output_file=None,
+                 force_complete_layout=False, project_all=False, terminal=False):
+
+        self.layouts = layouts
+        if os.path.exists("custom_layouts.json"):
+            try:
+                with open("custom_layouts.json", "r", encoding="utf8") as f:
+                    custom_layouts = json.loads(f.read())
+                layouts.update(custom_layouts)
+            except:
+                print(getErrorText("layout_mismatch"))
+        if pad_layout not in self.layouts.keys():
+            raise ValueError(getErrorText("lite_layout"))
+        if angle not in angles:
+            raise ValueError(getErrorText("angle"))
+
+        self.selectedPadLayout = pad_layout
+        self.padLayout = self.layouts[self.selectedPadLayout]
+        self.joystick_id = str(joystick_id) if joystick_id is not None else joystick_id
+        self.outputFile = output_file
+        self.forceCompleteLayout = force_complete_layout
+        self.projectAll = project_all
+        self.layoutIndex = LayoutIndex(self.layouts)
+
+        self.view = TerminalView() if terminal else DisplayView(angle, windowed)
+        self.listener = ListenerCore(Emitter(self.getJoysticks), Emitter(self.getButtonValue))
+        # console is the UI in terminal mode
+        self.listener.echo = not terminal
+
+        self.journal = MappingJournal()
+        self.journalSession = self.journal.load()
+
+        self.joysticksInfo = {}
+        self.values = {}
+        self.valueDescs = [getButtonValueText("no")] * len(self.padLayout)
+        self.currentIndex = 0
+        self.configEnded = False
+        self.closeAt = None
+        self.changed = True
+
+    def run(self):
+        # returns True if the controller has been configured and saved
+
+        self.listener.openListener()
+        if not self.view.open():
+            # no display available: fall back to the terminal
+            self.view = TerminalView()
+            self.listener.echo = False
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            pygame.display.init()
+
+        # same grace period than JoystickMapper before warning there are no controllers
+        checkJoysticksAt = time.monotonic() + 5
+        try:
+            while self.listener.keepListening:
+                if pygame.K_ESCAPE in self.view.keys():
+                    # progress is kept in the journal, and will be resumed on next run
+                    break
+                self.listener.poll()
+                now = time.monotonic()
+                if checkJoysticksAt is not None and now >= checkJoysticksAt:
+                    checkJoysticksAt = None
+                    if not self.joysticksInfo:
+                        self.close(getDialogsText("no_headless"))
+                if self.closeAt is not None:
+                    if now >= self.closeAt:
+                        break
+                elif self.changed:
+                    self.changed = False
+                    self.draw()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.journal.close()
+            self.view.close()
+            self.listener.closeListener()
+
+        return self.configEnded
+
+    def draw(self):
+        if self.joystick_id is not None:
+            name = self.joysticksInfo.get(self.joystick_id, {}).get("name", "")
+            header = f"{getHeaderText('joy')} {self.joystick_id}: {name}    {getHeaderText('lay')} {self.selectedPadLayout}"
+        else:
+            header = f"{getHeaderText('lay')} {self.selectedPadLayout}"
+        currentButton = self.padLayout[self.currentIndex]
+        status = getStatusText("home") if currentButton == homeButton else getStatusText("default")
+        self.view.draw(header, list(zip(self.padLayout, self.valueDescs)), self.currentIndex, status)
+
+    def close(self, text):
+        # message is shown for 3 seconds, then the tool exits (like headless dialogs)
+        self.closeAt = time.monotonic() + 3
+        self.view.message(text)
+
+    def getJoysticks(self, joysticksInfo):
+
+        if self.closeAt is not None:
+            return
+
+        if not joysticksInfo:
+            if self.joysticksInfo:
+                self.close(getDialogsText("disconnected_headless"))
+
+        elif self.joystick_id is not None and (
+                self.joystick_id not in joysticksInfo.keys() or
+                (self.joystick_id in self.joysticksInfo.keys() and
+                 self.joysticksInfo[self.joystick_id]["name"] != joysticksInfo[self.joystick_id]["name"])):
+            self.close(getDialogsText("disconnected_headless"))
+
+        self.joysticksInfo = joysticksInfo
+        if self.closeAt is None and self.joystick_id is not None:
+            self.resumeJournal()
+        self.changed = True
+
+    def resumeJournal(self):
+
+        restored = self.journal.resume(self.journalSession, self.selectedPadLayout,
+                                       self.joysticksInfo.get(self.joystick_id, {}).get("guid"))
+        if restored is None:
+            return
+
+        self.journalSession = None
+        values, descriptions, index = restored
+        self.values.update(values)
+        keys = [layoutKey(button) for button in self.padLayout]
+        for button, valueDesc in descriptions.items():
+            if button in keys:
+                self.valueDescs[keys.index(button)] = getButtonValueText("omi") if valueDesc is None else valueDesc
+        self.currentIndex = min(index + 1, len(self.padLayout) - 1)
+
+    def journalRecord(self, button, value=None, valueDesc=""):
+
+        guid = self.joysticksInfo.get(self.joystick_id, {}).get("guid")
+        if guid is None:
+            return
+
+        if self.journal.record(self.selectedPadLayout, guid, self.currentIndex, button, value, valueDesc):
+            self.journalSession = None
+
+    def getButtonValue(self, event):
+
+        if self.closeAt is not None:
+            return
+
+        currentButton = layoutKey(self.padLayout[self.currentIndex])
+
+        if event.type == OMIT:
+            # button kept pressed: omit
+            valueDesc = getButtonValueText("omi")
+            self.values.pop(currentButton, None)
+            self.journalRecord(currentButton)
+
+        else:
+            if self.joystick_id is None:
+                self.joystick_id = str(event.instance_id)
+                self.resumeJournal()
+                currentButton = layoutKey(self.padLayout[self.currentIndex])
+            if str(event.instance_id) != self.joystick_id:
+                return
+            value, valueDesc = eventValue(event)
+            if value is None:
+                return
+            self.values[currentButton] = value
+            self.journalRecord(currentButton, value, valueDesc)
+
+        self.valueDescs[self.currentIndex] = valueDesc
+        self.currentIndex += 1
+        if self.currentIndex == len(self.padLayout):
+            self.currentIndex -= 1
+            self.endConfig()
+        self.changed = True
+
+    def endConfig(self):
+
+        if self.forceCompleteLayout and len(self.padLayout) != len(self.values):
+            self.close(getDialogsText("complete_headless"))
+            return
+
+        joyName = self.joysticksInfo.get(self.joystick_id, {}).get("name", "")
+        fileName = profileFileName(self.selectedPadLayout, joyName, self.outputFile)
+        content = writeProfile(fileName, self.joysticksInfo, self.selectedPadLayout, self.joystick_id, self.values)
+        self.journal.clear()
+        self.configEnded = True
+
+        text = getDialogsText("success_headless")
+        if self.projectAll:
+            # gestures kept in the main profile (if any) go to the projected ones too
+            text += self.saveProjections(fileName, joyName, content.get("gestures"))
+        self.close(text)
+
+    def saveProjections(self, mainFileName, joyName, gestures=None):
+
+        def save(layoutName, values):
+            fileName = profileFileName(layoutName, joyName, self.outputFile, projected=True)
+            writeProfile(fileName, self.joysticksInfo, layoutName, self.joystick_id, values, gestures=gestures)
+            return fileName
+
+        report = saveProjections(self.layoutIndex, self.selectedPadLayout, self.values, mainFileName, save)
+        return projectionText(report)
@@ -1,15 +1,29 @@
 import copy
 import json
 import os
+import time
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import pygame
 
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QRectF, QEvent, QTimer
-from PyQt5.QtWidgets import QMainWindow, QApplication, QStyle, QFileDialog
-
-from ._listener import JoystickListener
+from PyQt5.QtWidgets import QMainWindow, QApplication, QStyle, QFileDialog, QInputDialog
+
+from ._listener import JoystickListener, ProcessListener
+from ._journal import MappingJournal
+from ._latency import LatencyTracker
+from ._stats import ListenerStats
+from ._measure import PollingMeter
+from ._calibration import calibration_available
+from ._discovery import ControlsIndex
+from ._projection import LayoutIndex, layoutKey, saveProjections, projectionText
+from ._profiles import eventValue, valueDescription, profileFileName, writeProfile
+from ._filter import EventFilter
+from ._state import ControllerStateTable
+from ._queue import BoundedEventQueue
+from ._store import ProfileStore
+from ._event import OMIT
 from ._ui import MainWindow_UI
 from ._layouts import homeButton, layouts
 from ._angles import angles
@@ -20,12 +34,19 @@ from ._utils import *
 
 class JoystickMapper(QMainWindow):
 
-    _buttonValueSig = pyqtSignal(pygame.event.Event)
+    _eventsPendingSig = pyqtSignal()
     _joysticksConnectedSig = pyqtSignal(dict)
     _toggleInspectModeSig = pyqtSignal(bool)
+    _listenerStatsSig = pyqtSignal(dict)
+    _measureReportSig = pyqtSignal(dict)
+    _calibrationSig = pyqtSignal(str, dict)
+    _stateSig = pyqtSignal(dict)
 
     def __init__(self, pad_layout, joystick_id=None, angle=0, headless_mode=False, windowed=False, output_file=None,
-                 standalone_mode=False, force_complete_layout=False, mapper_closed_sig=None):
+                 standalone_mode=False, force_complete_layout=False, mapper_closed_sig=None, latency_stats=False,
+                 stats_interval=0, calibrate_axes=False, project_all=False, event_filter="",
+                 state_panel=False, capture_process=False, queue_policy=BoundedEventQueue.COALESCE, queue_size=1024,
+                 profile_store=None):
         super().__init__(None)
 
         self.standalone = standalone_mode
@@ -33,7 +54,14 @@ class JoystickMapper(QMainWindow):
             self.setWindowTitle("Simple Joystick Mapper")
             self.setWindowIcon(QIcon(os.path.join(resource_path("resources/joystick.ico"))))
 
-        self.inspectMode = pad_layout == Mode.INSPECT
+        # measure mode uses the inspect console to show polling rate and jitter of every controller
+        self.measureMode = pad_layout == Mode.MEASURE
+        # discovery mode also uses the inspect console, to show the controls pressed and the layouts which fit them best
+        self.discoveryMode = pad_layout == Mode.DISCOVER
+        self.discovery = ControlsIndex()
+        self.discoveryHolds = {}
+        self.discoveryInstance = None
+        self.inspectMode = pad_layout == Mode.INSPECT or self.measureMode or self.discoveryMode
         self.mapperClosedSig = mapper_closed_sig
 
         self.layouts = layouts
@@ -44,6 +72,13 @@ class JoystickMapper(QMainWindow):
                 layouts.update(custom_layouts)
             except:
                 print(getErrorText("layout_mismatch"))
+        # keys of all layouts, to also save the configuration for every other layout it covers (if project_all)
+        self.projectAll = project_all
+        self.layoutIndex = LayoutIndex(self.layouts)
+        # inspect mode events filter rules (applied by the listener)
+        self.eventFilterRules = event_filter
+        # live controllers state instead of events console in inspect mode (not in measure / discovery modes)
+        self.statePanel = state_panel and not self.measureMode and not self.discoveryMode
 
         if pad_layout in layouts.keys():
             self.selectedPadLayout = pad_layout
@@ -67,14 +102,31 @@ class JoystickMapper(QMainWindow):
         if windowed and (self.headlessMode or self.rotateWidget):
             self.setWindowFlag(Qt.WindowType.FramelessWindowHint, True)
         self.outputFile = output_file
+        # optional SQLite profile store (file path): saved profiles are also added to it, and loaded from it
+        self.profileStore = ProfileStore(profile_store) if profile_store else None
         self.forceCompleteLayout = force_complete_layout
+        # optional per-stage latency histograms (from event capture to UI update). None means no overhead at all
+        self.latency = LatencyTracker() if latency_stats else None
+        # listener loop counters are dumped to file every stats_interval seconds (0 to disable)
+        self.statsInterval = stats_interval
+        self.lastListenerStats = {}
+        self.showStatsRequested = False
+        if self.statsInterval and os.path.exists("joystickmapper_stats.jsonl"):
+            os.remove("joystickmapper_stats.jsonl")
+        # calibrate axes of the selected controller as soon as it is known (requires numpy)
+        self.calibrateAtStart = calibrate_axes
+        self.calibrating = False
 
         # get connected joysticks
         QTimer.singleShot(5000, self.checkJoysticks)
 
+        # in-progress mapping is journaled, so it can be resumed if the tool is unexpectedly closed
+        self.journal = MappingJournal()
+        self.journalSession = None if self.inspectMode else self.journal.load()
+
         # setup UI and signals
         self.ui = MainWindow_UI(self, self.rotateWidget, self.angle, self.headlessMode, self.inspectMode,
-                                self.windowed, self.padLayout, self.layouts[Mode.FULL])
+                                self.windowed, self.padLayout, self.layouts[Mode.FULL], self.statePanel)
         self.connectUISignals()
 
         # set first button and variables
@@ -95,13 +147,41 @@ class JoystickMapper(QMainWindow):
             if os.path.exists("joystickmapper_inspect.txt"):
                 os.remove("joystickmapper_inspect.txt")
 
-        self._buttonValueSig.connect(self.getButtonValue)
+        # listener events are handed over through a bounded queue (instead of Qt's unbounded queued connection)
+        if queue_policy not in BoundedEventQueue.policies:
+            print(getErrorText("queue") % queue_policy)
+            queue_policy = BoundedEventQueue.COALESCE
+        self.eventQueue = BoundedEventQueue(self._eventsPendingSig, queue_size, queue_policy)
+        self._eventsPendingSig.connect(self.drainEvents)
         self._joysticksConnectedSig.connect(self.getJoysticks)
+        self._listenerStatsSig.connect(self.getListenerStats)
+        self._measureReportSig.connect(self.getMeasureReport)
+        self._calibrationSig.connect(self.getCalibration)
+        self._stateSig.connect(self.getControllersState)
 
         self.listener_thread = QThread()
-        self.listener_obj = JoystickListener(self, self._joysticksConnectedSig, self._buttonValueSig,
-                                             self._toggleInspectModeSig, self.inspectMode)
+        # no parent, otherwise moveToThread() fails and the listener loop would run (and block) in the GUI thread
+        # capture can also run in its own process, so it is not delayed by UI work (same interface)
+        listenerClass = ProcessListener if capture_process else JoystickListener
+        self.listener_obj = listenerClass(None, self._joysticksConnectedSig, self.eventQueue,
+                                          self._toggleInspectModeSig, self.inspectMode, self._listenerStatsSig,
+                                          self.statsInterval)
         self.listener_obj.moveToThread(self.listener_thread)
+        if self.measureMode:
+            self.lastMeasureReport = {}
+            self.listener_obj.setMeter(PollingMeter(), self._measureReportSig)
+            # report is built by the listener (in its thread) when requested
+            self.measureTimer = QTimer()
+            self.measureTimer.timeout.connect(self.listener_obj.requestMeasureReport)
+            self.measureTimer.start(1000)
+        self.setEventFilter(self.eventFilterRules)
+        if self.statePanel:
+            self.listener_obj.setStateTable(ControllerStateTable(), self._stateSig)
+            # panel refresh rate is capped, no matter how many events per second controllers send
+            self.stateTimer = QTimer()
+            self.stateTimer.timeout.connect(self.listener_obj.requestState)
+            if self.inspectMode:
+                self.stateTimer.start(1000 // 30)
         self.listener_thread.setTerminationEnabled(True)
         self.listener_thread.started.connect(self.listener_obj.run)
         self.listener_thread.finished.connect(self.listener_obj.stop)
@@ -110,15 +190,23 @@ class JoystickMapper(QMainWindow):
 
         if not self.headlessMode:
             # connect UI signals
+            if self.measureMode:
+                self.ui.toggleInspect.setDisabled(True)
             self.ui.joyNameCombo.currentIndexChanged.connect(self.onChangeJoystick)
             self.ui.layoutCombo.addItems(list(self.layouts.keys()))
             self.ui.layoutCombo.setCurrentText(self.selectedPadLayout)
             self.ui.layoutCombo.currentIndexChanged.connect(self.onChangeLayout)
             self.ui.toggleInspect.clicked.connect(self.toggleInspectMode)
             self.ui.saveConfig_btn.clicked.connect(self.onSaveConfig)
+            self.ui.calibrate_btn.clicked.connect(self.startCalibration)
+            if not calibration_available() or self.inspectMode:
+                self.ui.calibrate_btn.setDisabled(True)
             self.ui.loadConfig_btn.clicked.connect(self.loadConfig)
+            self.ui.filterEdit.setText(self.eventFilterRules)
+            self.ui.filterEdit.editingFinished.connect(lambda: self.setEventFilter(self.ui.filterEdit.text()))
 
         # connect dialogs buttons
+        self.ui.cancelDialog_btn.clicked.connect(self.journal.clear)
         self.ui.cancelDialog_btn.clicked.connect(self.forceClose)
         self.ui.changeDialog_btn.clicked.connect(self.changeSelected)
         self.ui.saveDialog_btn.clicked.connect(lambda checked: self.saveConfig(True))
@@ -134,8 +222,8 @@ class JoystickMapper(QMainWindow):
                 if self.rotateWidget:
                     h, w = w, h
                     if self.windowed:
-                        self.graphicsview.setGeometry(0, 0, w, h)
-                        self.proxy.setGeometry(QRectF(0, 0, w, h))
+                        self.ui.graphicsview.setGeometry(0, 0, w, h)
+                        self.ui.proxy.setGeometry(QRectF(0, 0, w, h))
                 self.setGeometry(self.x(), self.y(), w, h)
             else:
                 titleBarHeight = 0 if self.headlessMode else QApplication.style().pixelMetric(QStyle.PM_TitleBarHeight)
@@ -143,8 +231,8 @@ class JoystickMapper(QMainWindow):
                 w, h = 860, self.screen().availableSize().height() - titleBarHeight
                 if self.rotateWidget:
                     h, w = w, h
-                    self.graphicsview.setGeometry(0, 0, w, h)
-                    self.proxy.setGeometry(QRectF(0, 0, h, w))
+                    self.ui.graphicsview.setGeometry(0, 0, w, h)
+                    self.ui.proxy.setGeometry(QRectF(0, 0, h, w))
                 if self.windowed:
                     x = (self.screen().availableSize().width() - w) // 2
                     y = (self.screen().availableSize().height() + titleBarHeight - h) // 2
@@ -161,7 +249,7 @@ class JoystickMapper(QMainWindow):
         if self.ui.joyNameCombo.count() > 0:
             self.changeJoystickRequested = index
             if self.joystick_id is not None and self.joystick_id in self.padValues.keys() and self.padValues[self.joystick_id]["layout"]:
-                self.ui.changeDialog.exec()
+                self.execDialog(self.ui.changeDialog)
             else:
                 self.changeJoystick(index)
 
@@ -184,14 +272,14 @@ class JoystickMapper(QMainWindow):
         if not self.joysticksInfo:
             if self.headlessMode:
                 QTimer.singleShot(3000, lambda: self.forceClose(dialog_to_close=self.ui.noControllersHeadlessDialog))
-                self.ui.noControllersHeadlessDialog.exec()
+                self.execDialog(self.ui.noControllersHeadlessDialog)
             else:
-                self.ui.noControllersDialog.exec()
+                self.execDialog(self.ui.noControllersDialog)
 
     def onChangeLayout(self, index):
         self.changeLayoutRequested = index
         if self.joystick_id is not None and self.joystick_id in self.padValues.keys() and self.padValues[self.joystick_id]["layout"]:
-            self.ui.changeDialog.exec()
+            self.execDialog(self.ui.changeDialog)
         else:
             self.changeLayout(index)
 
@@ -209,12 +297,18 @@ class JoystickMapper(QMainWindow):
             self.currentButton = self.padLayout[0]
             if self.joystick_id in self.padValues.keys():
                 self.padValues[self.joystick_id]["layout"] = {}
+            if self.journalSession is None:
+                self.journal.clear()
 
         self.changeLayoutRequested = None
         self.layoutLoaded = False
 
     def toggleInspectMode(self, checked=False):
 
+        discoveryEnded = self.discoveryMode
+        if discoveryEnded:
+            self.endDiscovery()
+
         self.inspectMode = not self.inspectMode
 
         if self.inspectMode:
@@ -225,6 +319,8 @@ class JoystickMapper(QMainWindow):
                 self.ui.layoutCombo.setDisabled(True)
                 self.ui.saveConfig_btn.setDisabled(True)
                 self.ui.loadConfig_btn.setDisabled(True)
+                self.ui.calibrate_btn.setDisabled(True)
+                self.ui.showFilter(True)
             if not self.ui.inspectWidget.text():
                 if os.path.exists("joystickmapper_inspect.txt"):
                     os.remove("joystickmapper_inspect.txt")
@@ -240,6 +336,8 @@ class JoystickMapper(QMainWindow):
                 self.ui.layoutCombo.setDisabled(False)
                 self.ui.saveConfig_btn.setDisabled(False)
                 self.ui.loadConfig_btn.setDisabled(False)
+                self.ui.calibrate_btn.setDisabled(not calibration_available())
+                self.ui.showFilter(False)
             oldWidget = self.ui.inspectWidget
             newWidget = self.ui.scroll
 
@@ -250,44 +348,139 @@ class JoystickMapper(QMainWindow):
         self.ui.mainLayout.replaceWidget(oldWidget, newWidget)
         newWidget.show()
         self._toggleInspectModeSig.emit(self.inspectMode)
+        if self.statePanel:
+            if self.inspectMode:
+                self.stateTimer.start(1000 // 30)
+            else:
+                self.stateTimer.stop()
+
+        if discoveryEnded:
+            self.startDiscoveredMapping()
+
+    def setEventFilter(self, rules):
+        # filter is applied by the listener, so filtered events are neither printed, emitted nor drawn
+        try:
+            eventFilter = EventFilter(rules)
+        except ValueError:
+            errorText = getErrorText("filter") % rules
+            print(errorText)
+            if self.inspectMode:
+                self.ui.inspectWidget.appendText(errorText)
+            return
+        self.listener_obj.setFilter(eventFilter)
+
+    def discoverControl(self, event):
+
+        if event.type == pygame.JOYBUTTONDOWN:
+            self.discoveryHolds[(event.instance_id, event.index)] = time.monotonic()
+
+        elif event.type == pygame.JOYBUTTONUP:
+            pressed = self.discoveryHolds.pop((event.instance_id, event.index), None)
+            if pressed is not None and time.monotonic() - pressed >= 3:
+                # keep any button pressed to finish (same as omitting a button while mapping)
+                self.discoveryInstance = str(event.instance_id)
+                self.toggleInspectMode()
+                return
+
+        if self.discovery.add(event):
+            self.showDiscovery()
+
+    def showDiscovery(self):
+        headerMsg, joyMsg, fitMsg = getDiscoveryMessages()
+        text = headerMsg
+        for instance_id in self.discovery.instances():
+            hats, axes, buttons = self.discovery.counts(instance_id)
+            ranking = self.discovery.rank(instance_id, self.layouts)[:3]
+            text += joyMsg % (self.joysticksInfo.get(instance_id, {}).get("name", ""), instance_id, hats, axes, buttons,
+                              ", ".join(fitMsg % (fit["layout"], fit["missing"], fit["unused"]) for fit in ranking))
+        self.ui.inspectWidget.setText(text)
+
+    def endDiscovery(self):
+        # preselect the layout which best fits the controls pressed by the held controller (or the most used one)
+        self.discoveryMode = False
+        instances = self.discovery.instances()
+        if self.discoveryInstance not in instances:
+            self.discoveryInstance = max(instances, key=lambda instance_id: sum(self.discovery.counts(instance_id)),
+                                         default=None)
+        if self.discoveryInstance is not None:
+            self.selectedPadLayout = self.discovery.rank(self.discoveryInstance, self.layouts)[0]["layout"]
+            self.padLayout = self.layouts[self.selectedPadLayout]
+            if not self.headlessMode:
+                self.ui.layoutCombo.blockSignals(True)
+                self.ui.layoutCombo.setCurrentText(self.selectedPadLayout)
+                self.ui.layoutCombo.blockSignals(False)
+
+    def startDiscoveredMapping(self):
+        if self.headlessMode and self.joystick_id is None:
+            self.joystick_id = self.discoveryInstance
+        self.getJoysticks(self.joysticksInfo)
+        if not self.headlessMode and self.discoveryInstance is not None:
+            index = self.ui.joyNameCombo.findText(self.discoveryInstance + ":", Qt.MatchFlag.MatchStartsWith)
+            if index >= 0:
+                self.ui.joyNameCombo.setCurrentIndex(index)
 
     def loadConfig(self, checked=False):
 
+        if self.profileStore is not None:
+            self.loadStoredConfig()
+            return
         filename, _ = QFileDialog.getOpenFileName(self, "Select file to load", ".", "*.json")
         if filename:
-            filename = os.path.normpath(filename)
-            with open(filename, "r", encoding="utf8") as f:
-                layout = json.loads(f.read())
+            self.loadConfigFile(filename)
+
+    def loadStoredConfig(self):
+        # profiles of the selected controller model (all of them if there is none), latest first
+        guid = self.joysticksInfo.get(self.joystick_id, {}).get("guid")
+        found = self.profileStore.query(guid=guid) if guid else []
+        if not found:
+            found = self.profileStore.query()
+        items = [f"#{profile['id']} {profile['layout']} - {profile['name']} "
+                 f"({time.strftime('%Y-%m-%d %H:%M', time.localtime(profile['saved']))})" for profile in found]
+        item, accepted = QInputDialog.getItem(self, getDialogsText("stored"), getDialogsText("stored"), items, 0, False)
+        if accepted and item in items:
+            content = self.profileStore.load(found[items.index(item)]["id"])
+            if content is None:
+                self.execDialog(self.ui.loadLayoutErrorDialog)
+            else:
+                self.loadConfigContent(content)
 
-            try:
-                self.selectedPadLayout = layout["layout"]
-                if self.selectedPadLayout not in list(self.layouts.keys()):
-                    raise "Wrong layout"
-                joystick_id = layout["joystick_configured"]
-                self.padLayout = self.layouts[self.selectedPadLayout]
+    def loadConfigFile(self, filename):
+
+        filename = os.path.normpath(filename)
+        with open(filename, "r", encoding="utf8") as f:
+            layout = json.loads(f.read())
+        self.loadConfigContent(layout)
+
+    def loadConfigContent(self, layout):
+
+        try:
+            self.selectedPadLayout = layout["layout"]
+            if self.selectedPadLayout not in list(self.layouts.keys()):
+                raise "Wrong layout"
+            joystick_id = layout["joystick_configured"]
+            self.padLayout = self.layouts[self.selectedPadLayout]
+            if self.joystick_id is not None:
+                self.padValues[self.joystick_id]["layout"] = {}
+            new_padLayout = {}
+            for button in layout[joystick_id].keys():
+                valueDesc = valueDescription(layout[joystick_id][button])
                 if self.joystick_id is not None:
-                    self.padValues[self.joystick_id]["layout"] = {}
-                new_padLayout = {}
-                for button in layout[joystick_id].keys():
-                    value = layout[joystick_id][button]["value"]
-                    if "hat" in layout[joystick_id][button].keys():
-                        valueDesc = f"HAT {str(value[0])}, {str(value[1])}"
-                    elif "axis" in layout[joystick_id][button].keys():
-                        valueDesc = f"AXIS {str(layout[joystick_id][button]["axis"])}, {str(value)}"
-                    else:
-                        valueDesc = str(value)
-                    if self.joystick_id is not None:
-                        self.padValues[self.joystick_id]["layout"][button] = layout[joystick_id][button]
-                    new_padLayout[button] = valueDesc
-                self.ui.loadNewLayoutGrid(new_padLayout, self.padLayout)
-                self.ui.layoutCombo.setCurrentText(self.selectedPadLayout)
-                self.layoutLoaded = True
+                    self.padValues[self.joystick_id]["layout"][button] = layout[joystick_id][button]
+                new_padLayout[button] = valueDesc
+            if self.joystick_id is not None and "calibration" in layout.keys():
+                self.padValues[self.joystick_id]["calibration"] = layout["calibration"]
+            if self.joystick_id is not None and "gestures" in layout.keys():
+                # written by hand: kept when the profile is saved again
+                self.padValues[self.joystick_id]["gestures"] = layout["gestures"]
+            self.ui.loadNewLayoutGrid(new_padLayout, self.padLayout)
+            self.ui.layoutCombo.setCurrentText(self.selectedPadLayout)
+            self.layoutLoaded = True
 
-            except:
-                self.ui.loadLayoutErrorDialog.exec()
+        except:
+            self.execDialog(self.ui.loadLayoutErrorDialog)
 
     def onSaveConfig(self):
-        self.ui.saveDialog.exec()
+        self.execDialog(self.ui.saveDialog)
 
     def saveConfig(self, force=False):
 
@@ -296,10 +489,10 @@ class JoystickMapper(QMainWindow):
             if self.headlessMode:
                 # in headless mode, the tool will exit since there is no other way (user can repeat process)
                 QTimer.singleShot(3000, lambda: self.forceClose(dialog_to_close=self.ui.completeLayoutHeadlessDialog))
-                self.ui.completeLayoutHeadlessDialog.exec()
+                self.execDialog(self.ui.completeLayoutHeadlessDialog)
             else:
                 # in non-headless mode, no configuration is saved. User can work it out within the tool.
-                self.ui.completeLayoutDialog.exec()
+                self.execDialog(self.ui.completeLayoutDialog)
 
         else:
 
@@ -310,34 +503,50 @@ class JoystickMapper(QMainWindow):
                 saveConfig = self.joystick_id is not None
 
                 if saveConfig:
-                    if not self.outputFile:
-                        joyName = self.joysticksInfo[self.joystick_id]["name"]
-                        padLayout = "FULL" if self.selectedPadLayout == "Completo" else self.selectedPadLayout.upper()
-                        fileBaseName = get_valid_filename(padLayout + "_" + joyName)
-                        fileName = f"{fileBaseName[0:64]}.json"
-                        i = 0
-                        while os.path.exists(fileName):
-                            i += 1
-                            fileName = f"{fileBaseName}_{i}.json"
-                    else:
-                        fileName = self.outputFile
+                    fileName = self.getProfileFileName(self.selectedPadLayout)
+                    self.saveProfile(fileName, self.selectedPadLayout, self.padValues[self.joystick_id]["layout"])
+                    self.journal.clear()
 
-                    output = {
-                        "joysticks_info": self.joysticksInfo,
-                        "layout": self.selectedPadLayout,
-                        "joystick_configured": self.joystick_id,
-                        self.joystick_id: self.padValues[self.joystick_id]["layout"]
-                    }
-                    with open(fileName, "w", encoding="utf8") as f:
-                        json.dump(output, f, ensure_ascii=False, sort_keys=False, indent=4)
+                    savedText = getDialogsText("saved")
+                    if self.projectAll:
+                        savedText += self.saveProjections(fileName)
+                    self.ui.savedDialog.setText(savedText)
 
                     if self.headlessMode:
                         # warn the user the configuration was successful and exit tool
                         QTimer.singleShot(3000, lambda: self.forceClose(dialog_to_close=self.ui.controllerConfiguredHeadlessDialog))
-                        self.ui.controllerConfiguredHeadlessDialog.exec()
+                        self.execDialog(self.ui.controllerConfiguredHeadlessDialog)
                     else:
                         # warn the user the configuration was saved
-                        self.ui.savedDialog.exec()
+                        self.execDialog(self.ui.savedDialog)
+
+    def getProfileFileName(self, layoutName, projected=False):
+        joyName = self.joysticksInfo.get(self.joystick_id, {}).get("name", "")
+        return profileFileName(layoutName, joyName, self.outputFile, projected)
+
+    def saveProfile(self, fileName, layoutName, values):
+        content = writeProfile(fileName, self.joysticksInfo, layoutName, self.joystick_id, values,
+                               self.padValues[self.joystick_id].get("calibration"),
+                               self.padValues[self.joystick_id].get("gestures"))
+        if self.profileStore is not None:
+            self.profileStore.save(self.joysticksInfo, layoutName, self.joystick_id, values,
+                                   self.padValues[self.joystick_id].get("calibration"), os.path.abspath(fileName),
+                                   content.get("gestures"))
+        if content.get("gestures"):
+            # kept from the file replaced: projections saved next (and later saves) keep them too
+            self.padValues[self.joystick_id]["gestures"] = content["gestures"]
+
+    def saveProjections(self, mainFileName):
+        # same session saved for every other layout fully covered by the configured keys (see saveProjections())
+        report = saveProjections(self.layoutIndex, self.selectedPadLayout, self.padValues[self.joystick_id]["layout"],
+                                 mainFileName, self.saveProjection)
+        print(json.dumps(report, ensure_ascii=False))
+        return projectionText(report)
+
+    def saveProjection(self, layoutName, values):
+        fileName = self.getProfileFileName(layoutName, projected=True)
+        self.saveProfile(fileName, layoutName, values)
+        return fileName
 
     @pyqtSlot(dict)
     def getJoysticks(self, joysticksInfo):
@@ -357,6 +566,8 @@ class JoystickMapper(QMainWindow):
                                                  joystick,
                                                  self.joysticksInfo[joystick]["guid"],
                                                  self.joysticksInfo[joystick]["id"]))
+                if self.discoveryMode:
+                    self.showDiscovery()
 
             else:
 
@@ -385,40 +596,159 @@ class JoystickMapper(QMainWindow):
                         self.ui.idLabel.setText(joystick + ":")
                         self.ui.nameLabel.setText(joystickInfo["name"])
 
+                self.resumeJournal()
+
+                if self.calibrateAtStart and self.joystick_id is not None:
+                    self.calibrateAtStart = False
+                    self.startCalibration()
+
+    def startCalibration(self, checked=False):
+
+        if not calibration_available():
+            self.ui.statusLabel.setText(getStatusText("no_numpy"))
+
+        elif self.joystick_id is not None and not self.calibrating:
+            # mapping is paused while calibrating: moving sticks would otherwise assign them
+            self.calibrating = True
+            self.ui.statusLabel.setText(getStatusText("calibrate_rest"))
+            self.listener_obj.requestCalibration(self.joystick_id, self._calibrationSig)
+            QTimer.singleShot(2000, self.calibrationMoveStep)
+            QTimer.singleShot(7000, lambda: self.listener_obj.requestCalibrationStep("finish"))
+
+    def calibrationMoveStep(self):
+        self.ui.statusLabel.setText(getStatusText("calibrate_move"))
+        self.listener_obj.requestCalibrationStep("rest_end")
+
+    @pyqtSlot(str, dict)
+    def getCalibration(self, joystick_id, calibration):
+        self.calibrating = False
+        if calibration and joystick_id in self.padValues.keys():
+            self.padValues[joystick_id]["calibration"] = calibration
+            self.ui.statusLabel.setText(getStatusText("calibrated"))
+        else:
+            self.ui.statusLabel.setText(getStatusText("calibrate_failed"))
+
+    def resumeJournal(self):
+
+        if self.journalSession is None or self.joystick_id not in self.padValues.keys():
+            return
+
+        # restore journaled progress. Journal is atomically replaced, so nothing is lost if the tool dies meanwhile
+        restored = self.journal.resume(self.journalSession, self.selectedPadLayout,
+                                       self.padValues[self.joystick_id]["guid"])
+        if restored is None:
+            return
+        self.journalSession = None
+        values, descriptions, index = restored
+        self.padValues[self.joystick_id]["layout"].update(values)
+        new_padLayout = {button: self.ui.omittedText if valueDesc is None else valueDesc
+                         for button, valueDesc in descriptions.items()}
+        self.ui.loadNewLayoutGrid(new_padLayout, self.padLayout)
+
+        self.currentIndex = min(index + 1, len(self.padLayout) - 1)
+        firstText = self.ui.content_layout.itemAt(0).widget().layout().itemAt(1).widget().text()
+        self.updateNextButton(self.currentIndex, 0, firstText)
+
+    def journalRecord(self, button, value=None, valueDesc=""):
+
+        if self.joystick_id not in self.padValues.keys():
+            return
+
+        if self.journal.record(self.selectedPadLayout, self.padValues[self.joystick_id]["guid"], self.currentIndex,
+                               button, value, valueDesc):
+            # a new session begins: previous journal (if any) will not be resumed anymore
+            self.journalSession = None
+
     def checkJoysticksInfo(self, joysticksInfo):
 
         if not joysticksInfo:
             if self.headlessMode:
                 QTimer.singleShot(3000, self.forceClose)
-                self.ui.controllersDisconnectedHeadlessDialog.exec()
+                self.execDialog(self.ui.controllersDisconnectedHeadlessDialog)
             else:
                 if self.joysticksInfo:
-                    self.ui.controllersDisconnectedDialog.exec()
+                    self.execDialog(self.ui.controllersDisconnectedDialog)
                 else:
-                    self.ui.noControllersDialog.exec()
+                    self.execDialog(self.ui.noControllersDialog)
         else:
             if self.headlessMode:
                 if (self.joystick_id is not None and self.joystick_id not in joysticksInfo.keys() or
                         (self.joystick_id in self.joysticksInfo.keys() and self.joystick_id in joysticksInfo.keys() and
                          self.joysticksInfo[self.joystick_id]["name"] != joysticksInfo[self.joystick_id]["name"])):
                     QTimer.singleShot(3000, lambda: self.forceClose(dialog_to_close=self.ui.controllersDisconnectedHeadlessDialog))
-                    self.ui.controllersDisconnectedHeadlessDialog.exec()
+                    self.execDialog(self.ui.controllersDisconnectedHeadlessDialog)
             else:
                 if self.joystick_id is not None and self.joysticksInfo != joysticksInfo:
-                    self.ui.controllersChangedDialog.exec()
+                    self.execDialog(self.ui.controllersChangedDialog)
 
         return joysticksInfo
 
 
-    @pyqtSlot(pygame.event.Event)
-    def getButtonValue(self, event):
+    @pyqtSlot(dict)
+    def getListenerStats(self, stats):
+        stats["queue"] = self.eventQueue.counters()
+        self.lastListenerStats = stats
+        if self.statsInterval:
+            ListenerStats.dump(stats)
+        if self.showStatsRequested and self.inspectMode:
+            self.ui.inspectWidget.appendText("LISTENER: " + json.dumps(stats))
+        self.showStatsRequested = False
 
+    @pyqtSlot(dict)
+    def getControllersState(self, snapshot):
         if self.inspectMode:
+            self.ui.inspectWidget.setState(snapshot)
+
+    @pyqtSlot(dict)
+    def getMeasureReport(self, report):
+        self.lastMeasureReport = report
+        headerMsg, joyMsg = getMeasureMessages()
+        text = headerMsg
+        for instance_id, values in report.items():
+            name = self.joysticksInfo.get(instance_id, {}).get("name", "")
+            jitter = values["jitter_us"]
+            text += joyMsg % (name, instance_id, values["events"], values["polling_hz"], values["interval_us"]["p50"],
+                              jitter["p50"], jitter["p90"], jitter["p99"], values["same_poll_events"],
+                              values["dropped_transitions"], values["duplicated_transitions"],
+                              ", ".join(f"{axis}: {hz} Hz" for axis, hz in values["axes_hz"].items()))
+        self.ui.inspectWidget.setText(text)
+
+    @pyqtSlot()
+    def drainEvents(self):
+        # one by one: a dialog opened by an event pauses the queue (pause policy) before the next one is taken
+        event = self.eventQueue.pop()
+        while event is not None:
+            self.getButtonValue(event)
+            event = self.eventQueue.pop()
+
+    def execDialog(self, dialog):
+        # with pause policy, events are discarded while a modal dialog is open (not replayed once it is closed)
+        pause = self.eventQueue.policy == BoundedEventQueue.PAUSE
+        if pause:
+            self.eventQueue.pause()
+        try:
+            return dialog.exec()
+        finally:
+            if pause:
+                self.eventQueue.resume()
+
+    def getButtonValue(self, event):
+
+        if self.latency is not None:
+            dispatched = time.perf_counter_ns()
+
+        if self.discoveryMode:
+            self.discoverControl(event)
+
+        elif self.inspectMode:
             self.drawButtonValue(event)
 
-        else:
+        elif not self.calibrating:
             self.configButtonValue(event)
 
+        if self.latency is not None:
+            self.latency.record(event, dispatched, time.perf_counter_ns())
+
     def drawButtonValue(self, event):
         self.ui.inspectWidget.appendText(str(event))
         with open("joystickmapper_inspect.txt", "a", encoding="utf8") as f:
@@ -428,10 +758,12 @@ class JoystickMapper(QMainWindow):
 
         goToNext = False
 
-        if event.type == -1:
-            valueDesc = self.omittedText
-            if self.currentButton in self.padValues[self.joystick_id]["layout"].keys():
-                del self.padValues[self.joystick_id]["layout"][self.currentButton]
+        if event.type == OMIT:
+            valueDesc = self.ui.omittedText
+            currentButton = self.currentButton.split("(", 1)[0].strip()
+            if currentButton in self.padValues[self.joystick_id]["layout"].keys():
+                del self.padValues[self.joystick_id]["layout"][currentButton]
+            self.journalRecord(currentButton)
             goToNext = True
 
         else:
@@ -449,35 +781,14 @@ class JoystickMapper(QMainWindow):
 
                 print(self.currentIndex, self.currentButton)
 
-                currentButton = self.currentButton
-                if "(" in currentButton:
-                    currentButton = currentButton.split("(", 1)[0].strip()
+                currentButton = layoutKey(self.currentButton)
 
-                if event.type == pygame.JOYBUTTONUP:
-                    self.padValues[joystick_id]["layout"][currentButton] = {
-                        "type": event.type,
-                        "description": "BUTTON",
-                        "value": event.button
-                    }
-                    valueDesc = str(event.button)
-
-                elif event.type == pygame.JOYHATMOTION:
-                    self.padValues[joystick_id]["layout"][currentButton] = {
-                        "type": event.type,
-                        "description": "D-PAD",
-                        "hat": event.hat,
-                        "value": [int(value) for value in event.value]
-                    }
-                    valueDesc = f"HAT {str(event.value[0])}, {str(event.value[1])}"
-
-                elif event.type == pygame.JOYAXISMOTION:
-                    self.padValues[joystick_id]["layout"][currentButton] = {
-                        "type": event.type,
-                        "description": "ANALOG JOYSTICK / TRIGGER",
-                        "axis": event.axis,
-                        "value": int(event.value)
-                    }
-                    valueDesc = f"AXIS {str(event.axis)}, {str(int(event.value))}"
+                value, valueDesc = eventValue(event)
+                if value is not None:
+                    self.padValues[joystick_id]["layout"][currentButton] = value
+
+                if currentButton in self.padValues[joystick_id]["layout"].keys():
+                    self.journalRecord(currentButton, self.padValues[joystick_id]["layout"][currentButton], valueDesc)
 
                 currText = self.ui.content_layout.itemAt(self.currentIndex).widget().layout().itemAt(1).widget().text()
                 eventAdded = event in self.padValues[self.joystick_id]["layout"].values()
@@ -485,8 +796,8 @@ class JoystickMapper(QMainWindow):
                     goToNext = True
 
                 else:
-                    self.ui.content_layout.itemAt(self.currentIndex).widget().layout().itemAt(1).widget().setText(self.alreadyAssignedText)
-                    self.ui.statusLabel.setText(self.repeatedText)
+                    self.ui.content_layout.itemAt(self.currentIndex).widget().layout().itemAt(1).widget().setText(self.ui.alreadyAssignedText)
+                    self.ui.statusLabel.setText(self.ui.repeatedText)
 
         if goToNext:
             self.checkNextButton(valueDesc)
@@ -518,7 +829,7 @@ class JoystickMapper(QMainWindow):
             w = currWidget.layout().itemAt(i).widget()
             w.setObjectName(self.ui.selected_style_tag)
         currWidget.setStyleSheet(self.ui.main_style)
-        self.ui.scroll.ensureWidgetVisible(currWidget)
+        self.ui.showButtonWidget(currWidget)
         self.currentButton = self.padLayout[index]
         if self.currentButton == homeButton:
             self.ui.statusLabel.setText(self.ui.homeText)
@@ -547,6 +858,21 @@ class JoystickMapper(QMainWindow):
                 else:
                     self.show(force_full=True)
 
+        elif a0.key() == Qt.Key.Key_F2:
+            if self.inspectMode and self.latency is not None:
+                self.ui.inspectWidget.appendText(self.latency.summary())
+                self.latency.export()
+
+        elif a0.key() == Qt.Key.Key_F5:
+            if self.measureMode:
+                self.listener_obj.requestMeasureReset()
+
+        elif a0.key() == Qt.Key.Key_F3:
+            if self.inspectMode:
+                # listener will emit a snapshot from its own thread in next iteration
+                self.showStatsRequested = True
+                self.listener_obj.requestStats()
+
         if not self.inspectMode and 0 <= self.currentIndex <= len(self.padLayout):
 
             prevIndex = self.currentIndex
@@ -598,7 +924,19 @@ class JoystickMapper(QMainWindow):
 
         if self.forceCloseRequested or self.headlessMode:
             # quit listener, warn parent (if signal is not None) and close tool (if standalone)
+            self.journal.close()
+            if self.profileStore is not None:
+                self.profileStore.close()
+            if self.latency is not None:
+                self.latency.export()
+            if self.measureMode:
+                self.measureTimer.stop()
+                with open("joystickmapper_measure.json", "w", encoding="utf8") as f:
+                    json.dump({"joysticks_info": self.joysticksInfo, "measure": self.lastMeasureReport}, f, indent=4)
+            # listener loop never returns to the thread event loop, so it has to be stopped before quitting
+            self.listener_obj.stop()
             self.listener_thread.quit()
+            self.listener_thread.wait(1000)
             if self.mapperClosedSig is not None:
                 self.mapperClosedSig.emit(self.configEnded)
             if self.standalone:
@@ -608,4 +946,4 @@ class JoystickMapper(QMainWindow):
         else:
             # ask user. It user replies yes, closing will be forced using forceClose()
             a0.ignore()
-            self.ui.cancelDialog.exec()
+            self.execDialog(self.ui.cancelDialog)
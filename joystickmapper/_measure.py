@@ -0,0 +1,107 @@
+import collections
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+
+class DeviceTimings:
+
+    maxSamples = 10000
+
+    def __init__(self):
+        self.events = 0
+        self.lastTime = None
+        # inter-arrival times (ns) between consecutive input events of this device (bounded memory)
+        self.deltas = collections.deque(maxlen=self.maxSamples)
+        self.samePoll = 0
+        self.buttons = {}
+        self.hats = {}
+        self.axes = {}
+        self.axesCount = {}
+        self.axesFirst = {}
+        self.axesLast = {}
+        self.dropped = 0
+        self.duplicated = 0
+
+
+class PollingMeter:
+    # measures event inter-arrival times per controller. All methods are called from the listener thread
+    # time resolution is limited by the listener polling rate (events polled together share the same timestamp)
+
+    def __init__(self):
+        self.devices = {}
+
+    def reset(self):
+        self.devices = {}
+
+    def add(self, event, captured_ns):
+
+        if event.type not in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION, pygame.JOYAXISMOTION):
+            return
+
+        device = self.devices.get(event.instance_id)
+        if device is None:
+            device = DeviceTimings()
+            self.devices[event.instance_id] = device
+
+        device.events += 1
+        if device.lastTime is not None:
+            delta = captured_ns - device.lastTime
+            if delta > 0:
+                device.deltas.append(delta)
+            else:
+                device.samePoll += 1
+        device.lastTime = captured_ns
+
+        if event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            pressed = event.type == pygame.JOYBUTTONDOWN
+            if device.buttons.get(event.button) == pressed:
+                # two downs (or ups) in a row: the opposite transition was lost. Buttons not seen yet are unknown
+                # (the first up of a button already held when measuring started is not a loss)
+                device.dropped += 1
+            device.buttons[event.button] = pressed
+
+        elif event.type == pygame.JOYHATMOTION:
+            if device.hats.get(event.hat) == event.value:
+                device.duplicated += 1
+            device.hats[event.hat] = event.value
+
+        else:
+            if device.axes.get(event.axis) == event.value:
+                device.duplicated += 1
+            device.axes[event.axis] = event.value
+            device.axesCount[event.axis] = device.axesCount.get(event.axis, 0) + 1
+            if event.axis not in device.axesFirst:
+                device.axesFirst[event.axis] = captured_ns
+            device.axesLast[event.axis] = captured_ns
+
+    @staticmethod
+    def _percentile(sortedValues, p):
+        if not sortedValues:
+            return 0
+        return sortedValues[min(len(sortedValues) - 1, int(len(sortedValues) * p / 100))]
+
+    def report(self):
+        report = {}
+        for instance_id, device in self.devices.items():
+            deltas = sorted(device.deltas)
+            median = self._percentile(deltas, 50)
+            jitter = sorted(abs(delta - median) for delta in deltas)
+            axesHz = {}
+            for axis, count in device.axesCount.items():
+                elapsed = device.axesLast[axis] - device.axesFirst[axis]
+                axesHz[str(axis)] = round((count - 1) * 1e9 / elapsed, 1) if elapsed > 0 else 0
+            report[str(instance_id)] = {
+                "events": device.events,
+                "polling_hz": round(1e9 / median, 1) if median else 0,
+                "interval_us": {"p50": median // 1000, "min": deltas[0] // 1000 if deltas else 0,
+                                "max": deltas[-1] // 1000 if deltas else 0},
+                "jitter_us": {"p50": self._percentile(jitter, 50) // 1000, "p90": self._percentile(jitter, 90) // 1000,
+                              "p99": self._percentile(jitter, 99) // 1000},
+                "same_poll_events": device.samePoll,
+                "dropped_transitions": device.dropped,
+                "duplicated_transitions": device.duplicated,
+                "axes_hz": axesHz
+            }
+        return report
@@ -8,4 +8,6 @@ class Mode:
     GAMEPAD_PLUS = "Gamepad Plus"
     FULL = "Completo"
     INSPECT = "INSPECT"
+    MEASURE = "MEASURE"
+    DISCOVER = "DISCOVER"
     
\ No newline at end of file
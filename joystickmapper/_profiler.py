@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+
+
+class SamplingProfiler(threading.Thread):
+    # statistical profiler: periodically samples the stack of every running thread (including the listener QThread)
+    # overhead depends on the sampling interval only, not on how many functions are called
+
+    def __init__(self, interval=0.005, fileName="joystickmapper_profile.txt"):
+        super().__init__(name="SamplingProfiler", daemon=True)
+
+        self.interval = interval
+        self.fileName = fileName
+        self.keepSampling = True
+        self.samples = 0
+        self.selfCounts = {}
+        self.totalCounts = {}
+        self.threadCounts = {}
+        self.started = None
+
+    def run(self):
+        self.started = time.perf_counter()
+        ownId = threading.get_ident()
+        while self.keepSampling:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for threadId, frame in sys._current_frames().items():
+                if threadId == ownId:
+                    continue
+                threadName = names.get(threadId, f"Thread-{threadId}")
+                self.threadCounts[threadName] = self.threadCounts.get(threadName, 0) + 1
+                seen = set()
+                top = True
+                while frame is not None:
+                    code = frame.f_code
+                    key = (threadName, code.co_filename, code.co_firstlineno, code.co_name)
+                    if top:
+                        self.selfCounts[key] = self.selfCounts.get(key, 0) + 1
+                        top = False
+                    if key not in seen:
+                        # count recursive functions only once per sample
+                        seen.add(key)
+                        self.totalCounts[key] = self.totalCounts.get(key, 0) + 1
+                    frame = frame.f_back
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.keepSampling = False
+        if self.is_alive():
+            self.join(self.interval * 10)
+        self.writeReport()
+
+    def writeReport(self, top=40):
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0
+
+        def lines(counts):
+            ret = []
+            for (threadName, fileName, lineNo, funcName), count in sorted(counts.items(), key=lambda x: -x[1])[:top]:
+                ret.append(f"{count:>8} {100 * count / max(1, self.samples):>6.1f}%  [{threadName}] "
+                           f"{funcName} ({fileName}:{lineNo})")
+            return ret
+
+        report = [f"Samples: {self.samples}  Interval: {self.interval * 1000:.1f} ms  Elapsed: {elapsed:.1f} s", "",
+                  "Samples per thread:"]
+        report += [f"{count:>8}  {name}" for name, count in sorted(self.threadCounts.items(), key=lambda x: -x[1])]
+        report += ["", f"Top {top} by own time (function on top of the stack):"] + lines(self.selfCounts)
+        report += ["", f"Top {top} by cumulative time (function anywhere in the stack):"] + lines(self.totalCounts)
+        with open(self.fileName, "w", encoding="utf8") as f:
+            f.write("\n".join(report) + "\n")
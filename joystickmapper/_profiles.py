@@ -0,0 +1,135 @@
+import json
+import os
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._modes import Mode
+from ._utils import get_valid_filename, write_json_atomic
+
+
+def eventValue(event):
+    # value stored in the configuration for a button / hat / axis event (JoyEvent), and its description on screen
+    if event.type == pygame.JOYBUTTONUP:
+        value = {
+            "type": event.type,
+            "description": "BUTTON",
+            "value": event.index
+        }
+
+    elif event.type == pygame.JOYHATMOTION:
+        value = {
+            "type": event.type,
+            "description": "D-PAD",
+            "hat": event.index,
+            "value": [int(value) for value in event.value]
+        }
+
+    elif event.type == pygame.JOYAXISMOTION:
+        value = {
+            "type": event.type,
+            "description": "ANALOG JOYSTICK / TRIGGER",
+            "axis": event.index,
+            "value": int(event.value)
+        }
+
+    else:
+        return None, ""
+
+    return value, valueDescription(value)
+
+
+def valueDescription(value):
+    if "hat" in value.keys():
+        return f"HAT {str(value['value'][0])}, {str(value['value'][1])}"
+    elif "axis" in value.keys():
+        return f"AXIS {str(value['axis'])}, {str(value['value'])}"
+    return str(value["value"])
+
+
+def profileFileName(layoutName, joyName, outputFile=None, projected=False):
+    # [LAYOUT]_[JOYSTICK NAME].json (not overwriting existing files), or custom output file
+    # (plus _[LAYOUT] suffix for the configurations projected onto other layouts)
+    padLayout = "FULL" if layoutName == Mode.FULL else layoutName.upper()
+    if outputFile:
+        if not projected:
+            return outputFile
+        root, ext = os.path.splitext(outputFile)
+        return f"{root}_{get_valid_filename(padLayout)}{ext or '.json'}"
+    fileBaseName = get_valid_filename(padLayout + "_" + joyName)
+    fileName = f"{fileBaseName[0:64]}.json"
+    i = 0
+    while os.path.exists(fileName):
+        i += 1
+        fileName = f"{fileBaseName}_{i}.json"
+    return fileName
+
+
+def profileContent(joysticksInfo, layoutName, joystick_id, values, calibration=None, gestures=None):
+    output = {
+        "joysticks_info": joysticksInfo,
+        "layout": layoutName,
+        "joystick_configured": joystick_id,
+        joystick_id: values
+    }
+    if calibration:
+        output["calibration"] = calibration
+    if gestures:
+        output["gestures"] = gestures
+    return output
+
+
+def writeProfile(fileName, joysticksInfo, layoutName, joystick_id, values, calibration=None, gestures=None):
+    # gestures are written by hand: if none are given, the ones of the file being replaced (if any) are kept
+    # returns the written content
+    if gestures is None and os.path.exists(fileName):
+        previous = readProfileContent(fileName)
+        gestures = previous.get("gestures") if previous is not None else None
+    content = profileContent(joysticksInfo, layoutName, joystick_id, values, calibration, gestures)
+    write_json_atomic(fileName, content)
+    return content
+
+
+def profileSummary(content):
+    # (guid, name, layout, values) of a profile content. KeyError / TypeError if it is not a profile
+    joystick_id = content["joystick_configured"]
+    info = content["joysticks_info"][joystick_id]
+    return info["guid"], info.get("name", ""), content["layout"], content[joystick_id]
+
+
+def readProfileContent(fileName):
+    # content of a saved profile, or None if the file is not a profile
+    try:
+        with open(fileName, "r", encoding="utf8") as f:
+            content = json.load(f)
+        profileSummary(content)
+        return content
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def readProfile(fileName):
+    # (guid, layout, values, gestures) of a saved profile, or None if the file is not a profile
+    # gestures: optional "gestures" section of the profile (see _gestures.py), empty if none
+    content = readProfileContent(fileName)
+    if content is None:
+        return None
+    guid, name, layout, values = profileSummary(content)
+    return guid, layout, values, content.get("gestures") or {}
+
+
+def loadProfiles(folder="."):
+    # latest profile of every controller model (by guid) found in folder. Profiles saved in the same session
+    # (projected onto other layouts) are tied by time: the one with more keys is used
+    profiles = {}
+    for entry in os.scandir(folder):
+        if not entry.name.endswith(".json") or not entry.is_file():
+            continue
+        profile = readProfile(entry.path)
+        if profile is None:
+            continue
+        guid, layout, values, gestures = profile
+        rank = (int(entry.stat().st_mtime), len(values))
+        if guid not in profiles or rank > profiles[guid][0]:
+            profiles[guid] = (rank, layout, values, gestures)
+    return {guid: (layout, values, gestures) for guid, (rank, layout, values, gestures) in profiles.items()}
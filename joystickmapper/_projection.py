@@ -0,0 +1,67 @@
+from ._layouts import keyAliases
+from ._langtexts import getDialogsText
+from ._utils import write_json_atomic
+
+
+def layoutKey(button):
+    # content between parenthesis is only shown on screen, it is not part of the key
+    return button.split("(", 1)[0].strip()
+
+
+def saveProjections(layoutIndex, layoutName, values, mainFileName, save):
+    # same session saved for every other layout fully covered by the configured keys. save(layoutName, values) writes
+    # the profile of one layout and returns its file name. Missing keys of the rest of layouts are reported (and saved
+    # to 'joystickmapper_projection.json'). Returns the report. Shared by every front end
+    profiles, missing = layoutIndex.project(values)
+    missing.pop(layoutName, None)
+    saved = {}
+    for projectedLayout, projectedValues in profiles.items():
+        if projectedLayout != layoutName:
+            saved[projectedLayout] = save(projectedLayout, projectedValues)
+    report = {"source": mainFileName, "layout": layoutName, "saved": saved, "missing": missing}
+    write_json_atomic("joystickmapper_projection.json", report)
+    return report
+
+
+def projectionText(report):
+    return getDialogsText("projected") % (", ".join(report["saved"].keys()) or "-", ", ".join(report["missing"].keys()) or "-")
+
+
+class LayoutIndex:
+    # precomputed keys (and their aliases) of every registered layout, so a single mapping session can be
+    # projected onto all layouts with one dictionary lookup per key
+
+    def __init__(self, layouts):
+
+        aliases = {}
+        for group in keyAliases:
+            for key in group:
+                aliases[key] = (key,) + tuple(alias for alias in group if alias != key)
+
+        self.keys = {}
+        for name, layout in layouts.items():
+            self.keys[name] = []
+            for button in layout:
+                key = layoutKey(button)
+                self.keys[name].append((key, aliases.get(key, (key,))))
+
+    def project(self, values):
+        # values: configured keys of one controller. Returns the profile of every fully covered layout,
+        # and the missing keys of every other layout
+        profiles = {}
+        missing = {}
+        for name, keys in self.keys.items():
+            profile = {}
+            missingKeys = []
+            for key, candidates in keys:
+                for candidate in candidates:
+                    if candidate in values:
+                        profile[key] = values[candidate]
+                        break
+                else:
+                    missingKeys.append(key)
+            if missingKeys:
+                missing[name] = missingKeys
+            else:
+                profiles[name] = profile
+        return profiles, missing
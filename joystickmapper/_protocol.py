@@ -0,0 +1,153 @@
+import os
+import struct
+import tempfile
+
+# framed binary protocol between the mapping daemon and its clients (Unix domain socket)
+# every frame: header (message type, payload length) + payload. All integers are little endian
+#   ADDED      instance (int16), guid (str), name (str), layout (str, empty if no profile for this controller)
+#   REMOVED    instance (int16)
+#   RAW        instance (int16), control (uint8), index (uint8), value1 (int16), value2 (int16)
+#              button: pressed (1 / 0), 0. Hat: x, y. Axis: value scaled to +-32767, 0
+#   MAPPED     instance (int16), pressed (uint8), key (str)
+#   GESTURE    instance (int16), gesture (str): name of a gesture of the profile (chord, long press...) fired
+#   SUBSCRIBE  (client to daemon) what to receive: bitmask of SUB_* values. First message of every client:
+#              connected devices are sent (as ADDED) right after it
+#   SWAP       (client to daemon) instance (int16), profile file (str, relative to the daemon profiles folder, files
+#              outside it are ignored; empty to go back to the profile of its guid). ADDED is sent again with the new
+#              layout
+# messages with values which do not fit their fields (struct.error when packed) are not sent
+# strings are utf8 encoded, prefixed with their length (uint8)
+
+HEADER = struct.Struct("<BH")
+ADDED = 1
+REMOVED = 2
+RAW = 3
+MAPPED = 4
+GESTURE = 5
+SUBSCRIBE = 16
+SWAP = 17
+
+SUB_DEVICES = 1
+SUB_RAW = 2
+SUB_MAPPED = 4
+
+BUTTON = 0
+HAT = 1
+AXIS = 2
+controlNames = {BUTTON: "button", HAT: "hat", AXIS: "axis"}
+
+_instance = struct.Struct("<h")
+_raw = struct.Struct("<hBBhh")
+_mapped = struct.Struct("<hB")
+_subscribe = struct.Struct("<B")
+
+
+def defaultSocketPath():
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "joystickmapper.sock")
+
+
+def defaultStateName():
+    # shared memory block with the state of every controller (see ControllerStateBuffer), one per user
+    return f"joystickmapper_state_{os.getuid()}"
+
+
+def frame(msgType, payload):
+    return HEADER.pack(msgType, len(payload)) + payload
+
+
+def _packStr(text):
+    data = text.encode("utf8")[:255]
+    return bytes((len(data),)) + data
+
+
+def _unpackStr(payload, offset):
+    length = payload[offset]
+    return payload[offset + 1:offset + 1 + length].decode("utf8", "replace"), offset + 1 + length
+
+
+def added(instance_id, guid, name, layout):
+    return frame(ADDED, _instance.pack(instance_id) + _packStr(guid) + _packStr(name) + _packStr(layout))
+
+
+def removed(instance_id):
+    return frame(REMOVED, _instance.pack(instance_id))
+
+
+def raw(instance_id, control, index, value1, value2=0):
+    return frame(RAW, _raw.pack(instance_id, control, index, value1, value2))
+
+
+def mapped(instance_id, key, pressed):
+    return frame(MAPPED, _mapped.pack(instance_id, 1 if pressed else 0) + _packStr(key))
+
+
+def gesture(instance_id, name):
+    return frame(GESTURE, _instance.pack(instance_id) + _packStr(name))
+
+
+def subscribe(mask):
+    return frame(SUBSCRIBE, _subscribe.pack(mask))
+
+
+def swap(instance_id, fileName=""):
+    return frame(SWAP, _instance.pack(instance_id) + _packStr(fileName))
+
+
+def decode(msgType, payload):
+    # message as a dict (None for unknown message types, so newer daemons can add messages)
+    if msgType == ADDED:
+        instance_id, = _instance.unpack_from(payload)
+        guid, offset = _unpackStr(payload, _instance.size)
+        name, offset = _unpackStr(payload, offset)
+        layout, offset = _unpackStr(payload, offset)
+        return {"type": "added", "instance_id": instance_id, "guid": guid, "name": name, "layout": layout}
+    elif msgType == REMOVED:
+        instance_id, = _instance.unpack_from(payload)
+        return {"type": "removed", "instance_id": instance_id}
+    elif msgType == RAW:
+        instance_id, control, index, value1, value2 = _raw.unpack_from(payload)
+        if control == AXIS:
+            value = value1 / 32767
+        elif control == HAT:
+            value = (value1, value2)
+        else:
+            value = value1
+        return {"type": "raw", "instance_id": instance_id, "control": controlNames.get(control, ""), "index": index,
+                "value": value}
+    elif msgType == MAPPED:
+        instance_id, pressed = _mapped.unpack_from(payload)
+        key, _ = _unpackStr(payload, _mapped.size)
+        return {"type": "mapped", "instance_id": instance_id, "key": key, "pressed": bool(pressed)}
+    elif msgType == GESTURE:
+        instance_id, = _instance.unpack_from(payload)
+        name, _ = _unpackStr(payload, _instance.size)
+        return {"type": "gesture", "instance_id": instance_id, "gesture": name}
+    elif msgType == SUBSCRIBE:
+        mask, = _subscribe.unpack_from(payload)
+        return {"type": "subscribe", "mask": mask}
+    elif msgType == SWAP:
+        instance_id, = _instance.unpack_from(payload)
+        fileName, _ = _unpackStr(payload, _instance.size)
+        return {"type": "swap", "instance_id": instance_id, "file": fileName}
+    return None
+
+
+class FrameReader:
+    # incremental decoder: feed() whatever the socket returned, get back the complete frames (partial ones are kept)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            msgType, length = HEADER.unpack_from(self.buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(self.buffer):
+                break
+            frames.append((msgType, bytes(self.buffer[offset + HEADER.size:end])))
+            offset = end
+        del self.buffer[:offset]
+        return frames
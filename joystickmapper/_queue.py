@@ -0,0 +1,95 @@
+import collections
+import os
+import threading
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+
+class BoundedEventQueue:
+    # bounded handoff between the listener (producer, its own thread) and the mapper (GUI thread)
+    # listener calls emit() as it would with a signal. pendingSig is emitted only when the queue was empty, so the GUI
+    # gets one queued call per batch, and drains it with pop(). When full, the overflow policy applies:
+    #   drop       oldest pending event is dropped
+    #   coalesce   an axis event replaces the pending value of the same axis (if any). Otherwise, oldest is dropped
+    #   pause      same as drop, but events are also discarded while paused (modal dialog open), and pending ones
+    #              are cleared when paused, so stale presses are never replayed once the dialog is closed
+
+    DROP = "drop"
+    COALESCE = "coalesce"
+    PAUSE = "pause"
+    policies = (DROP, COALESCE, PAUSE)
+
+    def __init__(self, pendingSig, maxSize=1024, policy=COALESCE):
+
+        if policy not in self.policies:
+            raise ValueError(policy)
+        self.pendingSig = pendingSig
+        self.maxSize = maxSize
+        self.policy = policy
+        self.events = collections.deque()
+        # coalesce policy: pending axis event by (instance, axis)
+        self.pendingAxes = {}
+        self.paused = 0
+        self.lock = threading.Lock()
+
+        self.dropped = 0
+        self.coalesced = 0
+        self.discarded = 0
+        self.peak = 0
+
+    def emit(self, event):
+        # listener thread
+        with self.lock:
+            if self.paused:
+                self.discarded += 1
+                return
+            wasEmpty = not self.events
+            if len(self.events) >= self.maxSize:
+                if self.policy == self.COALESCE and event.type == pygame.JOYAXISMOTION:
+                    pending = self.pendingAxes.get((event.instance_id, event.index))
+                    if pending is not None:
+                        pending.value = event.value
+                        self.coalesced += 1
+                        return
+                self.forget(self.events.popleft())
+                self.dropped += 1
+            self.events.append(event)
+            if self.policy == self.COALESCE and event.type == pygame.JOYAXISMOTION:
+                self.pendingAxes[(event.instance_id, event.index)] = event
+            if len(self.events) > self.peak:
+                self.peak = len(self.events)
+        if wasEmpty:
+            self.pendingSig.emit()
+
+    def pop(self):
+        # GUI thread. None if empty
+        with self.lock:
+            if not self.events:
+                return None
+            event = self.events.popleft()
+            self.forget(event)
+            return event
+
+    def forget(self, event):
+        if self.pendingAxes and event.type == pygame.JOYAXISMOTION:
+            key = (event.instance_id, event.index)
+            if self.pendingAxes.get(key) is event:
+                del self.pendingAxes[key]
+
+    def pause(self):
+        # nested dialogs: paused until every pause() has its resume()
+        with self.lock:
+            self.paused += 1
+            self.discarded += len(self.events)
+            self.events.clear()
+            self.pendingAxes.clear()
+
+    def resume(self):
+        with self.lock:
+            self.paused = max(0, self.paused - 1)
+
+    def counters(self):
+        with self.lock:
+            return {"policy": self.policy, "size": self.maxSize, "pending": len(self.events), "peak": self.peak,
+                    "dropped": self.dropped, "coalesced": self.coalesced, "discarded": self.discarded}
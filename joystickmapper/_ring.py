@@ -0,0 +1,83 @@
+import os
+import struct
+from multiprocessing import shared_memory
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+
+class EventRing:
+    # fixed-size event records in shared memory: one producer (capture process) and one consumer (UI process)
+    # header counters only grow, and each one is written by one side only (written: producer, read: consumer), so no
+    # lock is needed. If the consumer falls behind and the ring is full, new records are dropped (and counted)
+    # record: capture stamp (perf_counter_ns, same clock in both processes), event type, instance, index
+    # (button / hat / axis), x (button: pressed, hat: x), y (hat: y), axis value
+
+    header = struct.Struct("<QQQ")
+    headerSize = 64
+    record = struct.Struct("<qihhhhd4x")
+
+    def __init__(self, capacity=4096, name=None):
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.headerSize + capacity * self.record.size)
+            self.owner = True
+            self.header.pack_into(self.shm.buf, 0, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.capacity = capacity
+        self.slots = self.shm.buf[self.headerSize:self.headerSize + capacity * self.record.size]
+        # consumer side counter
+        self.readIndex = self.header.unpack_from(self.shm.buf, 0)[1]
+
+    def counters(self):
+        # written, read, dropped
+        return self.header.unpack_from(self.shm.buf, 0)
+
+    def write(self, captured, evType, instance_id=-1, index=0, x=0, y=0, value=0.0):
+        # producer side. Returns False if the ring is full (record dropped)
+        written, read, dropped = self.header.unpack_from(self.shm.buf, 0)
+        if written - read >= self.capacity:
+            struct.pack_into("<Q", self.shm.buf, 16, dropped + 1)
+            return False
+        self.record.pack_into(self.slots, (written % self.capacity) * self.record.size,
+                              captured, evType, instance_id, index, x, y, value)
+        # record is complete before it is published
+        struct.pack_into("<Q", self.shm.buf, 0, written + 1)
+        return True
+
+    @staticmethod
+    def recordValue(evType, x, y, value):
+        # JoyEvent value of a record
+        if evType == pygame.JOYAXISMOTION:
+            return value
+        elif evType == pygame.JOYHATMOTION:
+            return x, y
+        return x
+
+    def written(self):
+        return struct.unpack_from("<Q", self.shm.buf, 0)[0]
+
+    def drain(self, limit=None):
+        # consumer side: yields the records written so far (or up to the limit written count), unpacked straight from
+        # shared memory (no intermediate copy). Slots are released to the producer when the drain ends
+        limit = self.written() if limit is None else limit
+        size = self.record.size
+        try:
+            while self.readIndex < limit:
+                record = self.record.unpack_from(self.slots, (self.readIndex % self.capacity) * size)
+                self.readIndex += 1
+                yield record
+        finally:
+            struct.pack_into("<Q", self.shm.buf, 8, self.readIndex)
+
+    def close(self):
+        self.slots.release()
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
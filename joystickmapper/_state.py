@@ -0,0 +1,262 @@
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._langtexts import getErrorText
+
+
+class ControllerStateTable:
+    # current value of every button, hat and axis of every connected controller, updated by the listener (in its thread)
+    # the UI never reads it directly: it asks for a snapshot, which the listener builds and emits
+
+    def __init__(self):
+        self.controllers = {}
+        self.version = 0
+
+    def setJoysticks(self, joysticks):
+        controllers = {}
+        for joystick in joysticks:
+            instance_id = joystick.get_instance_id()
+            state = self.controllers.get(instance_id)
+            if state is None:
+                state = {"name": joystick.get_name(),
+                         "buttons": [False] * joystick.get_numbuttons(),
+                         "hats": [(0, 0)] * joystick.get_numhats(),
+                         "axes": [0.0] * joystick.get_numaxes()}
+            controllers[instance_id] = state
+        self.controllers = controllers
+        self.version += 1
+
+    def update(self, event):
+        state = self.controllers.get(getattr(event, "instance_id", None))
+        if state is None:
+            return
+        if event.type == pygame.JOYAXISMOTION:
+            values, index, value = state["axes"], event.axis, event.value
+        elif event.type == pygame.JOYBUTTONDOWN:
+            values, index, value = state["buttons"], event.button, True
+        elif event.type == pygame.JOYBUTTONUP:
+            values, index, value = state["buttons"], event.button, False
+        elif event.type == pygame.JOYHATMOTION:
+            values, index, value = state["hats"], event.hat, event.value
+        else:
+            return
+        if index < len(values):
+            values[index] = value
+            self.version += 1
+
+    def snapshot(self):
+        return {"version": self.version,
+                "controllers": {str(instance_id): {"name": state["name"],
+                                                   "buttons": list(state["buttons"]),
+                                                   "hats": list(state["hats"]),
+                                                   "axes": list(state["axes"])}
+                                for instance_id, state in self.controllers.items()}}
+
+
+class ControllerStateBuffer:
+    # current state of every connected controller in a flat buffer (shared memory if named), updated in place by the
+    # listener as events arrive. Readers (other threads or processes) never lock or wait for the listener: every slot
+    # has a sequence number (seqlock), odd while it is being written, and readers retry if it changed while reading
+    # retries are bounded: if the writer died in the middle of a write (sequence left odd), readers get None instead of
+    # spinning forever
+    # reading a controller state costs the same no matter how many events arrived since the last read
+    # slot layout (128 bytes, little endian):
+    #   0   sequence (uint32)          4   instance id (int32, -1 if free)
+    #   8   buttons bitmask (2 x uint64, up to 128 buttons)
+    #   24  hats x, y (8 x int8, up to 4 hats)
+    #   32  number of buttons, hats and axes (3 x uint8)
+    #   48  axes (20 x float32)
+
+    slotSize = 128
+    maxButtons = 128
+    maxHats = 4
+    maxAxes = 20
+    # controllers with a slot (big cabinets and test rigs have 8-16 input devices). 128 bytes each
+    defaultCapacity = 32
+    maxRetries = 1000
+
+    def __init__(self, capacity=defaultCapacity, name=None, create=True):
+
+        size = capacity * self.slotSize
+        self.shm = None
+        if name is None:
+            # only shared with other threads of this process
+            self.buffer = memoryview(bytearray(size))
+        else:
+            if create:
+                try:
+                    self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+                except FileExistsError:
+                    # left by a previous owner which did not exit cleanly
+                    stale = shared_memory.SharedMemory(name)
+                    stale.close()
+                    stale.unlink()
+                    self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+            else:
+                self.shm = shared_memory.SharedMemory(name)
+                # readers must not remove the block when they exit (python < 3.13 tracks every attached block)
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            # readers get the capacity of the owner from the block size (rounded up to full pages by some systems,
+            # so the owner also takes them as slots)
+            capacity = self.shm.size // self.slotSize
+            size = capacity * self.slotSize
+            if create:
+                self.shm.buf[:size] = bytes(size)
+            self.buffer = self.shm.buf[:size]
+        self.capacity = capacity
+        self.name = name
+        self.owner = create
+
+        # typed views over the same memory (no copies)
+        self.sequences = self.buffer.cast("I")
+        self.instances = self.buffer.cast("i")
+        self.buttonMasks = self.buffer.cast("Q")
+        self.hatValues = self.buffer.cast("b")
+        self.axisValues = self.buffer.cast("f")
+        if create:
+            for slot in range(capacity):
+                self.instances[slot * 32 + 1] = -1
+        # writer side: instance id -> slot
+        self.slots = {}
+
+    # writer (listener thread)
+
+    def setJoysticks(self, joysticks):
+        connected = {joystick.get_instance_id(): joystick for joystick in joysticks}
+        for instance_id, slot in list(self.slots.items()):
+            if instance_id not in connected:
+                self.beginWrite(slot)
+                self.instances[slot * 32 + 1] = -1
+                self.endWrite(slot)
+                del self.slots[instance_id]
+        for instance_id, joystick in connected.items():
+            if instance_id in self.slots:
+                continue
+            free = [slot for slot in range(self.capacity) if slot not in self.slots.values()]
+            if not free:
+                print(getErrorText("state_slots") % (instance_id, self.capacity))
+                continue
+            slot = free[0]
+            self.beginWrite(slot)
+            base = slot * self.slotSize
+            self.buffer[base + 8:base + self.slotSize] = bytes(self.slotSize - 8)
+            struct.pack_into("<BBB", self.buffer, base + 32, min(joystick.get_numbuttons(), self.maxButtons),
+                             min(joystick.get_numhats(), self.maxHats), min(joystick.get_numaxes(), self.maxAxes))
+            self.instances[slot * 32 + 1] = instance_id
+            self.endWrite(slot)
+            self.slots[instance_id] = slot
+
+    def update(self, event):
+        slot = self.slots.get(getattr(event, "instance_id", None))
+        if slot is None:
+            return
+        if event.type == pygame.JOYAXISMOTION:
+            if event.axis < self.maxAxes:
+                self.beginWrite(slot)
+                self.axisValues[slot * 32 + 12 + event.axis] = event.value
+                self.endWrite(slot)
+        elif event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+            if event.button < self.maxButtons:
+                index = slot * 16 + 1 + event.button // 64
+                bit = 1 << (event.button % 64)
+                self.beginWrite(slot)
+                if event.type == pygame.JOYBUTTONDOWN:
+                    self.buttonMasks[index] |= bit
+                else:
+                    self.buttonMasks[index] &= ~bit
+                self.endWrite(slot)
+        elif event.type == pygame.JOYHATMOTION:
+            if event.hat < self.maxHats:
+                index = slot * self.slotSize + 24 + event.hat * 2
+                self.beginWrite(slot)
+                self.hatValues[index] = event.value[0]
+                self.hatValues[index + 1] = event.value[1]
+                self.endWrite(slot)
+
+    def beginWrite(self, slot):
+        self.sequences[slot * 32] = (self.sequences[slot * 32] + 1) & 0xFFFFFFFF
+
+    def endWrite(self, slot):
+        self.sequences[slot * 32] = (self.sequences[slot * 32] + 1) & 0xFFFFFFFF
+
+    # readers (any thread or process)
+
+    def findSlot(self, instance_id):
+        for slot in range(self.capacity):
+            if self.instances[slot * 32 + 1] == instance_id:
+                return slot
+        return None
+
+    def connected(self):
+        return [instance for instance in (self.instances[slot * 32 + 1] for slot in range(self.capacity))
+                if instance != -1]
+
+    def readSlot(self, instance_id, read, default):
+        # read(slot) while the slot is not written (seqlock). default if not connected, None if the slot is never
+        # stable after maxRetries attempts (writer died in the middle of a write)
+        for _ in range(self.maxRetries):
+            slot = self.findSlot(instance_id)
+            if slot is None:
+                return default
+            sequence = self.sequences[slot * 32]
+            if sequence & 1:
+                continue
+            value = read(slot)
+            if self.sequences[slot * 32] == sequence and self.instances[slot * 32 + 1] == instance_id:
+                return value
+        return None
+
+    def button(self, instance_id, button):
+        if button >= self.maxButtons:
+            return False
+        return self.readSlot(instance_id, lambda slot: bool(self.buttonMasks[slot * 16 + 1 + button // 64] >>
+                                                            (button % 64) & 1), False)
+
+    def hat(self, instance_id, hat):
+        if hat >= self.maxHats:
+            return 0, 0
+        return self.readSlot(instance_id, lambda slot: (self.hatValues[slot * self.slotSize + 24 + hat * 2],
+                                                        self.hatValues[slot * self.slotSize + 25 + hat * 2]), (0, 0))
+
+    def axis(self, instance_id, axis):
+        if axis >= self.maxAxes:
+            return 0.0
+        return self.readSlot(instance_id, lambda slot: self.axisValues[slot * 32 + 12 + axis], 0.0)
+
+    def read(self, instance_id):
+        # consistent state of one controller: {"buttons": bitmask (int), "hats": [(x, y)], "axes": [float]}
+        # None if not connected (or if the writer died in the middle of a write)
+        return self.readSlot(instance_id, self.readState, None)
+
+    def readState(self, slot):
+        base = slot * self.slotSize
+        numButtons, numHats, numAxes = struct.unpack_from("<BBB", self.buffer, base + 32)
+        return {"buttons": self.buttonMasks[slot * 16 + 1] | self.buttonMasks[slot * 16 + 2] << 64,
+                "hats": [(self.hatValues[base + 24 + i * 2], self.hatValues[base + 25 + i * 2]) for i in range(numHats)],
+                "axes": self.axisValues[slot * 32 + 12:slot * 32 + 12 + numAxes].tolist()}
+
+    def numpyView(self):
+        # structured array over the same memory (no copy): requires numpy. Fields: sequence, instance, buttons,
+        # hats (x, y pairs), counts, axes. Readers should check sequence is even and unchanged around their read
+        import numpy as np
+        dtype = np.dtype({"names": ["sequence", "instance", "buttons", "hats", "counts", "axes"],
+                          "formats": ["<u4", "<i4", ("<u8", 2), ("i1", (self.maxHats, 2)), ("u1", 3),
+                                      ("<f4", self.maxAxes)],
+                          "offsets": [0, 4, 8, 24, 32, 48],
+                          "itemsize": self.slotSize})
+        return np.frombuffer(self.buffer, dtype=dtype)
+
+    def close(self):
+        for view in (self.sequences, self.instances, self.buttonMasks, self.hatValues, self.axisValues, self.buffer):
+            view.release()
+        if self.shm is not None:
+            self.shm.close()
+            if self.owner:
+                try:
+                    self.shm.unlink()
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,145 @@
+from PyQt5.QtGui import QPainter, QColor, QFontMetrics
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtWidgets import QScrollArea, QWidget
+
+
+class StateCanvas(QWidget):
+    # paints buttons (lamps), hats (crosses) and axes (bars) of every controller in a single pass
+
+    margin = 10
+    lampSize = 22
+    barWidth = 220
+    barHeight = 14
+    buttonsPerRow = 16
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.state = {}
+        self.messages = []
+        self.background = QColor("darkgreen")
+        self.idle = QColor(0, 70, 0)
+        self.lit = QColor("lightgreen")
+        self.text = QColor("white")
+
+    def setState(self, state):
+        self.state = state
+        self.setMinimumHeight(self.contentHeight())
+        self.update()
+
+    def setMessages(self, messages):
+        self.messages = messages
+        self.setMinimumHeight(self.contentHeight())
+        self.update()
+
+    def contentHeight(self):
+        lineHeight = QFontMetrics(self.font()).height()
+        height = self.margin + len(self.messages) * lineHeight
+        for controller in self.state.values():
+            buttonRows = (len(controller["buttons"]) + self.buttonsPerRow - 1) // self.buttonsPerRow
+            height += self.margin + lineHeight + self.margin
+            height += len(controller["axes"]) * (self.barHeight + 6)
+            height += (self.lampSize * 3 + self.margin) if controller["hats"] else 0
+            height += buttonRows * (self.lampSize + 6)
+        return height + self.margin
+
+    def paintEvent(self, a0):
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.fillRect(self.rect(), self.background)
+        metrics = QFontMetrics(self.font())
+        lineHeight = metrics.height()
+        x = self.margin
+        y = self.margin
+
+        painter.setPen(self.text)
+        for message in self.messages:
+            painter.drawText(x, y + metrics.ascent(), message)
+            y += lineHeight
+
+        for instance_id, controller in self.state.items():
+            y += self.margin
+            painter.setPen(self.text)
+            painter.drawText(x, y + metrics.ascent(), f"{instance_id}: {controller['name']}")
+            y += lineHeight + self.margin
+
+            # axes: bar filled from center (rest position of a stick) to current value
+            for axis, value in enumerate(controller["axes"]):
+                painter.setPen(self.text)
+                painter.drawText(x, y + metrics.ascent(), f"A{axis}")
+                barX = x + 40
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(self.idle)
+                painter.drawRect(QRectF(barX, y, self.barWidth, self.barHeight))
+                center = barX + self.barWidth / 2
+                width = self.barWidth / 2 * max(-1.0, min(1.0, value))
+                painter.setBrush(self.lit)
+                painter.drawRect(QRectF(min(center, center + width), y, abs(width), self.barHeight))
+                painter.setPen(self.text)
+                painter.drawText(int(barX + self.barWidth + 10), y + metrics.ascent(), f"{value:+.3f}")
+                y += self.barHeight + 6
+
+            # hats: 3 x 3 cross, lit in the pressed direction(s)
+            if controller["hats"]:
+                size = self.lampSize
+                for hat, (hatX, hatY) in enumerate(controller["hats"]):
+                    left = x + hat * (size * 3 + self.margin * 2)
+                    for dx, dy in ((0, 1), (-1, 0), (1, 0), (0, -1)):
+                        lit = (dx != 0 and dx == hatX) or (dy != 0 and dy == hatY)
+                        painter.setPen(Qt.PenStyle.NoPen)
+                        painter.setBrush(self.lit if lit else self.idle)
+                        painter.drawRect(QRectF(left + (dx + 1) * size, y + (1 - dy) * size, size - 2, size - 2))
+                    painter.setPen(self.text)
+                    painter.drawText(QRectF(left + size, y + size, size, size), Qt.AlignmentFlag.AlignCenter, f"H{hat}")
+                y += size * 3 + self.margin
+
+            # buttons: numbered lamps
+            for button, pressed in enumerate(controller["buttons"]):
+                column = button % self.buttonsPerRow
+                if button and not column:
+                    y += self.lampSize + 6
+                lampX = x + column * (self.lampSize + 8)
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(self.lit if pressed else self.idle)
+                painter.drawEllipse(QRectF(lampX, y, self.lampSize, self.lampSize))
+                painter.setPen(Qt.GlobalColor.black if pressed else self.text)
+                painter.drawText(QRectF(lampX, y, self.lampSize, self.lampSize), Qt.AlignmentFlag.AlignCenter, str(button))
+            if controller["buttons"]:
+                y += self.lampSize + 6
+
+        painter.end()
+
+
+class StatePanel(QScrollArea):
+    # live state of all controllers, used instead of the events console in inspect mode
+    # it is repainted only when a new state snapshot arrives (at a capped rate), not once per event
+    # also keeps the messages (controllers found, errors...) that would go to the console
+
+    maxMessages = 12
+
+    def __init__(self, *args, **kwargs):
+        QScrollArea.__init__(self, *args, **kwargs)
+
+        self.setWidgetResizable(True)
+        self.canvas = StateCanvas(self)
+        self.setWidget(self.canvas)
+        self.version = None
+        self.lines = []
+
+    def setState(self, snapshot):
+        # nothing changed since last snapshot: no repaint
+        if snapshot["version"] != self.version:
+            self.version = snapshot["version"]
+            self.canvas.setState(snapshot["controllers"])
+
+    def setText(self, text):
+        self.lines = text.splitlines()
+        self.canvas.setMessages(self.lines[-self.maxMessages:])
+
+    def appendText(self, text):
+        self.lines = (self.lines + text.splitlines())[-self.maxMessages:]
+        self.canvas.setMessages(self.lines)
+
+    def text(self):
+        return "\n".join(self.lines)
@@ -0,0 +1,55 @@
+import json
+import time
+
+
+class ListenerStats:
+    # cheap counters updated by the listener loop: a few integer additions per iteration / event
+
+    def __init__(self, fps):
+        self.frameBudget = 1_000_000_000 // fps
+        self.started = time.perf_counter_ns()
+        self.iterations = 0
+        self.eventsRead = 0
+        self.eventsByType = {}
+        self.emitted = 0
+        self.pollTime = 0
+        self.busyTime = 0
+        self.sleepTime = 0
+        self.maxBusyTime = 0
+        self.overruns = 0
+
+    def addEvent(self, eventType):
+        self.eventsRead += 1
+        self.eventsByType[eventType] = self.eventsByType.get(eventType, 0) + 1
+
+    def endIteration(self, pollTime, busyTime, sleepTime):
+        self.iterations += 1
+        self.pollTime += pollTime
+        self.busyTime += busyTime
+        self.sleepTime += sleepTime
+        if busyTime > self.maxBusyTime:
+            self.maxBusyTime = busyTime
+        if busyTime > self.frameBudget:
+            # iteration work alone did not fit in one frame
+            self.overruns += 1
+
+    def toDict(self):
+        return {
+            "time": time.time(),
+            "elapsed_ms": (time.perf_counter_ns() - self.started) // 1_000_000,
+            "iterations": self.iterations,
+            "events_read": self.eventsRead,
+            "events_by_type": {str(eventType): count for eventType, count in self.eventsByType.items()},
+            "events_emitted": self.emitted,
+            "events_filtered": self.eventsRead - self.emitted,
+            "poll_ms": self.pollTime / 1_000_000,
+            "busy_ms": self.busyTime / 1_000_000,
+            "sleep_ms": self.sleepTime / 1_000_000,
+            "max_busy_ms": self.maxBusyTime / 1_000_000,
+            "overruns": self.overruns
+        }
+
+    @staticmethod
+    def dump(stats, fileName="joystickmapper_stats.jsonl"):
+        with open(fileName, "a", encoding="utf8") as f:
+            f.write(json.dumps(stats) + "\n")
@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import time
+
+from ._profiles import profileContent, profileSummary, readProfileContent
+
+defaultStoreFile = "joystickmapper_profiles.db"
+
+schema = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    guid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    layout TEXT NOT NULL,
+    saved REAL NOT NULL,
+    keys INTEGER NOT NULL,
+    source TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_guid ON profiles (guid, saved);
+CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS profiles_layout ON profiles (layout);
+CREATE INDEX IF NOT EXISTS profiles_saved ON profiles (saved);
+CREATE UNIQUE INDEX IF NOT EXISTS profiles_source ON profiles (source);
+"""
+
+# summary columns returned by queries (content is only read when a profile is loaded)
+summaryColumns = ("id", "guid", "name", "layout", "saved", "keys", "source")
+
+
+class ProfileStore:
+    # optional SQLite store for saved profiles, instead of scanning folders of '[LAYOUT]_[JOYSTICK NAME].json' files
+    # profiles are indexed by guid, controller name, layout and save time, so the load dialog, the daemon and the CLI
+    # query them directly. Content is kept as the same JSON written to profile files (see profileContent())
+    # JSON files imported from a folder keep their path as source: importing them again replaces them
+
+    def __init__(self, path=defaultStoreFile):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(schema)
+
+    def close(self):
+        self.conn.close()
+
+    def save(self, joysticksInfo, layoutName, joystick_id, values, calibration=None, source=None, gestures=None):
+        content = profileContent(joysticksInfo, layoutName, joystick_id, values, calibration, gestures)
+        with self.conn:
+            return self.insert(content, time.time(), source)
+
+    def insert(self, content, saved, source=None):
+        guid, name, layout, values = profileSummary(content)
+        cursor = self.conn.execute("INSERT OR REPLACE INTO profiles (guid, name, layout, saved, keys, source, content) "
+                                   "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   (guid, name, layout, saved, len(values), source, json.dumps(content)))
+        return cursor.lastrowid
+
+    def importFolder(self, folder="."):
+        # every profile file in folder, in a single transaction. Returns (imported, skipped) files
+        imported = skipped = 0
+        with self.conn:
+            for entry in os.scandir(folder):
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                content = readProfileContent(entry.path)
+                if content is None:
+                    skipped += 1
+                    continue
+                self.insert(content, entry.stat().st_mtime, os.path.abspath(entry.path))
+                imported += 1
+        return imported, skipped
+
+    def query(self, guid=None, name=None, layout=None, limit=100):
+        # summaries (dicts) of matching profiles, latest first. name matches any part of the controller name
+        conditions = []
+        args = []
+        if guid:
+            conditions.append("guid = ?")
+            args.append(guid)
+        if name:
+            conditions.append("name LIKE ?")
+            args.append(f"%{name}%")
+        if layout:
+            conditions.append("layout = ?")
+            args.append(layout)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self.conn.execute(f"SELECT {', '.join(summaryColumns)} FROM profiles {where}"
+                                 f"ORDER BY saved DESC, id DESC LIMIT ?", args + [limit])
+        return [dict(zip(summaryColumns, row)) for row in rows]
+
+    def load(self, profileId):
+        # profile content (same as profile files), or None if not found
+        row = self.conn.execute("SELECT content FROM profiles WHERE id = ?", (profileId,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def remove(self, profileId):
+        with self.conn:
+            return self.conn.execute("DELETE FROM profiles WHERE id = ?", (profileId,)).rowcount > 0
+
+    def latestProfiles(self):
+        # same as loadProfiles(): latest profile of every controller model (by guid). Profiles saved in the same
+        # session (projected onto other layouts) are tied by time: the one with more keys is used
+        rows = self.conn.execute("SELECT p.content FROM (SELECT DISTINCT guid FROM profiles) g "
+                                 "JOIN profiles p ON p.id = (SELECT id FROM profiles WHERE guid = g.guid "
+                                 "ORDER BY CAST(saved AS INTEGER) DESC, keys DESC, id DESC LIMIT 1)")
+        profiles = {}
+        for (content,) in rows:
+            content = json.loads(content)
+            guid, name, layout, values = profileSummary(content)
+            profiles[guid] = (layout, values, content.get("gestures") or {})
+        return profiles
@@ -0,0 +1,249 @@
+import collections
+import os
+import threading
+import time
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+import pygame
+
+from ._event import controlNames
+from ._profiles import readProfile
+from ._gestures import GestureSet, GestureTracker, TimerWheel
+
+
+class CompiledProfile:
+    # saved profile compiled into lookup tables (by button, hat and axis number), built once and never modified,
+    # so it can be shared by any number of translators and swapped in without copying. Gestures of the profile
+    # (if any) are compiled too
+
+    def __init__(self, layout, values, gestures=None):
+
+        self.layout = layout
+        buttons = {}
+        hats = {}
+        axes = {}
+        for key, value in values.items():
+            if "hat" in value.keys():
+                hats.setdefault(value["hat"], []).append((key, value["value"][0], value["value"][1]))
+            elif "axis" in value.keys():
+                axes.setdefault(value["axis"], []).append((key, 1 if value["value"] > 0 else -1))
+            else:
+                buttons.setdefault(value["value"], []).append(key)
+        self.buttons = {index: tuple(keys) for index, keys in buttons.items()}
+        self.hats = {index: tuple(keys) for index, keys in hats.items()}
+        self.axes = {index: tuple(keys) for index, keys in axes.items()}
+        self.gestures = GestureSet(gestures, values.keys()) if gestures else None
+
+
+class ProfileCache:
+    # bounded LRU of compiled profile files (by path). A file is parsed and compiled again only if it was modified
+    # used off the event path (when a profile is swapped in), so translating events never parses nor compiles
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.profiles = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, fileName):
+        # compiled profile of a saved profile file, or None if it is not a profile
+        path = os.path.abspath(fileName)
+        try:
+            modified = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self.lock:
+            cached = self.profiles.get(path)
+            if cached is not None and cached[0] == modified:
+                self.profiles.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+        profile = readProfile(path)
+        if profile is None:
+            return None
+        guid, layout, values, gestures = profile
+        compiled = CompiledProfile(layout, values, gestures)
+        with self.lock:
+            self.misses += 1
+            self.profiles[path] = (modified, compiled)
+            self.profiles.move_to_end(path)
+            while len(self.profiles) > self.capacity:
+                self.profiles.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def counters(self):
+        with self.lock:
+            return {"size": len(self.profiles), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+class ProfileTranslator:
+    # translates raw events of one controller into the logical keys of its profile (press / release changes)
+    # one dictionary access per event in the tables of the compiled profile. The profile can be swapped at any time:
+    # it is read once per event, so every event is translated with either the old or the new one, never a mix
+
+    threshold = 0.5
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.pressed = set()
+
+    def swap(self, profile):
+        # returns the keys released by the swap (pressed with the old profile), so no key is left stuck
+        released = sorted(self.pressed)
+        self.pressed = set()
+        self.profile = profile
+        return released
+
+    def translate(self, event):
+        # returns the list of (key, pressed) changes caused by the event (JoyEvent, empty if none)
+
+        profile = self.profile
+        if event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+            pressed = event.type == pygame.JOYBUTTONDOWN
+            states = [(key, pressed) for key in profile.buttons.get(event.index, ())]
+
+        elif event.type == pygame.JOYHATMOTION:
+            x, y = event.value
+            # diagonals press both directions
+            states = [(key, (keyX != 0 and keyX == x) or (keyY != 0 and keyY == y))
+                      for key, keyX, keyY in profile.hats.get(event.index, ())]
+
+        elif event.type == pygame.JOYAXISMOTION:
+            states = [(key, event.value * sign >= self.threshold) for key, sign in profile.axes.get(event.index, ())]
+
+        else:
+            return []
+
+        changes = []
+        for key, pressed in states:
+            if pressed != (key in self.pressed):
+                if pressed:
+                    self.pressed.add(key)
+                else:
+                    self.pressed.discard(key)
+                changes.append((key, pressed))
+        return changes
+
+
+class DeviceMapper:
+    # connected controllers, and the translator of their profile (if there is a profile for their guid)
+    # device changes are returned as messages: {"type": "added", "instance_id", "guid", "name", "layout"} or
+    # {"type": "removed", "instance_id"}. Profile of every guid is compiled once (not once per connection)
+    # swap() replaces the profile of a single controller (e.g. menu / gameplay, or per player) until it is removed
+    # gestures of the profiles are emitted as gestureSig.emit(instance_id, name), if gestureSig is given. Long presses
+    # are timers: advance() has to be called regularly (e.g. once per listener iteration)
+
+    def __init__(self, profiles, cache=None, gestureSig=None):
+        self.profiles = profiles
+        self.compiled = {}
+        self.cache = cache or ProfileCache()
+        self.devices = {}
+        self.translators = {}
+        self.gestureSig = gestureSig
+        self.trackers = {}
+        self.wheel = TimerWheel()
+
+    def update(self, joysticksInfo):
+        # joysticksInfo as emitted by the listener (all connected controllers, by instance id)
+        connected = {int(instance_id): info for instance_id, info in joysticksInfo.items()}
+        changes = []
+        for instance_id in list(self.devices.keys()):
+            if instance_id not in connected or connected[instance_id]["guid"] != self.devices[instance_id]["guid"]:
+                changes.append(self.remove(instance_id))
+        for instance_id, info in connected.items():
+            if instance_id not in self.devices:
+                changes.append(self.add(instance_id, info["guid"], info["name"]))
+        return changes
+
+    def setProfiles(self, profiles):
+        # every device is reconnected, so its new layout is notified
+        self.profiles = profiles
+        self.compiled = {}
+        changes = []
+        for instance_id, device in list(self.devices.items()):
+            changes.append(self.remove(instance_id))
+            changes.append(self.add(instance_id, device["guid"], device["name"]))
+        return changes
+
+    def defaultProfile(self, guid):
+        if guid not in self.compiled:
+            layout, values, gestures = self.profiles.get(guid, ("", None, None))
+            self.compiled[guid] = CompiledProfile(layout, values, gestures) if values is not None else None
+        return self.compiled[guid]
+
+    def add(self, instance_id, guid, name):
+        profile = self.defaultProfile(guid)
+        layout = profile.layout if profile is not None else ""
+        self.devices[instance_id] = {"guid": guid, "name": name, "layout": layout}
+        if profile is not None:
+            self.translators[instance_id] = ProfileTranslator(profile)
+        self.setTracker(instance_id, profile)
+        return {"type": "added", "instance_id": instance_id, "guid": guid, "name": name, "layout": layout}
+
+    def swap(self, instance_id, profile=None):
+        # profile: compiled profile (see ProfileCache.load()), or None to go back to the one of its guid
+        # returns the device message with its new layout, and the keys released by the swap (None if not connected)
+        device = self.devices.get(instance_id)
+        if device is None:
+            return None, []
+        if profile is None:
+            profile = self.defaultProfile(device["guid"])
+        translator = self.translators.get(instance_id)
+        released = []
+        if profile is None:
+            if translator is not None:
+                released = translator.swap(translator.profile)
+                del self.translators[instance_id]
+        elif translator is None:
+            self.translators[instance_id] = ProfileTranslator(profile)
+        else:
+            released = translator.swap(profile)
+        device["layout"] = profile.layout if profile is not None else ""
+        self.setTracker(instance_id, profile)
+        return {"type": "added", "instance_id": instance_id, "guid": device["guid"], "name": device["name"],
+                "layout": device["layout"]}, released
+
+    def setTracker(self, instance_id, profile):
+        # gestures state starts again with every profile (pending long press timers of the old one are ignored)
+        tracker = self.trackers.pop(instance_id, None)
+        if tracker is not None:
+            tracker.active = False
+        if self.gestureSig is not None and profile is not None and profile.gestures is not None:
+            self.trackers[instance_id] = GestureTracker(profile.gestures, instance_id, self.wheel, self.gestureSig)
+
+    def remove(self, instance_id):
+        del self.devices[instance_id]
+        self.translators.pop(instance_id, None)
+        self.setTracker(instance_id, None)
+        return {"type": "removed", "instance_id": instance_id}
+
+    def translate(self, event):
+        translator = self.translators.get(event.instance_id)
+        if translator is None:
+            return []
+        changes = translator.translate(event)
+        if changes and self.trackers:
+            tracker = self.trackers.get(event.instance_id)
+            if tracker is not None:
+                now = event.captured / 1e9 if event.captured else time.perf_counter()
+                for key, pressed in changes:
+                    tracker.update(key, pressed, now)
+        return changes
+
+    def advance(self, now=None):
+        # fires the long presses which are due (perf_counter seconds, same clock as events capture time)
+        for tracker, key, generation, name in self.wheel.advance(time.perf_counter() if now is None else now):
+            tracker.expire(key, generation, name)
+
+
+def rawMessage(event):
+    # raw button / hat / axis event (JoyEvent) as a message (None for other events)
+    control = controlNames.get(event.type)
+    if control is None:
+        return None
+    return {"type": "raw", "instance_id": event.instance_id, "control": control, "index": event.index,
+            "value": event.value}
@@ -1,16 +1,18 @@
 from PyQt5.QtGui import QFontMetrics
 from PyQt5.QtCore import Qt, QRectF
 from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel, QStatusBar, QGraphicsView, \
-    QGraphicsScene, QGraphicsProxyWidget, QScrollArea, QComboBox, QPushButton, QSizePolicy, QMessageBox
+    QGraphicsScene, QGraphicsProxyWidget, QScrollArea, QComboBox, QPushButton, QSizePolicy, QMessageBox, QLineEdit
 
 from ._scrolllabel import ScrollLabel
+from ._statepanel import StatePanel
 from ._langtexts import *
 from ._utils import *
 
 
 class MainWindow_UI:
 
-    def __init__(self, parent, rotate_widget, angle, headless_mode, inspect_mode, windowed, pad_layout, ref_pad_layout):
+    def __init__(self, parent, rotate_widget, angle, headless_mode, inspect_mode, windowed, pad_layout, ref_pad_layout,
+                 state_panel=False):
 
         self.parent = parent
         self.rotateWidget = rotate_widget
@@ -20,6 +22,8 @@ class MainWindow_UI:
         self.windowed = windowed
         self.padLayout = pad_layout
         self.refPadLayout = ref_pad_layout
+        self.statePanel = state_panel
+        self.pageScroll = False
 
         self.setupUI()
         self.setupUIInspect()
@@ -60,6 +64,7 @@ class MainWindow_UI:
             self.proxy.setWidget(self.widget2)
             self.proxy.setTransformOriginPoint(self.proxy.boundingRect().center())
             self.scene.addItem(self.proxy)
+            self.tuneRotatedView(True)
             if not self.windowed:
                 h, w = self.parent.screen().size().width(), self.parent.screen().size().height()
                 self.graphicsview.setGeometry(0, 0, w, h)
@@ -115,19 +120,38 @@ class MainWindow_UI:
             dummylabel = QLabel()
             self.headerLayout.addWidget(dummylabel, 0, 5)
 
+            self.calibrate_btn = QPushButton()
+            self.calibrate_btn.setMinimumWidth(120)
+            self.calibrate_btn.setMinimumHeight(30)
+            self.calibrate_btn.setFont(font)
+            self.calibrate_btn.setText(getHeaderText("calibrate"))
+            self.headerLayout.addWidget(self.calibrate_btn, 0, 6)
+
             self.loadConfig_btn = QPushButton()
             self.loadConfig_btn.setMinimumWidth(120)
             self.loadConfig_btn.setMinimumHeight(30)
             self.loadConfig_btn.setFont(font)
             self.loadConfig_btn.setText(getHeaderText("load"))
-            self.headerLayout.addWidget(self.loadConfig_btn, 0, 6)
+            self.headerLayout.addWidget(self.loadConfig_btn, 0, 7)
 
             self.saveConfig_btn = QPushButton()
             self.saveConfig_btn.setMinimumWidth(120)
             self.saveConfig_btn.setMinimumHeight(30)
             self.saveConfig_btn.setFont(font)
             self.saveConfig_btn.setText(getHeaderText("save"))
-            self.headerLayout.addWidget(self.saveConfig_btn, 0, 7)
+            self.headerLayout.addWidget(self.saveConfig_btn, 0, 8)
+
+            # events filter (inspect mode only)
+            self.filter_lbl = QLabel(getHeaderText("filter"))
+            self.filter_lbl.setFont(font)
+            self.headerLayout.addWidget(self.filter_lbl, 1, 0)
+            self.filterEdit = QLineEdit()
+            self.filterEdit.setFont(font)
+            self.filterEdit.setMinimumHeight(30)
+            self.filterEdit.setPlaceholderText(getHeaderText("filter_hint"))
+            self.filterEdit.setClearButtonEnabled(True)
+            self.headerLayout.addWidget(self.filterEdit, 1, 1, 1, 8)
+            self.showFilter(self.inspectMode)
 
             self.headerLayout.setColumnStretch(0, 0)
             self.headerLayout.setColumnStretch(1, 0)
@@ -137,6 +161,7 @@ class MainWindow_UI:
             self.headerLayout.setColumnStretch(5, 1)
             self.headerLayout.setColumnStretch(6, 0)
             self.headerLayout.setColumnStretch(7, 0)
+            self.headerLayout.setColumnStretch(8, 0)
 
             self.mainLayout.addWidget(self.headerWidget)
             rowIndex += 1
@@ -198,6 +223,33 @@ class MainWindow_UI:
             self.mainWidget.setLayout(self.mainLayout)
         self.parent.setCentralWidget(self.mainWidget)
 
+    def tuneRotatedView(self, enable):
+        # rotated UI is a proxy item in a graphics scene: the scroll area can not blit when scrolling, so every scroll
+        # repaints the whole list through the scene transform. Tuned: scroll a whole page when the selected button
+        # leaves the view (instead of one row per button), no painter state save / restore, no antialiasing margins and
+        # no scene index for a single item. Not tuned: scroll row by row, Qt defaults
+        self.pageScroll = enable
+        if enable:
+            self.graphicsview.setOptimizationFlags(QGraphicsView.OptimizationFlag.DontSavePainterState |
+                                                   QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
+            self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        else:
+            self.graphicsview.setOptimizationFlags(QGraphicsView.OptimizationFlags())
+            self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+
+    def showButtonWidget(self, widget):
+        if self.pageScroll:
+            scrollBar = self.scroll.verticalScrollBar()
+            top = scrollBar.value()
+            if widget.y() < top or widget.y() + widget.height() > top + self.scroll.viewport().height():
+                scrollBar.setValue(widget.y() - self.button_widget_margin)
+        else:
+            self.scroll.ensureWidgetVisible(widget)
+
+    def showFilter(self, show):
+        self.filter_lbl.setVisible(show)
+        self.filterEdit.setVisible(show)
+
     def setupLayoutGrid(self, pad_layout, ref_pad_layout):
 
         self.button_widget_margin = 15
@@ -265,27 +317,26 @@ class MainWindow_UI:
 
         for i, button in enumerate(ref_pad_layout):
             button_widget = self.content_layout.itemAt(i).widget()
-            if i < len(pad_layout):
-                objectName = self.selected_style_tag if i == 0 else self.idle_style_tag
-                button_widget.setObjectName(objectName)
-                button_widget.setStyleSheet(self.main_style)
-                button_label = button_widget.layout().itemAt(0).widget()
-                button_label.setText(button)
-                button_label.setObjectName(objectName)
-                button_label.setStyleSheet(self.main_style)
-                button_value = button_widget.layout().itemAt(1).widget()
-                if "(" in button:
-                    currentButton = button.split("(", 1)[0].strip()
-                else:
-                    currentButton = button
-                if currentButton in pad_keys:
-                    value = pad_layout[currentButton]
-                else:
-                    value = self.notAssignedText
-                button_value.setText(value)
-                button_value.setObjectName(objectName)
-                button_value.setStyleSheet(self.main_style)
-                button_widget.show()
+            objectName = self.selected_style_tag if i == 0 else self.idle_style_tag
+            button_widget.setObjectName(objectName)
+            button_widget.setStyleSheet(self.main_style)
+            button_label = button_widget.layout().itemAt(0).widget()
+            button_label.setText(button)
+            button_label.setObjectName(objectName)
+            button_label.setStyleSheet(self.main_style)
+            button_value = button_widget.layout().itemAt(1).widget()
+            if "(" in button:
+                currentButton = button.split("(", 1)[0].strip()
+            else:
+                currentButton = button
+            if currentButton in pad_keys:
+                value = pad_layout[currentButton]
+            else:
+                value = self.notAssignedText
+            button_value.setText(value)
+            button_value.setObjectName(objectName)
+            button_value.setStyleSheet(self.main_style)
+            button_widget.show()
 
         for i in range(len(ref_pad_layout), self.content_layout.count()):
             button_widget = self.content_layout.itemAt(i).widget()
@@ -293,7 +344,8 @@ class MainWindow_UI:
 
     def setupUIInspect(self):
 
-        self.inspectWidget = ScrollLabel()
+        # live state panel (if enabled) replaces the events console
+        self.inspectWidget = StatePanel() if self.statePanel else ScrollLabel()
         self.inspectWidget.setStyleSheet(open(resource_path("qss/inspect.qss", module="joystickmapper"), "r").read())
 
         if self.inspectMode:
@@ -1,9 +1,8 @@
+import json
 import os
 import re
 import sys
 
-import pkg_resources
-
 
 def is_packaged():
     return getattr(sys, "frozen", False) or hasattr(sys, "_MEIPASS")
@@ -33,6 +32,8 @@ def resource_path(relative_path, inverted=False, use_dist_folder="", module=""):
     if not found and module:
         # resource might be inside a wheel (this will crash otherwise)
         try:
+            # imported here: pkg_resources is slow to import, and only needed to find resources
+            import pkg_resources
             ret = os.path.normpath(pkg_resources.resource_filename(module, relative_path))
             found = os.path.exists(ret)
         except:
@@ -61,3 +62,13 @@ def get_valid_filename(name):
     if s in {"", ".", ".."}:
         return ""
     return s
+
+
+def write_json_atomic(fileName, content):
+    # write to a temporary file in the same folder and then replace the target, so it is never left half-written
+    tmpFileName = fileName + ".tmp"
+    with open(tmpFileName, "w", encoding="utf8") as f:
+        json.dump(content, f, ensure_ascii=False, sort_keys=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpFileName, fileName)
@@ -1,14 +1,15 @@
+import atexit
+import json
+import multiprocessing
+import os
 import signal
 import sys
 import traceback
 
-from PyQt5.QtCore import QTimer
-from PyQt5.QtWidgets import QApplication
-
 from joystickmapper._utils import is_packaged
 from joystickmapper import Mode, Angle
-from joystickmapper._mapper import JoystickMapper
-from joystickmapper._langtexts import getInitMessage
+from joystickmapper._langtexts import getInitMessage, getErrorText
+from joystickmapper._profiler import SamplingProfiler
 
 
 def showInitMessage():
@@ -23,6 +24,16 @@ def getArgs():
     headless_mode = "--s" in sys.argv
     windowed = "--w" in sys.argv
     force_complete_layout = "--f" in sys.argv
+    latency_stats = "--latency" in sys.argv
+    stats_interval = 0
+    calibrate_axes = "--c" in sys.argv
+    project_all = "--all" in sys.argv
+    event_filter = ""
+    state_panel = "--p" in sys.argv
+    capture_process = "--proc" in sys.argv
+    queue_policy = "coalesce"
+    queue_size = 1024
+    profile_store = None
     for i, arg in enumerate(sys.argv):
         if arg == "-l":
             pad_layout = str(sys.argv[i + 1])
@@ -34,7 +45,104 @@ def getArgs():
             angle = int(sys.argv[i + 1])
         elif arg == "-o":
             output_file = str(sys.argv[i + 1])
-    return pad_layout, joystick_id, angle, headless_mode, windowed, output_file, force_complete_layout
+        elif arg == "-queue" and i + 1 < len(sys.argv):
+            queue_policy = str(sys.argv[i + 1])
+        elif arg == "-queuesize" and i + 1 < len(sys.argv) and sys.argv[i + 1].isdigit():
+            queue_size = max(1, int(sys.argv[i + 1]))
+        elif arg == "-store" and i + 1 < len(sys.argv):
+            profile_store = str(sys.argv[i + 1])
+        elif arg == "-filter" and i + 1 < len(sys.argv):
+            event_filter = str(sys.argv[i + 1])
+        elif arg == "--stats":
+            # interval in seconds is optional (defaults to 10)
+            if i + 1 < len(sys.argv) and sys.argv[i + 1].isdigit():
+                stats_interval = int(sys.argv[i + 1])
+            else:
+                stats_interval = 10
+    return pad_layout, joystick_id, angle, headless_mode, windowed, output_file, force_complete_layout, latency_stats, stats_interval, calibrate_axes, project_all, event_filter, state_panel, capture_process, queue_policy, queue_size, profile_store
+
+
+def getDaemonArgs():
+    socket_path = None
+    profiles_folder = "."
+    profile_store = None
+    state_slots = None
+    for i, arg in enumerate(sys.argv):
+        if arg == "-socket" and i + 1 < len(sys.argv):
+            socket_path = str(sys.argv[i + 1])
+        elif arg == "-profiles" and i + 1 < len(sys.argv):
+            profiles_folder = str(sys.argv[i + 1])
+        elif arg == "-store" and i + 1 < len(sys.argv):
+            profile_store = str(sys.argv[i + 1])
+        elif arg == "-slots" and i + 1 < len(sys.argv) and sys.argv[i + 1].isdigit():
+            state_slots = max(1, int(sys.argv[i + 1]))
+    return socket_path, profiles_folder, profile_store, state_slots
+
+
+def getStoreArgs():
+    store_file = None
+    import_folder = None
+    profile_id = None
+    filters = {"guid": None, "name": None, "layout": None, "limit": 100}
+    for i, arg in enumerate(sys.argv):
+        if i + 1 >= len(sys.argv):
+            break
+        if arg == "-store":
+            store_file = str(sys.argv[i + 1])
+        elif arg == "-import":
+            import_folder = str(sys.argv[i + 1])
+        elif arg == "-get" and sys.argv[i + 1].isdigit():
+            profile_id = int(sys.argv[i + 1])
+        elif arg in ("-guid", "-name", "-layout"):
+            filters[arg[1:]] = str(sys.argv[i + 1])
+        elif arg == "-limit" and sys.argv[i + 1].isdigit():
+            filters["limit"] = int(sys.argv[i + 1])
+    return store_file, import_folder, profile_id, filters
+
+
+def getFolderArgs(command):
+    # folders are the arguments following the command (current folder if none)
+    folders = []
+    for arg in sys.argv[sys.argv.index(command) + 1:]:
+        if arg.startswith("-"):
+            break
+        folders.append(arg)
+    return folders or ["."]
+
+
+def getLintArgs():
+    output_file = None
+    custom_layouts = "custom_layouts.json"
+    workers = None
+    for i, arg in enumerate(sys.argv):
+        if i + 1 >= len(sys.argv):
+            break
+        if arg == "-o":
+            output_file = str(sys.argv[i + 1])
+        elif arg == "-layouts":
+            custom_layouts = str(sys.argv[i + 1])
+        elif arg == "-workers" and sys.argv[i + 1].isdigit():
+            workers = max(1, int(sys.argv[i + 1]))
+    return getFolderArgs("--lint"), output_file, custom_layouts, workers
+
+
+def getConvertArgs():
+    formats = ["retroarch", "mame", "sdl"]
+    output_folder = "converted"
+    output_file = None
+    workers = None
+    for i, arg in enumerate(sys.argv):
+        if i + 1 >= len(sys.argv):
+            break
+        if arg == "-formats":
+            formats = [name.strip() for name in sys.argv[i + 1].split(",") if name.strip()]
+        elif arg == "-out":
+            output_folder = str(sys.argv[i + 1])
+        elif arg == "-o":
+            output_file = str(sys.argv[i + 1])
+        elif arg == "-workers" and sys.argv[i + 1].isdigit():
+            workers = max(1, int(sys.argv[i + 1]))
+    return getFolderArgs("--convert"), formats, output_folder, output_file, workers
 
 
 def sigint_handler(*args):
@@ -52,6 +160,105 @@ def exception_hook(exctype, value, tb):
 
 if __name__ == "__main__":
 
+    # capture process (--proc) is spawned by re-running this executable when packaged
+    multiprocessing.freeze_support()
+
+    # This will allow to catch and show some tracebacks (not all, anyway)
+    sys._excepthook = sys.excepthook
+    sys.excepthook = exception_hook
+
+    # command line tools print machine-readable output only
+    if "--store" not in sys.argv and "--lint" not in sys.argv and "--convert" not in sys.argv:
+        showInitMessage()
+
+    if "--profile" in sys.argv:
+        # sample all threads during the whole session and write the report on exit
+        profiler = SamplingProfiler()
+        profiler.start()
+        atexit.register(profiler.stop)
+
+    pad_layout, joystick_id, angle, headless_mode, windowed, output_file, force_complete_layout, latency_stats, stats_interval, calibrate_axes, project_all, event_filter, state_panel, capture_process, queue_policy, queue_size, profile_store = getArgs()
+
+    if "--lite" in sys.argv or "--tty" in sys.argv:
+        # Qt-free headless front end (pygame display, or terminal with --tty). Qt is never imported
+        # numpy is only needed to calibrate (not available in this mode), but pygame loads it on import if installed
+        sys.modules.setdefault("numpy", None)
+        from joystickmapper._lite import LiteMapper
+        lite = LiteMapper(pad_layout, joystick_id, angle, windowed, output_file, force_complete_layout, project_all,
+                          terminal="--tty" in sys.argv)
+        lite.run()
+        sys.exit()
+
+    if "--daemon" in sys.argv:
+        # long-running service: owns the controllers and profiles, and serves events to local clients (no UI)
+        sys.modules.setdefault("numpy", None)
+        from joystickmapper._daemon import MappingDaemon
+        socket_path, profiles_folder, profile_store, state_slots = getDaemonArgs()
+        daemon = MappingDaemon(socket_path, profiles_folder, profileStore=profile_store, stateSlots=state_slots)
+        signal.signal(signal.SIGTERM, lambda *args: daemon.stop())
+        signal.signal(signal.SIGHUP, lambda *args: daemon.requestReload())
+        daemon.run()
+        sys.exit()
+
+    if "--store" in sys.argv:
+        # query (and bulk import JSON profiles into) the profile store. Results are printed as JSON lines
+        sys.modules.setdefault("numpy", None)
+        from joystickmapper._store import ProfileStore, defaultStoreFile
+        store_file, import_folder, profile_id, filters = getStoreArgs()
+        store = ProfileStore(store_file or defaultStoreFile)
+        try:
+            if import_folder is not None:
+                imported, skipped = store.importFolder(import_folder)
+                print(json.dumps({"imported": imported, "skipped": skipped}))
+            if profile_id is not None:
+                print(json.dumps(store.load(profile_id), ensure_ascii=False))
+            elif import_folder is None:
+                for profile in store.query(**filters):
+                    print(json.dumps(profile, ensure_ascii=False))
+        finally:
+            store.close()
+        sys.exit()
+
+    if "--lint" in sys.argv:
+        # validate saved profiles against their layout (in parallel). Report is written as JSON lines
+        from joystickmapper._layouts import layouts
+        from joystickmapper._lint import lintReport
+        folders, output_file, custom_layouts, workers = getLintArgs()
+        if os.path.exists(custom_layouts):
+            try:
+                with open(custom_layouts, "r", encoding="utf8") as f:
+                    layouts.update(json.load(f))
+            except (OSError, ValueError):
+                # stdout is the report (JSON lines)
+                print(getErrorText("layout_mismatch"), file=sys.stderr)
+        output = open(output_file, "w", encoding="utf8") if output_file else sys.stdout
+        try:
+            summary = lintReport(folders, layouts, output, workers)
+        finally:
+            if output_file:
+                output.close()
+        sys.exit(1 if summary["ok"] < summary["files"] else 0)
+
+    if "--convert" in sys.argv:
+        # convert saved profiles to frontend / emulator controller configs (in parallel). Report as JSON lines
+        from joystickmapper._convert import convertReport, writers
+        folders, formats, output_folder, output_file, workers = getConvertArgs()
+        unknown = [name for name in formats if name not in writers]
+        if unknown:
+            print(getErrorText("formats") % (", ".join(unknown), ", ".join(writers.keys())))
+            sys.exit(1)
+        output = open(output_file, "w", encoding="utf8") if output_file else sys.stdout
+        try:
+            summary = convertReport(folders, formats, output_folder, output, workers)
+        finally:
+            if output_file:
+                output.close()
+        sys.exit(1 if summary["errors"] else 0)
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from joystickmapper._mapper import JoystickMapper
+
     if not is_packaged():
         # This will allow to manage Ctl-C interruption (e.g. when running from IDE)
         signal.signal(signal.SIGINT, sigint_handler)
@@ -59,16 +266,13 @@ if __name__ == "__main__":
         timer.timeout.connect(lambda: None)
         timer.start(500)
 
-    # This will allow to catch and show some tracebacks (not all, anyway)
-    sys._excepthook = sys.excepthook
-    sys.excepthook = exception_hook
-
-    showInitMessage()
-
     app = QApplication(sys.argv)
     app.setApplicationName("Simple Joystick Mapper")
-    pad_layout, joystick_id, angle, headless_mode, windowed, output_file, force_complete_layout = getArgs()
     win = JoystickMapper(pad_layout, joystick_id, angle, headless_mode, windowed, output_file,
-                         standalone_mode=True, force_complete_layout=force_complete_layout)
+                         standalone_mode=True, force_complete_layout=force_complete_layout, latency_stats=latency_stats,
+                         stats_interval=stats_interval, calibrate_axes=calibrate_axes, project_all=project_all,
+                         event_filter=event_filter, state_panel=state_panel,
+                         capture_process=capture_process, queue_policy=queue_policy, queue_size=queue_size,
+                         profile_store=profile_store)
     win.show()
     app.exec()
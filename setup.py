@@ -31,12 +31,15 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     license='MIT',
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     package_data={"joystickmapper": ["qss/*.qss"]},
     install_requires=[
         "PyQt5~=5.15.11",
         "pygame~=2.6.1"
     ],
+    extras_require={
+        "calibration": ["numpy"]
+    },
     keywords="controller joystick mapper arcade retro gamepad buttons",
     classifiers=[
         'Development Status :: 4 - Beta',